@@ -4,29 +4,56 @@ from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_session, run_db
 from app.models import User
+from app.schemas import CurrentUser
 from app.auth.security import SECRET_KEY, ALGORITHM
+from app.auth.user_cache import user_cache
 
 security = HTTPBearer()
 
-def get_current_user(
+
+def load_user(db: Session, user_id: UUID):
+    return db.query(User).filter(User.id == user_id).first()
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
+    db: Session = Depends(get_session)
+) -> CurrentUser:
+    """
+    Returns a read-only principal, served from user_cache when
+    possible. Routes that modify the user load the row with load_user
+    and call user_cache.invalidate after committing. 401 for a bad
+    token or a user that no longer exists or is inactive.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id = UUID(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise credentials_exception
+
+    # Whose writes this request's session commits, for read_routing
+    db.info["user_id"] = user_id
+
+    principal = user_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = await run_db(db, load_user, user_id)
 
-    user = db.query(User).filter(User.id == UUID(user_id)).first()
+    # A deleted or deactivated account's tokens are simply invalid; the
+    # iOS client signs out on 401
+    if not user or user.is_active is False:
+        raise credentials_exception
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    principal = CurrentUser.model_validate(user)
+    user_cache.set(user_id, principal)
 
-    return user
+    return principal
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+
+# bcrypt releases the GIL, so each worker can use a core
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Hashing jobs allowed to run or wait before new ones get a 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 8)))
+
+_executor = ThreadPoolExecutor(
+    max_workers=HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+_pending = 0
+
+
+async def run_hashing(fn, *args):
+    """
+    Run a password hashing function on the dedicated executor, off
+    the request threadpool. Fails fast with 503 once HASH_MAX_PENDING
+    jobs are queued rather than letting a login burst pile up.
+    """
+    global _pending
+
+    if _pending >= HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.services.email_service import send_reset_email
-from app.database import get_db
+from app.services.email_service import build_reset_email
+from app.services.email_queue import email_queue
+from app.database import get_session, run_db
 from app import models, schemas
-from app.auth.security import get_current_user
+from app.auth.dependencies import get_current_user, load_user
+from app.auth.user_cache import user_cache
+from app.auth.hashing import run_hashing
 from app.auth.security import (
     hash_password,
     verify_password,
+    verify_and_update_password,
     create_access_token,
     create_reset_token,
     validate_password_strength   # ✅ fixed import
@@ -21,8 +25,34 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 # Register
 # -----------------------
 
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(
+        models.User.email == email
+    ).first()
+
+
+def _load_detached(db: Session, loader, *args):
+    """
+    Load a user, then detach it and hand the connection back to the
+    pool in the same DB call, so no connection is held while the
+    request waits for password hashing. db.add() re-attaches it.
+    """
+    user = loader(db, *args)
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+
+def _commit(db: Session, user: models.User = None):
+    db.commit()
+    if user is not None:
+        db.refresh(user)
+    return user
+
+
 @router.post("/register", response_model=schemas.UserOut)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Session = Depends(get_session)):
 
     # 🔐 Strong password validation
     errors = validate_password_strength(user.password)
@@ -32,9 +62,7 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
             detail=errors
         )
 
-    existing = db.query(models.User).filter(
-        models.User.email == user.email
-    ).first()
+    existing = await run_db(db, _load_detached, _get_user_by_email, user.email)
 
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -42,14 +70,12 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     new_user = models.User(
         name=user.name,
         email=user.email,
-        hashed_password=hash_password(user.password)
+        hashed_password=await run_hashing(hash_password, user.password)
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
 
-    return new_user
+    return await run_db(db, _commit, new_user)
 
 
 # -----------------------
@@ -57,15 +83,26 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
 # -----------------------
 
 @router.post("/login", response_model=schemas.TokenResponse)
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user: schemas.UserLogin, db: Session = Depends(get_session)):
 
-    db_user = db.query(models.User).filter(
-        models.User.email == user.email
-    ).first()
+    db_user = await run_db(db, _load_detached, _get_user_by_email, user.email)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await run_hashing(
+        verify_and_update_password, user.password, db_user.hashed_password
+    )
+
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Upgrade hashes made with outdated bcrypt parameters
+    if new_hash:
+        db_user.hashed_password = new_hash
+        db.add(db_user)
+        await run_db(db, _commit)
+
     token = create_access_token({"sub": str(db_user.id)})
 
     return {
@@ -79,13 +116,11 @@ def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
 # -----------------------
 
 @router.post("/forgot-password")
-def forgot_password(
+async def forgot_password(
     request: schemas.ForgotPasswordRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_session)
 ):
-    user = db.query(models.User).filter(
-        models.User.email == request.email
-    ).first()
+    user = await run_db(db, _get_user_by_email, request.email)
 
     # Always return generic message (security best practice)
     if not user:
@@ -93,8 +128,8 @@ def forgot_password(
 
     reset_token = create_reset_token(user.email)
 
-    # 🔥 Send real email
-    send_reset_email(user.email, reset_token)
+    # 🔥 Queue the email, the provider is not on the request path
+    await email_queue.enqueue(build_reset_email(user.email, reset_token))
 
     return {"message": "If email exists, reset link sent."}
 
@@ -103,9 +138,9 @@ def forgot_password(
 # -----------------------
 
 @router.post("/reset-password")
-def reset_password(
+async def reset_password(
     request: schemas.ResetPasswordRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_session)
 ):
 
     try:
@@ -122,9 +157,7 @@ def reset_password(
             detail="Invalid or expired token"
         )
 
-    user = db.query(models.User).filter(
-        models.User.email == email
-    ).first()
+    user = await run_db(db, _load_detached, _get_user_by_email, email)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -137,8 +170,10 @@ def reset_password(
             detail=errors
         )
 
-    user.hashed_password = hash_password(request.new_password)
-    db.commit()
+    user.hashed_password = await run_hashing(hash_password, request.new_password)
+    db.add(user)
+    await run_db(db, _commit)
+    user_cache.invalidate(user.id)
 
     return {"message": "Password reset successful"}
 
@@ -147,13 +182,17 @@ def reset_password(
 # -----------------------
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     request: schemas.ChangePasswordRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_session),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
+    user = await run_db(db, _load_detached, load_user, current_user.id)
+
     # 1️⃣ Verify current password
-    if not verify_password(request.current_password, current_user.hashed_password):
+    if not await run_hashing(
+        verify_password, request.current_password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=400,
             detail="Current password is incorrect"
@@ -163,20 +202,27 @@ def change_password(
     validate_password_strength(request.new_password)
 
     # 3️⃣ Update password
-    current_user.hashed_password = hash_password(request.new_password)
-    db.commit()
+    user.hashed_password = await run_hashing(hash_password, request.new_password)
+    db.add(user)
+    await run_db(db, _commit)
+    user_cache.invalidate(current_user.id)
 
     return {"message": "Password updated successfully"}
 
 # Delete Acccount #
 
+def _delete_user(db: Session, user_id):
+    db.delete(load_user(db, user_id))
+    db.commit()
+
+
 @router.delete("/delete-account")
-def delete_account(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def delete_account(
+    db: Session = Depends(get_session),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    db.delete(current_user)
-    db.commit()
+    await run_db(db, _delete_user, current_user.id)
+    user_cache.invalidate(current_user.id)
 
     return {"message": "Account deleted successfully"}
 
@@ -185,19 +231,19 @@ def delete_account(
 # -----------------------
 
 @router.put("/update-profile", response_model=schemas.UserOut)
-def update_profile(
+async def update_profile(
     request: schemas.UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_session),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
+    user = await run_db(db, load_user, current_user.id)
+
     # Update name
-    current_user.name = request.name
+    user.name = request.name
 
     # Optional: update email (check if already taken)
-    if request.email != current_user.email:
-        existing = db.query(models.User).filter(
-            models.User.email == request.email
-        ).first()
+    if request.email != user.email:
+        existing = await run_db(db, _get_user_by_email, request.email)
 
         if existing:
             raise HTTPException(
@@ -205,9 +251,9 @@ def update_profile(
                 detail="Email already in use"
             )
 
-        current_user.email = request.email
+        user.email = request.email
 
-    db.commit()
-    db.refresh(current_user)
+    user = await run_db(db, _commit, user)
+    user_cache.invalidate(user.id)
 
-    return current_user
\ No newline at end of file
+    return user
\ No newline at end of file
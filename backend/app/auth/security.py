@@ -2,14 +2,8 @@ import os
 import re
 from dotenv import load_dotenv
 from passlib.context import CryptContext
-from jose import jwt, JWTError
+from jose import jwt
 from datetime import datetime, timedelta
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-
-from app.database import get_db
-from app import models
 
 load_dotenv()
 
@@ -17,9 +11,14 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 
 # ----------------------
@@ -33,6 +32,14 @@ def hash_password(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Returns (valid, new_hash). new_hash is set when the stored hash
+    uses outdated parameters and should replace it.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 # ----------------------
 # Password Validation
 # ----------------------
@@ -78,35 +85,3 @@ def create_reset_token(email: str):
     expire = datetime.utcnow() + timedelta(minutes=30)
     payload = {"sub": email, "exp": expire}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
-
-
-# ----------------------
-# Get Current User
-# ----------------------
-
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-
-        if user_id is None:
-            raise credentials_exception
-
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-
-    if user is None:
-        raise credentials_exception
-
-    return user
@@ -0,0 +1,66 @@
+from uuid import uuid4
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.auth.dependencies import get_current_user
+from app.auth.security import create_access_token
+from app.auth.user_cache import UserCache, user_cache
+from app.database import get_session
+
+
+def test_lru_eviction_and_counters():
+    cache = UserCache(max_size=2, ttl=60)
+    a, b, c = uuid4(), uuid4(), uuid4()
+
+    cache.set(a, "a")
+    cache.set(b, "b")
+    assert cache.get(a) == "a"
+
+    cache.set(c, "c")
+
+    assert cache.get(b) is None
+    assert cache.get(c) == "c"
+    assert cache.stats()["evictions_total"] == 1
+    assert cache.stats()["hits_total"] == 2
+    assert cache.stats()["misses_total"] == 1
+
+
+def test_expired_and_invalidated_entries_miss():
+    cache = UserCache(max_size=10, ttl=-1)
+    a = uuid4()
+
+    cache.set(a, "a")
+    assert cache.get(a) is None
+
+    cache.ttl = 60
+    cache.set(a, "a")
+    cache.invalidate(a)
+    assert cache.get(a) is None
+
+
+def test_tokens_of_missing_or_inactive_users_are_a_401(db, users):
+    app = FastAPI()
+    app.dependency_overrides[get_session] = lambda: db
+
+    @app.get("/me")
+    async def me(current_user=Depends(get_current_user)):
+        return {"id": current_user.id}
+
+    client = TestClient(app)
+
+    def get_me(user_id):
+        token = create_access_token({"sub": str(user_id)})
+        return client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    a, b = users[:2]
+    db.query(models.User).filter(models.User.id == b).update({"is_active": False})
+    db.commit()
+
+    assert get_me(a).json() == {"id": str(a)}
+    for user_id in (b, uuid4()):
+        response = get_me(user_id)
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+    user_cache.invalidate(a)
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+
+class UserCache:
+    """
+    Bounded LRU of authenticated user principals with a TTL.
+
+    Entries are per worker process: invalidate() only reaches this
+    process, so the TTL bounds how stale another worker can be.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: UUID):
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: UUID, principal):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: UUID):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits_total": self.hits,
+                "misses_total": self.misses,
+                "evictions_total": self.evictions,
+                "invalidations_total": self.invalidations,
+            }
+
+
+user_cache = UserCache(
+    max_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60"))
+)
@@ -0,0 +1,91 @@
+import argparse
+from uuid import UUID
+
+from app.database import SessionLocal
+from app import crud
+from app.services.fx_rates import FileRateProvider
+
+
+# -----------------------
+# Commands
+# -----------------------
+
+def rebuild_balances(args):
+    db = SessionLocal()
+    try:
+        count = crud.rebuild_group_balances(db, args.group_id)
+    finally:
+        db.close()
+
+    print(f"Rebuilt {count} balance rows")
+
+
+def checkpoint_ledger(args):
+    db = SessionLocal()
+    try:
+        if args.group_id is not None:
+            folded = {args.group_id: crud.checkpoint_group_ledger(db, args.group_id)}
+        else:
+            folded = crud.compact_ledger(db, args.min_entries)
+    finally:
+        db.close()
+
+    for group_id, count in folded.items():
+        print(f"Checkpointed {count} entries for group {group_id}")
+    print(f"Checkpointed {len(folded)} groups")
+
+
+def load_fx_rates(args):
+    rates = FileRateProvider(args.path).fetch()
+
+    db = SessionLocal()
+    try:
+        version = crud.replace_fx_rates(db, rates)
+    finally:
+        db.close()
+
+    print(f"Loaded {len(rates)} rates as version {version}")
+
+
+# -----------------------
+# Entry point
+# -----------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-balances",
+        help="Repopulate group_balances from the ledger"
+    )
+    rebuild.add_argument("--group-id", type=UUID, default=None)
+    rebuild.set_defaults(func=rebuild_balances)
+
+    checkpoint = commands.add_parser(
+        "checkpoint-ledger",
+        help="Fold new ledger entries into per-group checkpoints"
+    )
+    checkpoint.add_argument(
+        "--min-entries", type=int, default=1000,
+        help="Only groups with at least this many entries since their last checkpoint"
+    )
+    checkpoint.add_argument(
+        "--group-id", type=UUID, default=None,
+        help="Checkpoint this group regardless of --min-entries"
+    )
+    checkpoint.set_defaults(func=checkpoint_ledger)
+
+    fx = commands.add_parser(
+        "load-fx-rates",
+        help="Replace the FX rate table from a JSON rates file"
+    )
+    fx.add_argument("path", help='{"base": "USD", "rates": {"EUR": "0.92", ...}}')
+    fx.set_defaults(func=load_fx_rates)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
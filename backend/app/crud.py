@@ -1,10 +1,15 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import func, select, insert, union_all, and_, or_
+from sqlalchemy import update as sql_update
 from uuid import UUID
-from decimal import Decimal
+from datetime import datetime
 import uuid
 
 from app import models, schemas
+from app.fairness.settlements import optimize_settlements
+from app.money import Money, to_cents
+from app.services.fx_rates import FxRates, MissingFxRate, fx_rate_cache
+from app.services.group_events import group_events
 
 
 # =====================================================
@@ -32,18 +37,207 @@ def create_group(db: Session, group: schemas.GroupCreate, creator_id: UUID):
     return db_group
 
 
-def get_groups(db: Session):
-    return db.query(models.Group)\
-        .filter(models.Group.is_active == True)\
-        .order_by(models.Group.created_at.desc())\
-        .all()
+def get_group_version(db: Session, group_id: UUID, user_id: UUID = None):
+    """
+    The group's change counter, or None if there is no such group.
+    With user_id, also None unless they are an active member.
+    """
+    query = db.query(models.Group.version)\
+        .filter(models.Group.id == group_id)
+
+    if user_id is not None:
+        query = query.join(models.GroupMember, _member_of(user_id))
+
+    return query.scalar()
+
+
+def get_group_base_currency(db: Session, group_id: UUID):
+    """
+    The currency the group's balances are read in, or None if there is
+    no such group.
+    """
+    return db.query(models.Group.base_currency)\
+        .filter(models.Group.id == group_id)\
+        .scalar()
+
+
+def _bump_group_version(db: Session, group_id: UUID = None, expected: int = None):
+    """
+    Advance the change counter of one group, returning its new value,
+    or of every group when group_id is None. With `expected`, only if
+    the group is still at that version; None if it isn't.
+
+    Writers call it before writing their rows and stamp them with the
+    returned version as change_version. The group row stays locked
+    until commit, so a group's writes commit in version order and
+    GET /sync never sees version n+1 before n.
+    """
+    bump = sql_update(models.Group)\
+        .values(version=models.Group.version + 1)\
+        .execution_options(synchronize_session=False)
+
+    if group_id is None:
+        db.execute(bump)
+        return None
+
+    bump = bump.where(models.Group.id == group_id)
+    if expected is not None:
+        bump = bump.where(models.Group.version == expected)
+
+    return db.execute(bump.returning(models.Group.version)).scalar()
+
+
+def _publish_group_change(group_id: UUID, version: int, event: str, data: dict,
+                          deltas: dict):
+    """
+    Tell the group's stream subscribers about a committed write: the
+    change itself, then which members' balances moved.
+    """
+    group_events.publish(group_id, version, event, data)
+
+    users = sorted({str(user_id) for user_id, _ in deltas})
+    if users:
+        group_events.publish(group_id, version, "balances.changed", {"users": users})
+
+
+def _group_page_filters(after=None):
+    filters = [models.Group.is_active == True]
+
+    if after is not None:
+        created_at, group_id = after
+        filters.append(or_(
+            models.Group.created_at < created_at,
+            and_(models.Group.created_at == created_at,
+                 models.Group.id < group_id)
+        ))
+
+    return filters
+
+
+def _member_of(user_id: UUID):
+    return and_(models.GroupMember.group_id == models.Group.id,
+                models.GroupMember.user_id == user_id,
+                models.GroupMember.is_active == True)
+
+
+def get_groups(db: Session, user_id: UUID, limit: int = None, after=None):
+    """
+    Active groups the user is an active member of, newest first.
+
+    `after` is a (created_at, id) keyset position from a previous page.
+    """
+    query = db.query(models.Group)\
+        .join(models.GroupMember, _member_of(user_id))\
+        .filter(*_group_page_filters(after))\
+        .order_by(models.Group.created_at.desc(),
+                  models.Group.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query.all()
+
+
+def get_group_rows(db: Session, user_id: UUID, limit: int = None, after=None,
+                   rates: FxRates = None):
+    """
+    The same page as get_groups, as plain dicts shaped like
+    schemas.GroupSummaryOut: each group with its active member count
+    and the user's net balance in the group's base currency.
+
+    Two statements whatever the page size: the page itself, counting
+    members in a correlated subquery, and one read of the balance
+    rows for the whole page.
+    """
+    counted = aliased(models.GroupMember)
+    member_count = select(func.count())\
+        .where(counted.group_id == models.Group.id,
+               counted.is_active == True)\
+        .correlate(models.Group)\
+        .scalar_subquery()
+
+    query = select(models.Group.id,
+                   models.Group.name,
+                   models.Group.base_currency,
+                   models.Group.created_by,
+                   models.Group.created_at,
+                   member_count.label("member_count"))\
+        .join(models.GroupMember, _member_of(user_id))\
+        .where(*_group_page_filters(after))\
+        .order_by(models.Group.created_at.desc(),
+                  models.Group.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    groups = [row._asdict() for row in db.execute(query)]
+    if not groups:
+        return groups
+
+    # Converted balances are rounded across the whole group so they
+    # sum to zero, so the user's share depends on the other members'
+    # rows in foreign currencies; rows in the base currency don't
+    balances = db.execute(
+        select(models.GroupBalance.group_id,
+               models.GroupBalance.user_id,
+               models.GroupBalance.currency,
+               models.GroupBalance.balance)
+        .join(models.Group, models.Group.id == models.GroupBalance.group_id)
+        .where(models.GroupBalance.group_id.in_([group["id"] for group in groups]),
+               or_(models.GroupBalance.user_id == user_id,
+                   models.GroupBalance.currency != models.Group.base_currency))
+    ).all()
+
+    base_currencies = {group["id"]: group["base_currency"] for group in groups}
+    if rates is None and any(row.currency != base_currencies[row.group_id] for row in balances):
+        rates = fx_rate_cache.get(db)
+
+    converted = (rates or FxRates(0, {})).convert_totals(
+        {(row.group_id, row.user_id, row.currency): Money.of(row.balance) for row in balances},
+        base_currencies
+    )
+
+    for group in groups:
+        group["balance"] = converted.get((group["id"], user_id), Money(0)).amount
+
+    return groups
 
 
 # =====================================================
 # EXPENSES
 # =====================================================
 
-def create_expense(db: Session, expense: schemas.ExpenseCreate):
+class UnsupportedCurrency(Exception):
+    """
+    No FX rate is loaded to convert the currency to the group's base
+    currency, so an expense in it would leave the group's balances
+    unreadable.
+    """
+
+
+def check_currency(db: Session, currency: str, base_currency: str, rates: FxRates = None):
+    """
+    Raise UnsupportedCurrency unless `currency` is the base currency or
+    converts to it at `rates` (the cached rates by default).
+    """
+    if currency == base_currency:
+        return
+
+    if rates is None:
+        rates = fx_rate_cache.get(db)
+
+    try:
+        rates.rate(currency, base_currency)
+    except MissingFxRate:
+        raise UnsupportedCurrency(currency, base_currency) from None
+
+
+def create_expense(db: Session, expense: schemas.ExpenseCreate, rates: FxRates = None):
+    base_currency = get_group_base_currency(db, expense.group_id)
+    currency = expense.currency or base_currency
+    check_currency(db, currency, base_currency, rates)
+
+    version = _bump_group_version(db, expense.group_id)
 
     # 1️⃣ Create expense
     db_expense = models.Expense(
@@ -51,12 +245,16 @@ def create_expense(db: Session, expense: schemas.ExpenseCreate):
         title=expense.title,
         total_amount=expense.total_amount,
         paid_by=expense.paid_by,
-        version=1
+        currency=currency,
+        version=1,
+        change_version=version
     )
 
     db.add(db_expense)
     db.flush()
 
+    deltas = {}
+
     # 2️⃣ Create splits
     for split in expense.splits:
         db.add(models.ExpenseSplit(
@@ -73,81 +271,268 @@ def create_expense(db: Session, expense: schemas.ExpenseCreate):
                 from_user=split.user_id,
                 to_user=expense.paid_by,
                 amount=split.amount,
+                currency=currency,
                 reference_type=models.LedgerReferenceType.expense,
-                reference_id=db_expense.id
+                reference_id=db_expense.id,
+                change_version=version
             ))
+            _add_ledger_delta(deltas, split.user_id, expense.paid_by, split.amount, currency)
+
+    # 4️⃣ Keep materialized balances in sync
+    _apply_balance_deltas(db, expense.group_id, deltas)
 
     db.commit()
     db.refresh(db_expense)
+
+    # 5️⃣ Notify stream subscribers
+    _publish_group_change(expense.group_id, version, "expense.created",
+                          {"expense_id": db_expense.id}, deltas)
     return db_expense
 
 
-def update_expense(db: Session, expense_id: UUID, update: schemas.ExpenseUpdate):
+class ExpenseVersionConflict(Exception):
+    """
+    The expense was edited since the caller read it.
+    """
 
-    old_expense = db.query(models.Expense)\
-        .filter(models.Expense.id == expense_id,
-                models.Expense.is_active == True)\
-        .first()
+
+def update_expense(db: Session, expense_id: UUID, update: schemas.ExpenseUpdate,
+                   rates: FxRates = None):
+    """
+    Replace an expense with a new version, keeping the old title,
+    amount, payer, currency and splits where the update leaves them
+    None. Returns None if the expense doesn't exist, and raises
+    UnsupportedCurrency for a new currency that doesn't convert.
+
+    The old version is retired with one conditional UPDATE that only
+    matches while it is still active, and still at update.version when
+    the client sends one. Its row lock queues concurrent edits of the
+    same expense; the loser matches nothing and gets
+    ExpenseVersionConflict instead of reversing the expense twice.
+    Every other step is a single statement, whatever the split count.
+    """
+    retire = sql_update(models.Expense)\
+        .where(models.Expense.id == expense_id,
+               models.Expense.is_active == True)
+
+    if update.version is not None:
+        retire = retire.where(models.Expense.version == update.version)
+
+    # 1️⃣ Soft delete old expense
+    old_expense = db.execute(
+        retire.values(is_active=False)
+        .returning(models.Expense.group_id,
+                   models.Expense.title,
+                   models.Expense.total_amount,
+                   models.Expense.paid_by,
+                   models.Expense.currency,
+                   models.Expense.version)
+        .execution_options(synchronize_session=False)
+    ).first()
 
     if not old_expense:
+        exists = db.query(models.Expense.id)\
+            .filter(models.Expense.id == expense_id)\
+            .first()
+        db.rollback()
+
+        if exists:
+            raise ExpenseVersionConflict(expense_id)
         return None
 
-    # 1️⃣ Soft delete old expense
-    old_expense.is_active = False
+    if update.currency is not None and update.currency != old_expense.currency:
+        try:
+            check_currency(
+                db, update.currency, get_group_base_currency(db, old_expense.group_id), rates
+            )
+        except UnsupportedCurrency:
+            db.rollback()
+            raise
 
-    # 2️⃣ Reverse old ledger entries
-    old_ledgers = db.query(models.LedgerEntry)\
-        .filter(models.LedgerEntry.reference_id == expense_id,
-                models.LedgerEntry.is_active == True)\
-        .all()
+    version = _bump_group_version(db, old_expense.group_id)
+    db.execute(
+        sql_update(models.Expense)
+        .where(models.Expense.id == expense_id)
+        .values(change_version=version)
+        .execution_options(synchronize_session=False)
+    )
+
+    now = datetime.utcnow()
+
+    # 2️⃣ Deactivate old ledger entries, which takes them out of every
+    # balance; no reversal entries, or the old version would be
+    # cancelled twice. UPDATE ... RETURNING reads checkpoint_seq after
+    # any compaction holding these rows has committed
+    old_ledgers = db.execute(
+        sql_update(models.LedgerEntry)
+        .where(models.LedgerEntry.reference_id == expense_id,
+               models.LedgerEntry.reference_type == models.LedgerReferenceType.expense,
+               models.LedgerEntry.is_active == True)
+        .values(is_active=False, change_version=version)
+        .returning(models.LedgerEntry.from_user,
+                   models.LedgerEntry.to_user,
+                   models.LedgerEntry.amount,
+                   models.LedgerEntry.currency,
+                   models.LedgerEntry.checkpoint_seq)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    deltas = {}
+    checkpoint_deltas = {}
 
     for entry in old_ledgers:
-        entry.is_active = False
-
-        # Insert reversal entry
-        db.add(models.LedgerEntry(
-            group_id=entry.group_id,
-            from_user=entry.to_user,
-            to_user=entry.from_user,
-            amount=entry.amount,
-            reference_type=models.LedgerReferenceType.adjustment,
-            reference_id=expense_id
-        ))
+        _add_ledger_delta(deltas, entry.from_user, entry.to_user, -entry.amount, entry.currency)
+
+        # Already folded into a checkpoint: take it back out of it too
+        if entry.checkpoint_seq is not None:
+            _add_ledger_delta(checkpoint_deltas, entry.from_user, entry.to_user,
+                              -entry.amount, entry.currency)
 
     # 3️⃣ Create new version
-    new_expense = models.Expense(
-        group_id=old_expense.group_id,
-        title=update.title or old_expense.title,
-        total_amount=update.total_amount or old_expense.total_amount,
-        paid_by=update.paid_by or old_expense.paid_by,
-        version=old_expense.version + 1
-    )
+    new_id = uuid.uuid4()
+    paid_by = update.paid_by or old_expense.paid_by
+    currency = update.currency or old_expense.currency
 
-    db.add(new_expense)
-    db.flush()
+    splits = update.splits
+    if splits is None:
+        splits = db.query(models.ExpenseSplit.user_id, models.ExpenseSplit.amount)\
+            .filter(models.ExpenseSplit.expense_id == expense_id,
+                    models.ExpenseSplit.is_active == True)\
+            .all()
+
+    db.execute(insert(models.Expense), [{
+        "id": new_id,
+        "group_id": old_expense.group_id,
+        "title": update.title or old_expense.title,
+        "total_amount": update.total_amount or old_expense.total_amount,
+        "paid_by": paid_by,
+        "currency": currency,
+        "version": old_expense.version + 1,
+        "is_active": True,
+        "change_version": version,
+        "created_at": now,
+        "updated_at": now
+    }])
 
-    splits = update.splits or []
+    ledger = []
 
     for split in splits:
-        db.add(models.ExpenseSplit(
-            expense_id=new_expense.id,
-            user_id=split.user_id,
-            amount=split.amount
-        ))
+        if split.user_id != paid_by:
+            ledger.append({
+                "id": uuid.uuid4(),
+                "group_id": old_expense.group_id,
+                "from_user": split.user_id,
+                "to_user": paid_by,
+                "amount": split.amount,
+                "currency": currency,
+                "reference_type": models.LedgerReferenceType.expense,
+                "reference_id": new_id,
+                "is_active": True,
+                "change_version": version,
+                "created_at": now
+            })
+            _add_ledger_delta(deltas, split.user_id, paid_by, split.amount, currency)
 
-        if split.user_id != new_expense.paid_by:
-            db.add(models.LedgerEntry(
-                group_id=new_expense.group_id,
-                from_user=split.user_id,
-                to_user=new_expense.paid_by,
-                amount=split.amount,
-                reference_type=models.LedgerReferenceType.expense,
-                reference_id=new_expense.id
-            ))
+    if splits:
+        db.execute(insert(models.ExpenseSplit), [
+            {
+                "id": uuid.uuid4(),
+                "expense_id": new_id,
+                "user_id": split.user_id,
+                "amount": split.amount,
+                "is_active": True
+            }
+            for split in splits
+        ])
+    if ledger:
+        db.execute(insert(models.LedgerEntry), ledger)
+
+    _apply_balance_deltas(db, old_expense.group_id, deltas)
+    _apply_balance_deltas(
+        db, old_expense.group_id, checkpoint_deltas, models.LedgerCheckpointBalance
+    )
 
     db.commit()
-    db.refresh(new_expense)
-    return new_expense
+    _publish_group_change(old_expense.group_id, version, "expense.updated",
+                          {"expense_id": new_id, "replaces": expense_id}, deltas)
+    return db.get(models.Expense, new_id)
+
+
+def bulk_create_expenses(db: Session, group_id: UUID, rows: list, rates: FxRates = None):
+    """
+    Insert a chunk of validated schemas.ExpenseImportRow with one
+    executemany per table and a single commit. Raises
+    UnsupportedCurrency before writing anything if a row's currency
+    doesn't convert; the import checks each row first.
+    """
+    now = datetime.utcnow()
+
+    base_currency = get_group_base_currency(db, group_id)
+    for currency in {row.currency for row in rows} - {None}:
+        check_currency(db, currency, base_currency, rates)
+
+    version = _bump_group_version(db, group_id)
+
+    expenses = []
+    splits = []
+    ledger = []
+    deltas = {}
+
+    for row in rows:
+        expense_id = uuid.uuid4()
+        created_at = row.created_at or now
+        currency = row.currency or base_currency
+
+        expenses.append({
+            "id": expense_id,
+            "group_id": group_id,
+            "title": row.title,
+            "total_amount": row.total_amount,
+            "paid_by": row.paid_by,
+            "currency": currency,
+            "version": 1,
+            "is_active": True,
+            "change_version": version,
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+
+        for split in row.splits:
+            splits.append({
+                "id": uuid.uuid4(),
+                "expense_id": expense_id,
+                "user_id": split.user_id,
+                "amount": split.amount,
+                "is_active": True
+            })
+
+            if split.user_id != row.paid_by:
+                ledger.append({
+                    "id": uuid.uuid4(),
+                    "group_id": group_id,
+                    "from_user": split.user_id,
+                    "to_user": row.paid_by,
+                    "amount": split.amount,
+                    "currency": currency,
+                    "reference_type": models.LedgerReferenceType.expense,
+                    "reference_id": expense_id,
+                    "is_active": True,
+                    "change_version": version,
+                    "created_at": now
+                })
+                _add_ledger_delta(deltas, split.user_id, row.paid_by, split.amount, currency)
+
+    db.execute(insert(models.Expense), expenses)
+    db.execute(insert(models.ExpenseSplit), splits)
+    if ledger:
+        db.execute(insert(models.LedgerEntry), ledger)
+
+    _apply_balance_deltas(db, group_id, deltas)
+
+    db.commit()
+    _publish_group_change(group_id, version, "expenses.imported",
+                          {"count": len(expenses)}, deltas)
+    return len(expenses)
 
 
 # =====================================================
@@ -155,85 +540,664 @@ def update_expense(db: Session, expense_id: UUID, update: schemas.ExpenseUpdate)
 # =====================================================
 
 def create_settlement(db: Session, settlement: schemas.SettlementCreate):
+    # Settlements are recorded in the group's base currency
+    currency = get_group_base_currency(db, settlement.group_id)
+    version = _bump_group_version(db, settlement.group_id)
 
     db_settlement = models.Settlement(
         group_id=settlement.group_id,
         from_user=settlement.from_user,
         to_user=settlement.to_user,
-        amount=settlement.amount
+        amount=settlement.amount,
+        change_version=version
     )
 
     db.add(db_settlement)
     db.flush()
 
     # Ledger entry
+    # Entries read "from_user owes to_user": a payment runs the other
+    # way, cancelling the payer's debt
     db.add(models.LedgerEntry(
         group_id=settlement.group_id,
-        from_user=settlement.from_user,
-        to_user=settlement.to_user,
+        from_user=settlement.to_user,
+        to_user=settlement.from_user,
         amount=settlement.amount,
+        currency=currency,
         reference_type=models.LedgerReferenceType.settlement,
-        reference_id=db_settlement.id
+        reference_id=db_settlement.id,
+        change_version=version
     ))
 
+    deltas = {}
+    _add_ledger_delta(deltas, settlement.to_user, settlement.from_user,
+                      settlement.amount, currency)
+    _apply_balance_deltas(db, settlement.group_id, deltas)
+
     db.commit()
     db.refresh(db_settlement)
+    _publish_group_change(settlement.group_id, version, "settlement.recorded",
+                          {"settlement_id": db_settlement.id}, deltas)
     return db_settlement
 
 
+class GroupVersionConflict(Exception):
+    """
+    The group changed since the caller read its version.
+    """
+
+
+def get_settlement_balances(db: Session, group_id: UUID, rates: FxRates = None):
+    """
+    (version, balances) for the group, or None if there is no such
+    group: its {user_id: Money} balances in the base currency. The
+    version is read first, so a racing write can only make the
+    balances newer than it, never older.
+    """
+    version = get_group_version(db, group_id)
+    if version is None:
+        return None
+
+    return version, get_group_balances(db, group_id, rates)
+
+
+def get_settlement_plan(db: Session, group_id: UUID, rates: FxRates = None):
+    """
+    (version, balances, transfers): get_settlement_balances plus the
+    fewest transfers that settle them, as optimize_settlements returns
+    them. None if there is no such group.
+    """
+    read = get_settlement_balances(db, group_id, rates)
+    if read is None:
+        return None
+
+    version, balances = read
+    return version, balances, optimize_settlements(balances)
+
+
+def settle_group(db: Session, group_id: UUID, version: int = None, rates: FxRates = None):
+    """
+    Compute the group's settlement plan and record it with
+    record_settlement_plan. None if there is no such group.
+    """
+    plan = get_settlement_plan(db, group_id, rates)
+    if plan is None:
+        return None
+
+    return record_settlement_plan(db, group_id, plan, version, rates)
+
+
+def record_settlement_plan(db: Session, group_id: UUID, plan: tuple, version: int = None,
+                           rates: FxRates = None):
+    """
+    Record every transfer of a get_settlement_plan result in one
+    transaction. Returns (version, settlements, balances) with the
+    recorded rows as dicts and the balances after them.
+
+    The plan is computed without holding any lock, so the route can
+    run the solver off the event loop, then applied with a
+    compare-and-set on the group version it was computed at, or at
+    `version` when the caller reviewed a plan first. If the balances
+    changed in between, nothing is written and GroupVersionConflict
+    is raised.
+
+    Balances come out zero, give or take a cent per member when
+    expenses in other currencies are converted and rounded.
+    """
+    current, balances, transfers = plan
+    if version is not None and version != current:
+        db.rollback()
+        raise GroupVersionConflict(group_id)
+
+    if not transfers:
+        return current, [], balances
+
+    currency = get_group_base_currency(db, group_id)
+
+    # 1️⃣ Compare-and-set, taking the group row lock until commit
+    new_version = _bump_group_version(db, group_id, expected=current)
+    if new_version is None:
+        db.rollback()
+        raise GroupVersionConflict(group_id)
+
+    now = datetime.utcnow()
+    settlements = []
+    ledger = []
+    deltas = {}
+
+    for transfer in transfers:
+        settlement_id = uuid.uuid4()
+        amount = transfer["amount"].amount
+
+        settlements.append({
+            "id": settlement_id,
+            "group_id": group_id,
+            "from_user": transfer["from"],
+            "to_user": transfer["to"],
+            "amount": amount,
+            "is_active": True,
+            "change_version": new_version,
+            "created_at": now
+        })
+        # Reversed, like create_settlement's entry
+        ledger.append({
+            "id": uuid.uuid4(),
+            "group_id": group_id,
+            "from_user": transfer["to"],
+            "to_user": transfer["from"],
+            "amount": amount,
+            "currency": currency,
+            "reference_type": models.LedgerReferenceType.settlement,
+            "reference_id": settlement_id,
+            "is_active": True,
+            "change_version": new_version,
+            "created_at": now
+        })
+        _add_ledger_delta(deltas, transfer["to"], transfer["from"], amount, currency)
+
+    # 2️⃣ One executemany per table
+    db.execute(insert(models.Settlement), settlements)
+    db.execute(insert(models.LedgerEntry), ledger)
+
+    # 3️⃣ Keep materialized balances in sync
+    _apply_balance_deltas(db, group_id, deltas)
+    db.flush()
+    balances = get_group_balances(db, group_id, rates)
+
+    db.commit()
+
+    # 4️⃣ Notify stream subscribers
+    _publish_group_change(group_id, new_version, "settlements.recorded",
+                          {"count": len(settlements)}, deltas)
+    return new_version, settlements, balances
+
+
 # =====================================================
 # BALANCES (Ledger Based)
 # =====================================================
 
-def get_group_balances(db: Session, group_id: UUID):
+def _add_ledger_delta(deltas: dict, from_user: UUID, to_user: UUID, amount, currency: str):
+    """
+    Accumulate the balance effect of one ledger entry in int cents,
+    keyed by (user_id, currency): from_user owes to_user `amount`.
+    """
+    cents = to_cents(amount)
+    deltas[from_user, currency] = deltas.get((from_user, currency), 0) - cents
+    deltas[to_user, currency] = deltas.get((to_user, currency), 0) + cents
+
+
+def _apply_balance_deltas(db: Session, group_id: UUID, deltas: dict,
+                          model=models.GroupBalance):
+    """
+    Apply accumulated deltas to group_balances (or another per-user
+    balance table) inside the caller's transaction. The increment
+    runs in SQL so concurrent writers don't overwrite each other, and
+    rows are locked in (user_id, currency) order so they can't deadlock.
+    """
+    for (user_id, currency), cents in sorted(deltas.items()):
+        if cents == 0:
+            continue
 
-    entries = db.query(models.LedgerEntry)\
-        .filter(models.LedgerEntry.group_id == group_id,
-                models.LedgerEntry.is_active == True)\
+        delta = Money(cents).amount
+
+        updated = db.query(model)\
+            .filter(model.group_id == group_id,
+                    model.user_id == user_id,
+                    model.currency == currency)\
+            .update(
+                {model.balance: model.balance + delta},
+                synchronize_session=False
+            )
+
+        if not updated:
+            db.add(model(
+                group_id=group_id,
+                user_id=user_id,
+                currency=currency,
+                balance=delta
+            ))
+
+
+def get_group_balances(db: Session, group_id: UUID, rates: FxRates = None):
+    """
+    {user_id: Money} in the group's base currency, converting the
+    per-currency balance rows at the current FX rates.
+    """
+    rows = db.query(models.GroupBalance.user_id,
+                    models.GroupBalance.currency,
+                    models.GroupBalance.balance,
+                    models.Group.base_currency)\
+        .join(models.Group, models.Group.id == models.GroupBalance.group_id)\
+        .filter(models.GroupBalance.group_id == group_id)\
         .all()
 
-    balances = {}
+    if not rows:
+        return {}
+
+    base_currency = rows[0].base_currency
+    if rates is None and any(row.currency != base_currency for row in rows):
+        rates = fx_rate_cache.get(db)
+
+    converted = (rates or FxRates(0, {})).convert_totals(
+        {(group_id, row.user_id, row.currency): Money.of(row.balance) for row in rows},
+        {group_id: base_currency}
+    )
+    return {user_id: balance for (_, user_id), balance in converted.items()}
+
+
+def _ledger_totals(db: Session, *filters):
+    """
+    Sum active ledger entries matching `filters` per (group, user,
+    currency).
+    """
+    debits = select(
+        models.LedgerEntry.group_id,
+        models.LedgerEntry.from_user.label("user_id"),
+        models.LedgerEntry.currency,
+        (-models.LedgerEntry.amount).label("amount")
+    ).where(models.LedgerEntry.is_active == True, *filters)
+
+    credits = select(
+        models.LedgerEntry.group_id,
+        models.LedgerEntry.to_user.label("user_id"),
+        models.LedgerEntry.currency,
+        models.LedgerEntry.amount.label("amount")
+    ).where(models.LedgerEntry.is_active == True, *filters)
+
+    movements = union_all(debits, credits).subquery()
+
+    return db.execute(
+        select(
+            movements.c.group_id,
+            movements.c.user_id,
+            movements.c.currency,
+            func.sum(movements.c.amount).label("balance")
+        ).group_by(movements.c.group_id, movements.c.user_id, movements.c.currency)
+    ).all()
+
+
+def _ledger_currency_totals(db: Session, group_id: UUID = None):
+    """
+    {(group_id, user_id, currency): cents} from the group's
+    checkpoint plus the active entries not folded into it yet.
+    """
+    checkpointed = db.query(models.LedgerCheckpointBalance)
+    filters = [models.LedgerEntry.checkpoint_seq.is_(None)]
+
+    if group_id is not None:
+        checkpointed = checkpointed.filter(
+            models.LedgerCheckpointBalance.group_id == group_id
+        )
+        filters.append(models.LedgerEntry.group_id == group_id)
+
+    totals = {
+        (row.group_id, row.user_id, row.currency): Money.of(row.balance)
+        for row in checkpointed.all()
+    }
+
+    for row in _ledger_totals(db, *filters):
+        key = (row.group_id, row.user_id, row.currency)
+        totals[key] = Money(totals.get(key, 0) + to_cents(row.balance))
+
+    return totals
+
+
+def compute_group_balances(db: Session, group_id: UUID = None, rates: FxRates = None):
+    """
+    Balances from the ledger as {(group_id, user_id): Money} in each
+    group's base currency. One pass over the ledger sums per currency;
+    the currency totals are then converted in a batch, one rate per
+    currency pair.
+    """
+    totals = _ledger_currency_totals(db, group_id)
 
-    for entry in entries:
-        balances.setdefault(entry.from_user, Decimal("0"))
-        balances.setdefault(entry.to_user, Decimal("0"))
+    bases = db.query(models.Group.id, models.Group.base_currency)
+    if group_id is not None:
+        bases = bases.filter(models.Group.id == group_id)
+    base_currencies = {row.id: row.base_currency for row in bases}
 
-        balances[entry.from_user] -= entry.amount
-        balances[entry.to_user] += entry.amount
+    if rates is None and any(
+        currency != base_currencies[gid] for gid, _, currency in totals
+    ):
+        rates = fx_rate_cache.get(db)
 
-    return balances
+    return (rates or FxRates(0, {})).convert_totals(totals, base_currencies)
+
+
+def rebuild_group_balances(db: Session, group_id: UUID = None):
+    """
+    Repopulate group_balances from the ledger checkpoints and the
+    entries after them. Rebuilds every group when group_id is None.
+
+    The version bump comes first, like in the writers: it takes the
+    group row lock, so no writer's delta can commit between reading
+    the totals and replacing the rows.
+    """
+    _bump_group_version(db, group_id)
+    totals = _ledger_currency_totals(db, group_id)
+
+    stale = db.query(models.GroupBalance)
+    if group_id is not None:
+        stale = stale.filter(models.GroupBalance.group_id == group_id)
+    stale.delete(synchronize_session=False)
+
+    db.add_all([
+        models.GroupBalance(
+            group_id=balance_group_id,
+            user_id=user_id,
+            currency=currency,
+            balance=cents.amount
+        )
+        for (balance_group_id, user_id, currency), cents in totals.items()
+    ])
+
+    db.commit()
+    return len(totals)
 
 
 # =====================================================
-# EXPENSE LISTING
+# FX RATES
 # =====================================================
 
-def get_expenses_by_group(db: Session, group_id: UUID):
+def replace_fx_rates(db: Session, rates: dict):
+    """
+    Replace the whole rate table with {currency: rate} under a new
+    version. Workers pick it up when their cache next checks the
+    version.
+    """
+    version = (db.query(func.max(models.FxRate.version)).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    db.query(models.FxRate).delete(synchronize_session=False)
+    db.execute(insert(models.FxRate), [
+        {"currency": currency, "rate": rate, "version": version, "updated_at": now}
+        for currency, rate in rates.items()
+    ])
+
+    db.commit()
+    fx_rate_cache.invalidate()
+    return version
 
-    expenses = db.query(models.Expense)\
-        .filter(models.Expense.group_id == group_id,
-                models.Expense.is_active == True)\
-        .order_by(models.Expense.created_at.desc())\
+
+# =====================================================
+# LEDGER CHECKPOINTS
+# =====================================================
+
+def checkpoint_group_ledger(db: Session, group_id: UUID):
+    """
+    Fold a group's entries that aren't in a checkpoint yet into its
+    checkpoint balances. Returns the number of entries folded.
+
+    Entries are claimed with UPDATE ... WHERE checkpoint_seq IS NULL
+    instead of a timestamp or id high-water mark: entries from
+    writers that haven't committed are invisible to the UPDATE, stay
+    NULL and go into the next checkpoint, so none is skipped or
+    counted twice. Entries deactivated later are taken back out of
+    the checkpoint by update_expense.
+    """
+    # Serializes compaction of the same group
+    checkpoint = db.query(models.LedgerCheckpoint)\
+        .filter(models.LedgerCheckpoint.group_id == group_id)\
+        .with_for_update()\
+        .first()
+
+    if not checkpoint:
+        checkpoint = models.LedgerCheckpoint(group_id=group_id, seq=0, entry_count=0)
+        db.add(checkpoint)
+        db.flush()
+
+    seq = checkpoint.seq + 1
+
+    claimed = db.execute(
+        sql_update(models.LedgerEntry)
+        .where(models.LedgerEntry.group_id == group_id,
+               models.LedgerEntry.checkpoint_seq.is_(None))
+        .values(checkpoint_seq=seq)
+        .returning(models.LedgerEntry.from_user,
+                   models.LedgerEntry.to_user,
+                   models.LedgerEntry.amount,
+                   models.LedgerEntry.currency,
+                   models.LedgerEntry.is_active)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if not claimed:
+        db.rollback()
+        return 0
+
+    deltas = {}
+    for entry in claimed:
+        if entry.is_active:
+            _add_ledger_delta(deltas, entry.from_user, entry.to_user,
+                              entry.amount, entry.currency)
+
+    _apply_balance_deltas(db, group_id, deltas, models.LedgerCheckpointBalance)
+
+    checkpoint.seq = seq
+    checkpoint.entry_count += len(claimed)
+
+    db.commit()
+    return len(claimed)
+
+
+def compact_ledger(db: Session, min_entries: int = 1000):
+    """
+    Checkpoint every group with at least `min_entries` entries since
+    its last checkpoint. Returns {group_id: entries folded}.
+    """
+    due = db.query(models.LedgerEntry.group_id)\
+        .filter(models.LedgerEntry.checkpoint_seq.is_(None))\
+        .group_by(models.LedgerEntry.group_id)\
+        .having(func.count() >= min_entries)\
         .all()
 
-    result = []
+    return {
+        row.group_id: checkpoint_group_ledger(db, row.group_id)
+        for row in due
+    }
 
-    for expense in expenses:
-        splits = db.query(models.ExpenseSplit)\
-            .filter(models.ExpenseSplit.expense_id == expense.id,
-                    models.ExpenseSplit.is_active == True)\
-            .all()
 
-        result.append({
-            "id": expense.id,
-            "group_id": expense.group_id,
-            "title": expense.title,
-            "total_amount": expense.total_amount,
-            "paid_by": expense.paid_by,
-            "version": expense.version,
-            "created_at": expense.created_at,
-            "updated_at": expense.updated_at,
-            "splits": splits
-        })
+# =====================================================
+# EXPENSE LISTING
+# =====================================================
+
+def _expense_page_filters(group_id: UUID, after=None):
+    filters = [models.Expense.group_id == group_id,
+               models.Expense.is_active == True]
+
+    if after is not None:
+        created_at, expense_id = after
+        filters.append(or_(
+            models.Expense.created_at < created_at,
+            and_(models.Expense.created_at == created_at,
+                 models.Expense.id < expense_id)
+        ))
+
+    return filters
+
+
+def get_expenses_by_group(db: Session, group_id: UUID, limit: int = None, after=None):
+    """
+    Active expenses for a group, newest first, with their active
+    splits loaded in one extra query.
+
+    `after` is a (created_at, id) keyset position from a previous page.
+    """
+    query = db.query(models.Expense)\
+        .options(selectinload(
+            models.Expense.splits.and_(models.ExpenseSplit.is_active == True)
+        ))\
+        .filter(*_expense_page_filters(group_id, after))\
+        .order_by(models.Expense.created_at.desc(),
+                  models.Expense.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query.all()
+
+
+SPLIT_LOAD_CHUNK = 500
+
+
+def get_expense_rows_by_group(db: Session, group_id: UUID, limit: int = None, after=None):
+    """
+    The same page as get_expenses_by_group, as plain dicts shaped like
+    schemas.ExpenseOut. Built from column tuples, so no ORM objects
+    are created or tracked; meant for list responses.
+    """
+    query = select(models.Expense.id,
+                   models.Expense.group_id,
+                   models.Expense.title,
+                   models.Expense.total_amount,
+                   models.Expense.paid_by,
+                   models.Expense.currency,
+                   models.Expense.version,
+                   models.Expense.created_at,
+                   models.Expense.updated_at)\
+        .where(*_expense_page_filters(group_id, after))\
+        .order_by(models.Expense.created_at.desc(),
+                  models.Expense.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    expenses = [{**row._asdict(), "splits": []} for row in db.execute(query)]
+    by_id = {expense["id"]: expense for expense in expenses}
+    ids = list(by_id)
+
+    # Chunked like selectinload, to keep the IN list bounded
+    for start in range(0, len(ids), SPLIT_LOAD_CHUNK):
+        splits = db.execute(
+            select(models.ExpenseSplit.expense_id,
+                   models.ExpenseSplit.user_id,
+                   models.ExpenseSplit.amount)
+            .where(models.ExpenseSplit.expense_id.in_(ids[start:start + SPLIT_LOAD_CHUNK]),
+                   models.ExpenseSplit.is_active == True)
+        )
+        for expense_id, user_id, amount in splits:
+            by_id[expense_id]["splits"].append({"user_id": user_id, "amount": amount})
+
+    return expenses
+
+
+# =====================================================
+# SYNC
+# =====================================================
+
+# Groups per statement, keeping the OR of per-group ranges well under
+# SQLite's expression depth limit
+SYNC_GROUP_CHUNK = 100
+
+
+def _sync_window(model, windows: list):
+    """
+    Rows of `model` changed within any of the (group_id, after, until)
+    windows; after=None means every active row up to `until`. Each
+    term is a range scan on the (group_id, change_version) index.
+    """
+    terms = []
+    for group_id, after, until in windows:
+        if after is None:
+            lower = model.is_active == True
+        else:
+            lower = model.change_version > after
+        terms.append(and_(model.group_id == group_id, lower, model.change_version <= until))
+    return or_(*terms)
+
+
+def get_changes(db: Session, user_id: UUID, since: dict):
+    """
+    What changed in the user's groups since `since`, {group_id:
+    version}, as plain dicts: returns (versions, changes), where
+    versions is the new {group_id: version} and changes has the
+    expenses, splits, settlements and ledger entries created or
+    deactivated in between, plus removed_groups the user no longer
+    belongs to. Groups missing from `since` come as a snapshot of
+    their active rows.
+
+    Rows carry the group version of the write that last changed them,
+    and every read is bounded by the versions read first, which are
+    all committed: a write that lands meanwhile is left whole for the
+    next call. One statement when nothing changed.
+    """
+    versions = dict(db.execute(
+        select(models.Group.id, models.Group.version)
+        .join(models.GroupMember, _member_of(user_id))
+        .where(models.Group.is_active == True)
+    ).all())
+
+    changes = {
+        "removed_groups": [group_id for group_id in since if group_id not in versions],
+        "expenses": [],
+        "splits": [],
+        "settlements": [],
+        "ledger_entries": [],
+    }
+
+    windows = [
+        (group_id, since.get(group_id), until)
+        for group_id, until in versions.items()
+        if group_id not in since or since[group_id] < until
+    ]
+
+    for start in range(0, len(windows), SYNC_GROUP_CHUNK):
+        chunk = windows[start:start + SYNC_GROUP_CHUNK]
+
+        changes["expenses"] += [row._asdict() for row in db.execute(
+            select(models.Expense.id,
+                   models.Expense.group_id,
+                   models.Expense.title,
+                   models.Expense.total_amount,
+                   models.Expense.paid_by,
+                   models.Expense.currency,
+                   models.Expense.version,
+                   models.Expense.is_active,
+                   models.Expense.change_version,
+                   models.Expense.created_at,
+                   models.Expense.updated_at)
+            .where(_sync_window(models.Expense, chunk))
+        )]
+
+        changes["settlements"] += [row._asdict() for row in db.execute(
+            select(models.Settlement.id,
+                   models.Settlement.group_id,
+                   models.Settlement.from_user,
+                   models.Settlement.to_user,
+                   models.Settlement.amount,
+                   models.Settlement.is_active,
+                   models.Settlement.change_version,
+                   models.Settlement.created_at)
+            .where(_sync_window(models.Settlement, chunk))
+        )]
+
+        changes["ledger_entries"] += [row._asdict() for row in db.execute(
+            select(models.LedgerEntry.id,
+                   models.LedgerEntry.group_id,
+                   models.LedgerEntry.from_user,
+                   models.LedgerEntry.to_user,
+                   models.LedgerEntry.amount,
+                   models.LedgerEntry.currency,
+                   models.LedgerEntry.reference_type,
+                   models.LedgerEntry.reference_id,
+                   models.LedgerEntry.is_active,
+                   models.LedgerEntry.change_version,
+                   models.LedgerEntry.created_at)
+            .where(_sync_window(models.LedgerEntry, chunk))
+        )]
+
+    # Splits never change on their own: an edit replaces the whole
+    # expense, so only new active expenses need theirs
+    ids = [expense["id"] for expense in changes["expenses"] if expense["is_active"]]
+
+    for start in range(0, len(ids), SPLIT_LOAD_CHUNK):
+        changes["splits"] += [row._asdict() for row in db.execute(
+            select(models.ExpenseSplit.id,
+                   models.ExpenseSplit.expense_id,
+                   models.ExpenseSplit.user_id,
+                   models.ExpenseSplit.amount)
+            .where(models.ExpenseSplit.expense_id.in_(ids[start:start + SPLIT_LOAD_CHUNK]),
+                   models.ExpenseSplit.is_active == True)
+        )]
 
-    return result
\ No newline at end of file
+    return versions, changes
@@ -1,13 +1,47 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 import os
 
+from app.db_metrics import PoolMetrics, instrumented_pool_class, instrument_engine
+
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql://neelshah@localhost:5432/payshare"
 )
 
-engine = create_engine(DATABASE_URL)
+# "sync" runs DB work in FastAPI's threadpool, "async" on the event loop
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# Pool settings are per engine, so per worker process
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+}
+
+pool_metrics = PoolMetrics()
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=instrumented_pool_class(QueuePool, pool_metrics),
+    **POOL_SETTINGS
+)
+instrument_engine(engine, pool_metrics)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -25,3 +59,134 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# -----------------------
+# Async Mode
+# -----------------------
+
+async_engine = None
+AsyncSessionLocal = None
+async_pool_metrics = None
+
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_pool_metrics = PoolMetrics()
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+        **POOL_SETTINGS
+    )
+    instrument_engine(async_engine.sync_engine, async_pool_metrics)
+
+    # Objects are serialized after the handler returns, outside the
+    # session's greenlet, so they must not expire on commit
+    AsyncSessionLocal = async_sessionmaker(
+        autoflush=False,
+        expire_on_commit=False,
+        bind=async_engine
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency used by routes: picks the session type for DB_MODE
+get_session = get_async_db if DB_MODE == "async" else get_db
+
+
+# -----------------------
+# Read Replica
+# -----------------------
+# Optional. Unset, reads go to the primary like everything else; see
+# app.read_routing for how GET routes pick a session.
+
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+read_engine = None
+ReadSessionLocal = None
+read_pool_metrics = None
+
+async_read_engine = None
+AsyncReadSessionLocal = None
+async_read_pool_metrics = None
+
+if READ_DATABASE_URL:
+    read_pool_metrics = PoolMetrics()
+
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        poolclass=instrumented_pool_class(QueuePool, read_pool_metrics),
+        **POOL_SETTINGS
+    )
+    instrument_engine(read_engine, read_pool_metrics)
+
+    ReadSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=read_engine
+    )
+
+    if DB_MODE == "async":
+        async_read_pool_metrics = PoolMetrics()
+
+        async_read_engine = create_async_engine(
+            os.getenv("ASYNC_READ_DATABASE_URL", _async_url(READ_DATABASE_URL)),
+            poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_read_pool_metrics),
+            **POOL_SETTINGS
+        )
+        instrument_engine(async_read_engine.sync_engine, async_read_pool_metrics)
+
+        AsyncReadSessionLocal = async_sessionmaker(
+            autoflush=False,
+            expire_on_commit=False,
+            bind=async_read_engine
+        )
+
+
+async def run_db(db, fn, *args):
+    """
+    Run a sync crud function against either session type.
+
+    Sync sessions run it in the threadpool. Async sessions run it
+    through AsyncSession.run_sync, where every query awaits the async
+    driver on the event loop and no thread is held.
+    """
+    if DB_MODE == "async":
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+async def run_db_and_close(db, fn, *args):
+    """
+    run_db, then close the session in the same call, for responses
+    that outlive their DB work. The pooled connection goes back now
+    rather than when the response ends, and closing doesn't wait for
+    a second threadpool slot while still holding it.
+    """
+    def call(session, *args):
+        try:
+            return fn(session, *args)
+        finally:
+            session.close()
+
+    return await run_db(db, call, *args)
+
+
+def pool_snapshots() -> dict:
+    """
+    Current pool metrics for every engine in this process.
+    """
+    snapshots = {"primary": pool_metrics.snapshot()}
+    if async_pool_metrics is not None:
+        snapshots["async"] = async_pool_metrics.snapshot()
+    if read_pool_metrics is not None:
+        snapshots["replica"] = read_pool_metrics.snapshot()
+    if async_read_pool_metrics is not None:
+        snapshots["async_replica"] = async_read_pool_metrics.snapshot()
+    return snapshots
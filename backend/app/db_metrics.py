@@ -0,0 +1,110 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+
+
+class PoolMetrics:
+    """
+    Counters for one engine's connection pool, fed by pool events.
+    snapshot() adds the pool's live gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine = None
+
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def increment(self, name: str, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+
+        with self._lock:
+            return {
+                "pool_size": pool.size() if pool else 0,
+                "checked_out": pool.checkedout() if pool else 0,
+                "checked_in": pool.checkedin() if pool else 0,
+                "overflow_in_use": max(pool.overflow(), 0) if pool else 0,
+                "checkouts_total": self.checkouts,
+                "checkins_total": self.checkins,
+                "connects_total": self.connects,
+                "closes_total": self.closes,
+                "invalidations_total": self.invalidations,
+                "acquire_waits_total": self.waits,
+                "acquire_wait_seconds_total": round(self.wait_seconds, 6),
+                "acquire_wait_seconds_max": round(self.max_wait_seconds, 6),
+                "acquire_timeouts_total": self.timeouts,
+            }
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """
+    Pool events fire only once a connection is handed out, so the
+    time spent waiting for one is measured around the pool's own
+    checkout instead.
+    """
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def instrument_engine(engine, metrics: PoolMetrics):
+    """
+    Attach pool event listeners feeding `metrics`. Pass the sync
+    engine (AsyncEngine.sync_engine for async engines).
+    """
+    metrics.engine = engine
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, record, proxy):
+        metrics.increment("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, record):
+        metrics.increment("checkins")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, record):
+        metrics.increment("connects")
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, record):
+        metrics.increment("closes")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, record, exception):
+        metrics.increment("invalidations")
+
+    return metrics
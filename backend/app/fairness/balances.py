@@ -1,33 +1,32 @@
 from collections import defaultdict
 from typing import Dict, List
 
+from app.money import Money, to_cents
 
-def calculate_balances(expenses: List[dict]) -> Dict[str, float]:
+
+def calculate_balances(expenses: List[dict]) -> Dict[str, Money]:
     """
-    Returns balance per user:
+    Returns balance per user, in exact cents:
     positive = overpaid
     negative = underpaid
+
+    Amounts are converted to cents once on the way in and summed as
+    ints, so balances of expenses whose splits add up to their total
+    sum to exactly zero.
     """
 
-    paid = defaultdict(float)
-    owed = defaultdict(float)
+    balances = defaultdict(int)
 
     for expense in expenses:
-        payer = expense["paid_by"]
-        paid[payer] += expense["total_amount"]
+        balances[expense["paid_by"]] += to_cents(expense["total_amount"])
 
         for split in expense["splits"]:
-            user_id = split["user_id"]
-            owed[user_id] += split["amount"]
-
-    balances = {}
-    for user in set(paid) | set(owed):
-        balances[user] = round(paid[user] - owed[user], 2)
+            balances[split["user_id"]] -= to_cents(split["amount"])
 
-    return balances
+    return {user: Money(cents) for user, cents in balances.items()}
 
 
-def fairness_score(balances: Dict[str, float]) -> int:
+def fairness_score(balances: Dict[str, Money]) -> int:
     """
     100 = perfectly balanced
     Lower score = more imbalance
@@ -35,8 +34,8 @@ def fairness_score(balances: Dict[str, float]) -> int:
     if not balances:
         return 100
 
-    total_imbalance = sum(abs(v) for v in balances.values())
+    total_imbalance = sum(abs(Money.of(v)) for v in balances.values()) / 100
     max_possible = total_imbalance + 1  # avoid divide by zero
 
     score = max(0, int(100 * (1 - total_imbalance / max_possible)))
-    return score
\ No newline at end of file
+    return score
@@ -0,0 +1,140 @@
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from app.money import Money
+
+
+class BatchBalances(NamedTuple):
+    """
+    Balances for many groups at once.
+
+    balances: (groups, members) int64 cents, positive = overpaid
+    present:  (groups, members) bool, member appears in the group's expenses
+    scores:   (groups,) int64 fairness score per group
+    """
+    balances: np.ndarray
+    present: np.ndarray
+    scores: np.ndarray
+
+
+def calculate_batch_balances(
+    num_groups: int,
+    paid_group: np.ndarray,
+    paid_member: np.ndarray,
+    paid_cents: np.ndarray,
+    split_group: np.ndarray,
+    split_member: np.ndarray,
+    split_cents: np.ndarray
+) -> BatchBalances:
+    """
+    Vectorized calculate_balances + fairness_score for many groups.
+
+    Takes two columnar tables, one row per expense (who paid the
+    total) and one row per split (who owes a share). They are kept
+    apart because an expense's total_amount is credited to the payer
+    even when its splits don't add up to it, as in the scalar path.
+
+    Member indexes are local to their group, so the work is sized by
+    groups x largest group, not by the total number of users.
+    """
+    paid_group = np.asarray(paid_group, dtype=np.int64)
+    paid_member = np.asarray(paid_member, dtype=np.int64)
+    split_group = np.asarray(split_group, dtype=np.int64)
+    split_member = np.asarray(split_member, dtype=np.int64)
+
+    num_members = 1 + max(
+        paid_member.max(initial=-1),
+        split_member.max(initial=-1)
+    )
+    size = num_groups * num_members
+
+    paid_slot = paid_group * num_members + paid_member
+    split_slot = split_group * num_members + split_member
+
+    # float64 bincount is exact for integer sums below 2**53 cents
+    paid = np.bincount(paid_slot, weights=paid_cents, minlength=size)
+    owed = np.bincount(split_slot, weights=split_cents, minlength=size)
+
+    balances = np.rint(paid - owed).astype(np.int64)\
+        .reshape(num_groups, num_members)
+
+    present = (
+        (np.bincount(paid_slot, minlength=size) > 0)
+        | (np.bincount(split_slot, minlength=size) > 0)
+    ).reshape(num_groups, num_members)
+
+    # Same formula as fairness_score, from the exact cents total
+    total_imbalance = np.abs(balances).sum(axis=1) / 100
+    max_possible = total_imbalance + 1
+
+    scores = np.maximum(
+        0,
+        (100 * (1 - total_imbalance / max_possible)).astype(np.int64)
+    )
+
+    return BatchBalances(balances, present, scores)
+
+
+# -----------------------
+# Conversions
+# -----------------------
+
+def expenses_to_columns(groups: List[List[dict]]):
+    """
+    Flatten per-group expense lists (the calculate_balances input
+    format) into columns.
+
+    Returns (columns, members): `columns` is a dict of the keyword
+    arguments for calculate_batch_balances, `members[g]` maps local
+    member index back to user id for group g.
+    """
+    paid_group, paid_member, paid_cents = [], [], []
+    split_group, split_member, split_cents = [], [], []
+    members = []
+
+    for g, expenses in enumerate(groups):
+        index = {}
+
+        for expense in expenses:
+            payer = index.setdefault(expense["paid_by"], len(index))
+            paid_group.append(g)
+            paid_member.append(payer)
+            paid_cents.append(Money.of(expense["total_amount"]))
+
+            for split in expense["splits"]:
+                user = index.setdefault(split["user_id"], len(index))
+                split_group.append(g)
+                split_member.append(user)
+                split_cents.append(Money.of(split["amount"]))
+
+        members.append(list(index))
+
+    columns = {
+        "num_groups": len(groups),
+        "paid_group": np.array(paid_group, dtype=np.int64),
+        "paid_member": np.array(paid_member, dtype=np.int64),
+        "paid_cents": np.array(paid_cents, dtype=np.int64),
+        "split_group": np.array(split_group, dtype=np.int64),
+        "split_member": np.array(split_member, dtype=np.int64),
+        "split_cents": np.array(split_cents, dtype=np.int64),
+    }
+
+    return columns, members
+
+
+def batch_to_dicts(result: BatchBalances, members: List[list]) -> List[Dict[str, Money]]:
+    """
+    Per-group balances in the calculate_balances output format.
+    """
+    balances = []
+
+    for g, users in enumerate(members):
+        row = result.balances[g]
+        balances.append({
+            user: Money(row[i])
+            for i, user in enumerate(users)
+            if result.present[g, i]
+        })
+
+    return balances
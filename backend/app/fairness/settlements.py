@@ -1,18 +1,25 @@
+import heapq
+import time
 from typing import Dict, List
 
+from app.money import Money
 
-def calculate_settlements(balances: Dict[str, float]) -> List[dict]:
+
+def calculate_settlements(balances: Dict[str, Money]) -> List[dict]:
     """
     Given balances like:
     {
-        "You": 30,
-        "Alex": -30
+        "You": Money.of(30),
+        "Alex": Money.of(-30)
     }
 
     Returns:
     [
-        { "from": "Alex", "to": "You", "amount": 30 }
+        { "from": "Alex", "to": "You", "amount": Money.of(30) }
     ]
+
+    Plain numbers are taken as currency amounts and converted to
+    cents, so settled amounts compare exactly.
     """
 
     creditors = []
@@ -20,6 +27,7 @@ def calculate_settlements(balances: Dict[str, float]) -> List[dict]:
 
     # Split into creditors and debtors
     for person, balance in balances.items():
+        balance = Money.of(balance)
         if balance > 0:
             creditors.append([person, balance])
         elif balance < 0:
@@ -39,7 +47,7 @@ def calculate_settlements(balances: Dict[str, float]) -> List[dict]:
         settlements.append({
             "from": debtor,
             "to": creditor,
-            "amount": round(settled_amount, 2)
+            "amount": Money(settled_amount)
         })
 
         creditors[i][1] -= settled_amount
@@ -51,3 +59,135 @@ def calculate_settlements(balances: Dict[str, float]) -> List[dict]:
             j += 1
 
     return settlements
+
+
+# -----------------------
+# Optimized Settlements
+# -----------------------
+
+def optimize_settlements(
+    balances: Dict[str, Money],
+    max_exact_members: int = 20,
+    time_budget: float = 0.25
+) -> List[dict]:
+    """
+    Same input and output as calculate_settlements, but aims for the
+    fewest possible transfers.
+
+    Works in integer cents, so float residue in plain-number input
+    never produces a trailing transfer. Groups with up to `max_exact_members` non-zero
+    balances are split into the most zero-sum subgroups possible
+    (each subgroup of k people settles in k - 1 transfers). If that
+    search exceeds `time_budget` seconds, the heap-based greedy pass
+    is used for the whole group instead.
+    """
+
+    people = []
+    cents = []
+
+    for person, balance in balances.items():
+        amount = Money.of(balance)
+        if amount != 0:
+            people.append(person)
+            cents.append(amount)
+
+    groups = None
+    if len(cents) <= max_exact_members:
+        groups = _zero_sum_groups(cents, time.perf_counter() + time_budget)
+
+    if groups is None:
+        groups = [list(range(len(cents)))]
+
+    settlements = []
+    for group in groups:
+        for debtor, creditor, amount in _greedy_transfers(group, cents):
+            settlements.append({
+                "from": people[debtor],
+                "to": people[creditor],
+                "amount": Money(amount)
+            })
+
+    return settlements
+
+
+def _greedy_transfers(members: List[int], cents: List[int]):
+    """
+    Repeatedly settle the largest debtor against the largest creditor.
+    Yields (debtor, creditor, cents) using indexes into `cents`.
+    """
+    creditors = [(-cents[i], i) for i in members if cents[i] > 0]
+    debtors = [(cents[i], i) for i in members if cents[i] < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+
+        amount = min(-credit, -debt)
+        yield debtor, creditor, amount
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+
+
+def _zero_sum_groups(cents: List[int], deadline: float):
+    """
+    Partition member indexes into the maximum number of disjoint
+    zero-sum subsets. Returns None if `deadline` passes first.
+    """
+    remaining = list(range(len(cents)))
+    groups = []
+
+    # An exact opposite pair is always its own group in some optimum
+    by_amount = {}
+    for i in remaining:
+        partner = by_amount.get(-cents[i])
+        if partner:
+            groups.append([partner.pop(), i])
+        else:
+            by_amount.setdefault(cents[i], []).append(i)
+
+    remaining = [i for members in by_amount.values() for i in members]
+    n = len(remaining)
+    if n == 0:
+        return groups
+
+    # best[mask]: most zero-sum prefixes along any ordering of mask
+    size = 1 << n
+    total = [0] * size
+    best = [0] * size
+    last = [0] * size
+
+    for mask in range(1, size):
+        if not mask & 0xFFF and time.perf_counter() > deadline:
+            return None
+
+        low = mask & -mask
+        total[mask] = total[mask ^ low] + cents[remaining[low.bit_length() - 1]]
+
+        score = -1
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            if best[mask ^ bit] > score:
+                score = best[mask ^ bit]
+                last[mask] = bit
+            bits ^= bit
+
+        best[mask] = score + (total[mask] == 0)
+
+    # Walk back the best ordering, cutting a group at every zero prefix
+    mask = size - 1
+    group = []
+    while mask:
+        bit = last[mask]
+        group.append(remaining[bit.bit_length() - 1])
+        mask ^= bit
+        if total[mask] == 0:
+            groups.append(group)
+            group = []
+
+    return groups
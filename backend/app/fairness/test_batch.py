@@ -0,0 +1,42 @@
+import random
+
+from app.fairness.balances import calculate_balances, fairness_score
+from app.fairness.batch import (
+    calculate_batch_balances,
+    expenses_to_columns,
+    batch_to_dicts
+)
+
+
+def random_group(rng):
+    users = [f"user{i}" for i in range(rng.randint(1, 8))]
+    expenses = []
+
+    for _ in range(rng.randint(0, 30)):
+        splits = [
+            {"user_id": user, "amount": rng.randint(1, 10_000) / 100}
+            for user in rng.sample(users, rng.randint(1, len(users)))
+        ]
+        total = sum(round(s["amount"] * 100) for s in splits)
+        expenses.append({
+            "paid_by": rng.choice(users),
+            # Occasionally let the total drift from the splits
+            "total_amount": (total + rng.choice([0, 0, 0, 7])) / 100,
+            "splits": splits
+        })
+
+    return expenses
+
+
+def test_batch_matches_scalar_path():
+    rng = random.Random(7)
+    groups = [random_group(rng) for _ in range(300)]
+
+    columns, members = expenses_to_columns(groups)
+    result = calculate_batch_balances(**columns)
+
+    for g, balances in enumerate(batch_to_dicts(result, members)):
+        expected = calculate_balances(groups[g])
+
+        assert balances == expected
+        assert result.scores[g] == fairness_score(expected)
@@ -1,4 +1,5 @@
-from app.fairness.settlements import calculate_settlements
+from app.fairness.settlements import calculate_settlements, optimize_settlements
+from app.money import Money
 
 def run_test():
     balances = {
@@ -12,5 +13,34 @@ def run_test():
     for s in settlements:
         print(s)
 
+
+def test_optimize_settlements_uses_zero_sum_subgroups():
+    balances = {
+        "You": 30,
+        "Kim": 20,
+        "Alex": -20,
+        "Sam": -30
+    }
+
+    settlements = optimize_settlements(balances)
+
+    assert len(calculate_settlements(balances)) == 3
+    assert sorted((s["from"], s["to"], s["amount"]) for s in settlements) == [
+        ("Alex", "Kim", Money.of(20)),
+        ("Sam", "You", Money.of(30))
+    ]
+
+
+def test_optimize_settlements_ignores_float_residue():
+    balances = {
+        "You": 0.1 + 0.2,
+        "Alex": -0.3,
+        "Sam": 1e-15
+    }
+
+    settlements = optimize_settlements(balances)
+
+    assert settlements == [{"from": "Alex", "to": "You", "amount": Money.of("0.30")}]
+
 if __name__ == "__main__":
     run_test()
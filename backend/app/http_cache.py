@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import OrderedDict
+from uuid import UUID
+
+from fastapi import Request, Response
+
+
+# -----------------------
+# ETags
+# -----------------------
+# Group reads are validated against Group.version, which every write
+# to the group bumps, plus the FX rate version where amounts are
+# converted. Weak tags: the JSON is equivalent, not necessarily
+# byte-identical, across workers and releases.
+
+def group_etag(group_id: UUID, version) -> str:
+    return f'W/"{group_id.hex}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# -----------------------
+# Response Cache
+# -----------------------
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered response bodies keyed by (group, version,
+    variant), where variant covers the query parameters. A write
+    moves the group to a new version, so stale entries are never
+    served and just age out. Disabled when max_size is 0.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, group_id: UUID, version, variant=None):
+        if self.max_size <= 0:
+            return None
+
+        key = (group_id, version, variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, group_id: UUID, version, variant, body: bytes, headers: dict = None):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            key = (group_id, version, variant)
+            self._entries[key] = (body, headers or {})
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits_total": self.hits,
+                "misses_total": self.misses,
+                "evictions_total": self.evictions,
+            }
+
+
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "0"))
+)
+
+
+# -----------------------
+# Group Responses
+# -----------------------
+
+async def group_response(request: Request, group_id: UUID, version, variant, render):
+    """
+    Serve a group read at `version`: 304 if the client's ETag is
+    current, else the cached body, else await render() for a
+    (body, headers) pair and cache it. The caller reads the version
+    before the data, so a racing write can only make the body newer
+    than its tag, never older.
+    """
+    etag = group_etag(group_id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    cached = response_cache.get(group_id, version, variant)
+    if cached is None:
+        cached = await render()
+        response_cache.set(group_id, version, variant, *cached)
+
+    body, headers = cached
+    return Response(
+        body,
+        media_type="application/json",
+        headers={**headers, "ETag": etag, "Cache-Control": "private, no-cache"}
+    )
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from dotenv import load_dotenv
 
@@ -7,25 +9,55 @@ from .routes import groups, expenses
 from app.routes import profile
 from app.auth import routes as auth
 from app.routes import settlements
+from app.routes import sync
+from app.routes import internal
+from app.services.email_queue import email_queue
+from app.services.group_events import group_events
+from app.request_metrics import RequestMetricsMiddleware
+from app.query_profiler import QUERY_PROFILING, QueryProfilerMiddleware
 
 import os
 load_dotenv()
 
 
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (alembic upgrade head). create_all is
+# only a shortcut for throwaway databases.
+if os.getenv("DB_CREATE_ALL", "false").lower() == "true":
+    Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await email_queue.start()
+    await group_events.start()
+    yield
+    await group_events.stop()
+    await email_queue.stop()
 
 
 app = FastAPI(
     title="PayShare Backend",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
+if QUERY_PROFILING:
+    app.add_middleware(QueryProfilerMiddleware)
+
 # Routers
 app.include_router(groups.router)
 app.include_router(expenses.router)
 app.include_router(profile.router)
 app.include_router(auth.router)
 app.include_router(settlements.router)
+app.include_router(sync.router)
+
+# Metrics only with a token to guard them, see INTERNAL_METRICS_TOKEN
+if internal.INTERNAL_METRICS_TOKEN:
+    app.include_router(internal.router)
+    app.include_router(internal.metrics_router)
 
 # Health Check
 
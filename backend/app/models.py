@@ -10,7 +10,9 @@ from sqlalchemy import (
     Integer,
     Numeric,
     Enum,
-    UniqueConstraint
+    UniqueConstraint,
+    PrimaryKeyConstraint,
+    Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -34,6 +36,13 @@ class LedgerReferenceType(str, enum.Enum):
     adjustment = "adjustment"
 
 
+class OutboundEmailStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    failed = "failed"
+
+
 # -----------------------------
 # USERS
 # -----------------------------
@@ -64,6 +73,10 @@ class Group(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     is_active = Column(Boolean, default=True)
 
+    # Bumped by every write to the group's expenses, settlements or
+    # balances; clients revalidate against it with ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -86,6 +99,13 @@ class GroupMember(Base):
 
     __table_args__ = (
         UniqueConstraint("group_id", "user_id", name="uq_group_user"),
+        # A user's groups, for the membership-scoped group listing
+        Index(
+            "ix_group_members_user_active",
+            "user_id", "group_id",
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True
+        ),
     )
 
 
@@ -104,9 +124,16 @@ class Expense(Base):
     total_amount = Column(Numeric(12, 2), nullable=False)
     paid_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
 
+    # Amounts are in this currency; the group's base currency by default
+    currency = Column(String(3), nullable=False)
+
     version = Column(Integer, default=1)
     is_active = Column(Boolean, default=True)
 
+    # Group.version of the write that created or last deactivated the
+    # row; GET /sync reads a group's changes as a range of it
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
@@ -114,7 +141,19 @@ class Expense(Base):
     splits = relationship(
         "ExpenseSplit",
         back_populates="expense",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"
+    )
+
+    __table_args__ = (
+        # Keyset listing of a group's active expenses, newest first
+        Index(
+            "ix_expenses_group_active_created",
+            "group_id", "created_at", "id",
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True
+        ),
+        Index("ix_expenses_group_change", "group_id", "change_version"),
     )
 
 
@@ -139,6 +178,12 @@ class ExpenseSplit(Base):
         back_populates="splits"
     )
 
+    # Not partial: the default selectin load of Expense.splits
+    # doesn't filter on is_active
+    __table_args__ = (
+        Index("ix_expense_splits_expense_active", "expense_id", "is_active"),
+    )
+
 
 # -----------------------------
 # LEDGER ENTRIES (CORE ENGINE)
@@ -155,14 +200,38 @@ class LedgerEntry(Base):
     to_user = Column(UUID(as_uuid=True), ForeignKey("users.id"))
 
     amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
 
     reference_type = Column(Enum(LedgerReferenceType), nullable=False)
     reference_id = Column(UUID(as_uuid=True))
 
     is_active = Column(Boolean, default=True)
 
+    # Checkpoint this entry was folded into, NULL until compacted
+    checkpoint_seq = Column(Integer, nullable=True)
+
+    # Same as Expense.change_version
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_ledger_entries_group_checkpoint", "group_id", "checkpoint_seq"),
+        Index("ix_ledger_entries_group_change", "group_id", "change_version"),
+        Index(
+            "ix_ledger_entries_group_active",
+            "group_id",
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True
+        ),
+        Index(
+            "ix_ledger_entries_reference_active",
+            "reference_id",
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True
+        ),
+    )
+
 
 # -----------------------------
 # SETTLEMENTS
@@ -182,4 +251,131 @@ class Settlement(Base):
 
     is_active = Column(Boolean, default=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    # Same as Expense.change_version
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_settlements_group_change", "group_id", "change_version"),
+    )
+
+
+# -----------------------------
+# GROUP BALANCES (MATERIALIZED)
+# -----------------------------
+
+class GroupBalance(Base):
+    """
+    Net balance per (group, user, currency), kept in sync with the
+    active ledger entries in the same transaction that writes them.
+    Reads convert the currencies into the group's base currency at
+    the current rates.
+    positive = is owed money
+    negative = owes money
+    """
+    __tablename__ = "group_balances"
+
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    currency = Column(String(3), nullable=False)
+
+    balance = Column(Numeric(12, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id", "currency", name="pk_group_balances"),
+    )
+
+
+# -----------------------------
+# LEDGER CHECKPOINTS
+# -----------------------------
+
+class LedgerCheckpoint(Base):
+    """
+    Latest compaction of a group's ledger. Entries carrying
+    checkpoint_seq <= seq are folded into the checkpoint balances.
+    """
+    __tablename__ = "ledger_checkpoints"
+
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id"), primary_key=True)
+
+    seq = Column(Integer, nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LedgerCheckpointBalance(Base):
+    """
+    Net balance per (group, user, currency) over the active
+    checkpointed entries. Same conventions as GroupBalance.
+    """
+    __tablename__ = "ledger_checkpoint_balances"
+
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    currency = Column(String(3), nullable=False)
+
+    balance = Column(Numeric(12, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "group_id", "user_id", "currency", name="pk_ledger_checkpoint_balances"
+        ),
+    )
+
+
+# -----------------------------
+# FX RATES
+# -----------------------------
+
+class FxRate(Base):
+    """
+    Units of `currency` per unit of the provider's reference currency.
+    Each load replaces the whole table under a new version, which the
+    in-memory rate cache polls to know when to reload.
+    """
+    __tablename__ = "fx_rates"
+
+    currency = Column(String(3), primary_key=True)
+    rate = Column(Numeric(20, 10), nullable=False)
+    version = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+# -----------------------------
+# OUTBOUND EMAILS
+# -----------------------------
+
+class OutboundEmail(Base):
+    """
+    Delivery record for the email queue when EMAIL_QUEUE_DURABLE is
+    on. Pending rows are claimed and replayed when the app starts;
+    html is cleared once the email is sent or given up on.
+    """
+    __tablename__ = "outbound_emails"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html = Column(String, nullable=False)
+
+    status = Column(
+        Enum(OutboundEmailStatus),
+        nullable=False,
+        default=OutboundEmailStatus.pending
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+
+    # When the sending process claimed the row, NULL unless sending
+    claimed_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
@@ -0,0 +1,123 @@
+from decimal import ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import Dict, List
+
+
+CENTS_PER_UNIT = 100
+
+
+# -----------------------
+# Money
+# -----------------------
+
+class Money(int):
+    """
+    An exact amount in integer cents.
+
+    Money is an int, so sums and comparisons run at int speed. Its
+    arithmetic deliberately isn't overridden: results are plain int
+    cents, and hot loops accumulate ints and wrap the result in
+    Money() at the end. Money.of() / to_cents() and .amount are the
+    conversions at the API and database boundaries.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, amount) -> "Money":
+        """
+        From a currency amount; see to_cents. Money passes through.
+        """
+        if isinstance(amount, Money):
+            return amount
+        return cls(to_cents(amount))
+
+    @property
+    def amount(self) -> Decimal:
+        """
+        The amount in currency units, e.g. Decimal("12.30").
+        """
+        return Decimal(int(self)).scaleb(-2)
+
+    def __repr__(self):
+        return f"Money('{self.amount}')"
+
+    def __str__(self):
+        return str(self.amount)
+
+
+def to_cents(amount) -> int:
+    """
+    Plain int cents from a currency amount: Decimal, str, int (whole
+    units) or float (assumed to carry at most two decimals). Decimals
+    and strings round half up to the cent. Money is already cents.
+
+    Cheaper than Money.of for hot loops that only accumulate.
+    """
+    if isinstance(amount, int):
+        return int(amount) if isinstance(amount, Money) else amount * CENTS_PER_UNIT
+    if isinstance(amount, float):
+        return round(amount * CENTS_PER_UNIT)
+
+    scaled = Decimal(amount).scaleb(2)
+    cents = int(scaled)
+    if cents != scaled:
+        cents = int(scaled.to_integral_value(ROUND_HALF_UP))
+    return cents
+
+
+# -----------------------
+# Allocation
+# -----------------------
+
+def allocate(total: int, weights: List[int]) -> List[Money]:
+    """
+    Split `total` cents in proportion to non-negative `weights` so
+    the parts add up to exactly `total`. Leftover cents go one each
+    to the largest fractional remainders, ties to the earliest
+    weight, so the same input always gives the same split.
+    """
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        raise ValueError("Weights must add up to more than zero")
+
+    sign = -1 if total < 0 else 1
+    total = abs(total)
+
+    parts = []
+    remainders = []
+    for i, weight in enumerate(weights):
+        share, remainder = divmod(total * weight, weight_sum)
+        parts.append(share)
+        remainders.append((-remainder, i))
+
+    for _, i in sorted(remainders)[:total - sum(parts)]:
+        parts[i] += 1
+
+    return [Money(sign * part) for part in parts]
+
+
+def split_evenly(total: int, count: int) -> List[Money]:
+    return allocate(total, [1] * count)
+
+
+def round_to_cents(exact: Dict[object, Decimal]) -> Dict[object, Money]:
+    """
+    Round exact cent values (e.g. converted at an FX rate) to whole
+    cents so they add up to their exact sum, rounded: a set of
+    balances that sums to zero still does. Largest remainders round
+    up, ties broken by key order.
+    """
+    floors = {}
+    remainders = []
+
+    for key, value in exact.items():
+        floor = value.to_integral_value(ROUND_FLOOR)
+        floors[key] = int(floor)
+        remainders.append((floor - value, key))
+
+    target = int(sum(exact.values(), Decimal("0")).to_integral_value(ROUND_HALF_UP))
+
+    for _, key in sorted(remainders)[:target - sum(floors.values())]:
+        floors[key] += 1
+
+    return {key: Money(cents) for key, cents in floors.items()}
@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# -----------------------
+# Keyset Cursors
+# -----------------------
+
+def _b64decode(cursor: str) -> str:
+    """
+    Strict urlsafe base64: unlike urlsafe_b64decode's default, characters
+    outside the alphabet are an error instead of being skipped.
+    """
+    return base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode()
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """
+    Opaque cursor for keyset pagination on (created_at, id).
+    """
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = _b64decode(cursor)
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# -----------------------
+# Sync Cursors
+# -----------------------
+
+def encode_sync_cursor(versions: dict) -> str:
+    """
+    Opaque cursor for GET /sync: the version of each group the client
+    has caught up to, {group_id: version}.
+    """
+    raw = ",".join(f"{group_id.hex}:{version}" for group_id, version in versions.items())
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_cursor(cursor: str) -> dict:
+    try:
+        raw = _b64decode(cursor)
+        versions = {}
+        for item in filter(None, raw.split(",")):
+            group_id, version = item.split(":")
+            if UUID(group_id).hex != group_id or not (version.isascii() and version.isdigit()):
+                raise ValueError(item)
+            versions[UUID(group_id)] = int(version)
+        return versions
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,207 @@
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+# Development only: capture every statement per request, warn about
+# repeated statement shapes and log slow statements with a stack
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+
+# Identical shapes issued this many times in one request count as N+1
+QUERY_PROFILE_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILE_REPEAT_THRESHOLD", "5"))
+QUERY_PROFILE_SLOW_MS = float(os.getenv("QUERY_PROFILE_SLOW_MS", "100"))
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+
+# -----------------------
+# Statement Shapes
+# -----------------------
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Statement with literals and bound parameters replaced by ?, IN
+    lists collapsed and whitespace squeezed, so every execution of the
+    same query maps to one shape.
+    """
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def call_site() -> str:
+    """
+    The application frames of the current stack, innermost last,
+    skipping this module.
+    """
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__
+    ]
+    return "".join(traceback.format_list(frames))
+
+
+# -----------------------
+# Profiles
+# -----------------------
+
+class QueryProfile:
+    """
+    Statements issued while the profile is active, grouped by shape.
+    record() can be called from threadpool threads, hence the lock.
+    """
+
+    def __init__(self, repeat_threshold: int = QUERY_PROFILE_REPEAT_THRESHOLD,
+                 slow_ms: float = QUERY_PROFILE_SLOW_MS):
+        self._lock = threading.Lock()
+        self.repeat_threshold = repeat_threshold
+        self.slow_seconds = slow_ms / 1000
+
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}
+        self.call_sites = {}
+        self.slow = []
+
+    def record(self, statement: str, seconds: float, executemany: bool = False):
+        shape = normalize_statement(statement)
+
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            count = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+        # Only walk the stack for the statements worth reporting; the
+        # hook runs in the executing thread, so the caller is on it
+        if count == self.repeat_threshold and not executemany:
+            self.call_sites[shape] = call_site()
+
+        if seconds >= self.slow_seconds:
+            site = call_site()
+            self.slow.append((shape, seconds, site))
+            logger.warning(
+                "Slow query (%.1f ms): %s\n%s", seconds * 1000, shape, site
+            )
+
+    def repeated(self) -> dict:
+        """
+        Shapes issued at least repeat_threshold times: probable N+1.
+        """
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= self.repeat_threshold
+        }
+
+    def summary(self) -> str:
+        lines = [f"{self.count} queries, {self.seconds * 1000:.1f} ms in SQL"]
+        for shape, count in sorted(self.shapes.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count:>4} x {shape}")
+        return "\n".join(lines)
+
+
+# A request profile lives in the caller's context (threadpool calls and
+# AsyncSession.run_sync both inherit it). Captures see every statement
+# on every engine, whatever thread issues it, which is what tests
+# driving the app through TestClient need.
+_current_profile: ContextVar = ContextVar("query_profile", default=None)
+_captures = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _captures or _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+
+    seconds = time.perf_counter() - starts.pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds, executemany)
+    for capture in list(_captures):
+        capture.record(statement, seconds, executemany)
+
+
+@contextmanager
+def profile_queries(**options):
+    """
+    Profile the statements issued from the current context.
+    """
+    profile = QueryProfile(**options)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def capture_queries(**options):
+    """
+    Profile every statement issued anywhere in the process while the
+    block runs. Meant for tests.
+    """
+    profile = QueryProfile(**options)
+    _captures.append(profile)
+    try:
+        yield profile
+    finally:
+        _captures.remove(profile)
+
+
+# -----------------------
+# Middleware
+# -----------------------
+
+class QueryProfilerMiddleware:
+    """
+    Profiles each HTTP request and logs probable N+1 patterns with the
+    call site of the repeated query. Added by main.py when
+    QUERY_PROFILING is on.
+    """
+
+    def __init__(self, app, **options):
+        self.app = app
+        self.options = options
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries(**self.options) as profile:
+            await self.app(scope, receive, send)
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        for shape, count in profile.repeated().items():
+            logger.warning(
+                "Probable N+1 in %s %s: %d x %s\n%s",
+                scope["method"], route, count, shape, profile.call_sites.get(shape, "")
+            )
+
+        logger.debug("%s %s: %s", scope["method"], route, profile.summary())
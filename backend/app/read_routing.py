@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import database
+from app.auth.dependencies import get_current_user
+
+
+# After a write, the user's reads stay on the primary for this long,
+# or until the replica is seen to have replayed the write (Postgres)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Users tracked at once; the oldest pins are dropped first
+READ_YOUR_WRITES_MAX_USERS = int(os.getenv("READ_YOUR_WRITES_MAX_USERS", "100000"))
+
+
+# -----------------------
+# WAL Positions
+# -----------------------
+
+PRIMARY_LSN = text("SELECT pg_current_wal_lsn()")
+REPLICA_LSN = text("SELECT pg_last_wal_replay_lsn()")
+
+
+def parse_lsn(value):
+    """
+    A Postgres pg_lsn like "16/B374D848" as an int, so positions
+    compare numerically. None stays None: not Postgres, or not a
+    standby.
+    """
+    if value is None:
+        return None
+    high, low = str(value).split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+# Pin of a Postgres write whose WAL position hasn't been read yet
+UNRESOLVED = -1
+
+
+def _primary_lsn(session: Session):
+    """
+    The primary's current WAL position, read on the request's primary
+    session after the user's write committed, so at or past its
+    commit record. Ends the read transaction it opens, so the session
+    doesn't hold a connection while the request reads the replica.
+    None if it can't be read.
+    """
+    try:
+        return parse_lsn(session.execute(PRIMARY_LSN).scalar())
+    except SQLAlchemyError:
+        return None
+    finally:
+        session.rollback()
+
+
+# -----------------------
+# Recent Writes
+# -----------------------
+
+class RecentWrites:
+    """
+    Users whose reads go to the primary because they just wrote, so
+    they see their own writes however far the replica lags. A pin
+    lasts `window` seconds from the user's last write, or ends sooner
+    once the replica has replayed past the primary's WAL position at
+    that write, where it is known.
+
+    The commit path doesn't read that position: after_commit fires
+    while the session still holds its connection, so reading it there
+    would take a second one from the pool. A Postgres write is pinned
+    as UNRESOLVED instead, and the user's next read resolves it.
+
+    Per process, like the other caches: a user whose next read lands
+    on another worker relies on that worker's replica being caught up.
+    """
+
+    def __init__(self, window: float, max_users: int, clock=time.monotonic):
+        self.window = window
+        self.max_users = max_users
+        self.clock = clock
+
+        self._pins = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.writes = 0
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.caught_up = 0
+
+    def track(self, target):
+        """
+        Pin session.info["user_id"] whenever a session of `target`, a
+        Session class or sessionmaker, commits. get_current_user sets
+        it on the request's session.
+        """
+        event.listen(target, "after_commit", self._after_commit)
+
+    def _after_commit(self, session: Session):
+        user_id = session.info.get("user_id")
+        if user_id is not None:
+            postgres = session.get_bind().dialect.name == "postgresql"
+            self.mark(user_id, UNRESOLVED if postgres else None)
+
+    def mark(self, user_id: UUID, lsn: int = None):
+        with self._lock:
+            self.writes += 1
+            self._pins.pop(user_id, None)
+            self._pins[user_id] = (self.clock() + self.window, lsn)
+
+            while len(self._pins) > self.max_users:
+                self._pins.popitem(last=False)
+
+    def pinned(self, user_id: UUID):
+        """
+        The WAL position the replica must reach before it can serve
+        the user, 0 if unknown, UNRESOLVED if not read yet, or None if
+        the user isn't pinned.
+        """
+        with self._lock:
+            pin = self._pins.get(user_id)
+            if pin is None:
+                return None
+
+            expires, lsn = pin
+            if self.clock() >= expires:
+                del self._pins[user_id]
+                return None
+            return lsn or 0
+
+    def resolve(self, user_id: UUID, lsn: int = None):
+        """
+        Record the WAL position of an UNRESOLVED pin, 0 if it couldn't
+        be read, and return the pin as pinned() now would.
+        """
+        with self._lock:
+            pin = self._pins.get(user_id)
+            if pin is not None and pin[1] == UNRESOLVED:
+                self._pins[user_id] = (pin[0], lsn)
+
+        return self.pinned(user_id)
+
+    def use_replica(self, user_id: UUID, replica_lsn: int = None) -> bool:
+        """
+        Whether the user's read can go to the replica, given the WAL
+        position it has replayed when known (see REPLICA_LSN).
+        """
+        lsn = self.pinned(user_id)
+
+        if lsn is None or (lsn > 0 and replica_lsn is not None and replica_lsn >= lsn):
+            if lsn:
+                self._release(user_id, lsn)
+            self.replica_reads += 1
+            return True
+
+        self.primary_reads += 1
+        return False
+
+    def _release(self, user_id: UUID, lsn: int):
+        with self._lock:
+            # Unless a later write replaced the pin meanwhile
+            pin = self._pins.get(user_id)
+            if pin is not None and pin[1] == lsn:
+                del self._pins[user_id]
+                self.caught_up += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replica": database.READ_DATABASE_URL is not None,
+                "window_seconds": self.window,
+                "pinned_users": len(self._pins),
+                "writes_total": self.writes,
+                "primary_reads_total": self.primary_reads,
+                "replica_reads_total": self.replica_reads,
+                "caught_up_total": self.caught_up,
+            }
+
+
+recent_writes = RecentWrites(READ_YOUR_WRITES_SECONDS, READ_YOUR_WRITES_MAX_USERS)
+
+if database.READ_DATABASE_URL:
+    # Async sessions commit through a plain Session too
+    recent_writes.track(Session)
+
+
+# -----------------------
+# Dependencies
+# -----------------------
+
+def _replica_lsn(session: Session):
+    return parse_lsn(session.execute(REPLICA_LSN).scalar())
+
+
+async def get_read_db(
+    current_user=Depends(get_current_user),
+    primary=Depends(database.get_session),
+):
+    """
+    Session for GET routes: the replica when one is configured and
+    the caller hasn't just written, else the request's primary
+    session. The replica is only asked for its WAL position when the
+    caller is pinned to a known one, and the primary for its own only
+    on the first read after a write.
+    """
+    if database.DB_MODE == "async":
+        sessions = database.AsyncReadSessionLocal
+    else:
+        sessions = database.ReadSessionLocal
+
+    if sessions is None:
+        yield primary
+        return
+
+    replica = sessions()
+    try:
+        lsn = None
+        pin = recent_writes.pinned(current_user.id)
+
+        if pin == UNRESOLVED:
+            target = await database.run_db(primary, _primary_lsn)
+            pin = recent_writes.resolve(current_user.id, target)
+        if pin:
+            lsn = await database.run_db(replica, _replica_lsn)
+
+        yield replica if recent_writes.use_replica(current_user.id, lsn) else primary
+    finally:
+        await database.run_db(replica, Session.close)
@@ -0,0 +1,232 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Responses that stay open (GET /groups/{group_id}/events) would swamp
+# the latency histograms and pin in_flight, so they're only counted.
+STREAMING_CONTENT_TYPES = (b"text/event-stream",)
+
+
+# -----------------------
+# Per-Request Query Stats
+# -----------------------
+# The middleware puts a RequestStats in this context var. Threadpool
+# calls and AsyncSession.run_sync both see the caller's context, so
+# the cursor hooks below can add to it from either DB mode.
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current_request: ContextVar = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - starts.pop()
+
+
+# -----------------------
+# Metric Types
+# -----------------------
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_label(value)}"' for key, value in labels.items())
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics. Only updated from the event loop by
+    the middleware, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = {}
+        self.queries = {}
+        self.db_seconds = {}
+        self.responses = {}
+
+    def count_response(self, method: str, route: str, status: int):
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def observe(self, method: str, route: str, status: int, seconds: float,
+                stats: RequestStats):
+        key = (method, route)
+
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.db_seconds[key] = 0.0
+
+        self.latency[key].observe(seconds)
+        self.queries[key].observe(stats.queries)
+        self.db_seconds[key] += stats.db_seconds
+
+        self.count_response(method, route, status)
+
+    def render(self) -> list:
+        lines = [
+            "# HELP payshare_http_requests_in_flight Requests currently being served.",
+            "# TYPE payshare_http_requests_in_flight gauge",
+            f"payshare_http_requests_in_flight {self.in_flight}",
+            "# HELP payshare_http_responses_total Responses by route and status code.",
+            "# TYPE payshare_http_responses_total counter",
+        ]
+        for (method, route, status), count in sorted(self.responses.items()):
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"payshare_http_responses_total{{{labels}}} {count}")
+
+        lines += [
+            "# HELP payshare_http_request_duration_seconds Request latency by route.",
+            "# TYPE payshare_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines += histogram.render(
+                "payshare_http_request_duration_seconds", _labels(method=method, route=route)
+            )
+
+        lines += [
+            "# HELP payshare_http_request_db_queries SQL statements issued per request.",
+            "# TYPE payshare_http_request_db_queries histogram",
+        ]
+        for (method, route), histogram in sorted(self.queries.items()):
+            lines += histogram.render(
+                "payshare_http_request_db_queries", _labels(method=method, route=route)
+            )
+
+        lines += [
+            "# HELP payshare_http_request_db_seconds_total Time spent executing SQL, by route.",
+            "# TYPE payshare_http_request_db_seconds_total counter",
+        ]
+        for (method, route), seconds in sorted(self.db_seconds.items()):
+            labels = _labels(method=method, route=route)
+            lines.append(f"payshare_http_request_db_seconds_total{{{labels}}} {seconds:.6f}")
+
+        return lines
+
+
+def render_pool_metrics(snapshots: dict) -> list:
+    """
+    Prometheus lines for app.database.pool_snapshots().
+    """
+    lines = []
+    names = sorted({key for snapshot in snapshots.values() for key in snapshot})
+
+    for key in names:
+        name = f"payshare_db_pool_{key}"
+        lines.append(f"# TYPE {name} {'counter' if key.endswith('_total') else 'gauge'}")
+        for pool, snapshot in sorted(snapshots.items()):
+            lines.append(f"{name}{{{_labels(pool=pool)}}} {snapshot[key]}")
+
+    return lines
+
+
+request_metrics = RequestMetrics()
+
+
+# -----------------------
+# Middleware
+# -----------------------
+
+def _route(scope) -> str:
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI middleware (not BaseHTTPMiddleware) so the per-request
+    cost is a context var, two clock reads and a few dict updates.
+    Routes are labelled by their path template, unmatched paths as
+    "unmatched", to keep label cardinality bounded. Streaming responses
+    are counted when they start and then leave in_flight.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status = 500
+        streaming = False
+
+        async def send_with_status(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = dict(message.get("headers", ())).get(b"content-type", b"")
+                if content_type.startswith(STREAMING_CONTENT_TYPES):
+                    streaming = True
+                    self.metrics.in_flight -= 1
+                    self.metrics.count_response(scope["method"], _route(scope), status)
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+
+            if not streaming:
+                self.metrics.in_flight -= 1
+                self.metrics.observe(scope["method"], _route(scope), status, elapsed, stats)
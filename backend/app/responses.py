@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+# -----------------------
+# Fast JSON
+# -----------------------
+# orjson encodes UUID and datetime natively. Decimals go out as JSON
+# numbers, like schemas.Amount and jsonable_encoder, so the output
+# matches the response_model schemas and the other endpoints.
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Return it directly from a
+    route, with plain dicts, to skip response_model validation and
+    jsonable_encoder as well.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
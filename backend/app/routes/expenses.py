@@ -1,37 +1,134 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
+from typing import Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_session, run_db
 from app import crud, schemas
 from app.auth.dependencies import get_current_user
+from app.http_cache import group_response
+from app.read_routing import get_read_db
+from app.responses import ORJSONResponse, dumps
+from app.services.expense_import import import_expenses
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    encode_cursor,
+    decode_cursor,
+)
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
 
+def _unsupported_currency(error: crud.UnsupportedCurrency) -> HTTPException:
+    return HTTPException(
+        status_code=422,
+        detail="No exchange rate loaded for {} to {}".format(*error.args)
+    )
+
+
 @router.post("/", response_model=schemas.ExpenseOut)
-def create_expense(
+async def create_expense(
     expense: schemas.ExpenseCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return crud.create_expense(db, expense)
+    try:
+        return await run_db(db, crud.create_expense, expense)
+    except crud.UnsupportedCurrency as error:
+        raise _unsupported_currency(error)
 
 
 @router.put("/{expense_id}", response_model=schemas.ExpenseOut)
-def update_expense(
+async def update_expense(
     expense_id: UUID,
     update: schemas.ExpenseUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return crud.update_expense(db, expense_id, update)
+    try:
+        expense = await run_db(db, crud.update_expense, expense_id, update)
+    except crud.ExpenseVersionConflict:
+        raise HTTPException(
+            status_code=409,
+            detail="Expense was modified by another request"
+        )
+    except crud.UnsupportedCurrency as error:
+        raise _unsupported_currency(error)
+
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
 
+    return expense
 
-@router.get("/group/{group_id}")
-def list_group_expenses(
+
+@router.post("/import/{group_id}", response_model=schemas.ExpenseImportResult)
+async def import_group_expenses(
     group_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return crud.get_expenses_by_group(db, group_id)
\ No newline at end of file
+    """
+    Bulk import from a streamed NDJSON (one ExpenseImportRow per line)
+    or CSV body (title,total_amount,paid_by,splits[,created_at][,currency]
+    with splits as user_id:amount;user_id:amount). Only for active
+    members of the group.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "csv" in content_type:
+        fmt = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Expected text/csv or application/x-ndjson body"
+        )
+
+    if await run_db(db, crud.get_group_version, group_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    return await import_expenses(db, group_id, request.stream(), fmt)
+
+
+@router.get(
+    "/group/{group_id}",
+    response_model=list[schemas.ExpenseOut],
+    response_class=ORJSONResponse
+)
+async def list_group_expenses(
+    group_id: UUID,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    One page of expenses with an ETag from the group version. A
+    matching If-None-Match gets a 304 without loading any expenses.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    version = await run_db(db, crud.get_group_version, group_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    async def render():
+        # Fetch one extra row to know whether another page exists
+        expenses = await run_db(db, crud.get_expense_rows_by_group, group_id, limit + 1, after)
+
+        headers = {}
+        if len(expenses) > limit:
+            expenses = expenses[:limit]
+            last = expenses[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+
+        return dumps(expenses), headers
+
+    return await group_response(
+        request, group_id, version, ("expenses", limit, cursor), render
+    )
@@ -1,35 +1,220 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_session, run_db, run_db_and_close
 from app import crud, schemas
 from app.auth.dependencies import get_current_user
+from app.fairness.settlements import optimize_settlements
+from app.http_cache import group_response
+from app.read_routing import get_read_db
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    encode_cursor,
+    decode_cursor,
+)
+from app.responses import ORJSONResponse
+from app.services.fx_rates import MissingFxRate, fx_rate_cache
+from app.services.group_events import group_events
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
 
 
 @router.post("/", response_model=schemas.GroupOut)
-def create_group(
+async def create_group(
     group: schemas.GroupCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return crud.create_group(db, group, current_user.id)
+    return await run_db(db, crud.create_group, group, current_user.id)
 
 
-@router.get("/", response_model=list[schemas.GroupOut])
-def list_groups(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=list[schemas.GroupSummaryOut], response_class=ORJSONResponse)
+async def list_groups(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
-    return crud.get_groups(db)
+    """
+    One page of the caller's groups, newest first, each with its
+    member count and the caller's balance. The next page's cursor is
+    in the X-Next-Cursor header.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rates = await run_db(db, fx_rate_cache.get)
+
+    # Fetch one extra row to know whether another page exists
+    try:
+        groups = await run_db(db, crud.get_group_rows, current_user.id, limit + 1, after, rates)
+    except MissingFxRate as error:
+        raise HTTPException(
+            status_code=503,
+            detail="No exchange rate loaded for {} to {}".format(*error.args)
+        )
+
+    headers = {}
+    if len(groups) > limit:
+        groups = groups[:limit]
+        last = groups[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+
+    return ORJSONResponse(groups, headers=headers)
 
 
 @router.get("/{group_id}/balances")
-def get_group_balances(
+async def get_group_balances(
     group_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
-    return crud.get_group_balances(db, group_id)
\ No newline at end of file
+    """
+    Balances in the group's base currency, with an ETag from the group
+    and FX rate versions. A matching If-None-Match gets a 304 without
+    reading any balances.
+    """
+    version = await run_db(db, crud.get_group_version, group_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    rates = await run_db(db, fx_rate_cache.get)
+
+    async def render():
+        try:
+            balances = await run_db(db, crud.get_group_balances, group_id, rates)
+        except MissingFxRate as error:
+            raise HTTPException(
+                status_code=503,
+                detail="No exchange rate loaded for {} to {}".format(*error.args)
+            )
+        amounts = {user_id: balance.amount for user_id, balance in balances.items()}
+        return JSONResponse(jsonable_encoder(amounts)).body, {}
+
+    return await group_response(
+        request, group_id, f"{version}.{rates.version}", "balances", render
+    )
+
+
+def _balance_rows(balances: dict):
+    return [
+        {"user_id": user_id, "balance": balance.amount}
+        for user_id, balance in balances.items()
+    ]
+
+
+async def _settlement_plan(db, group_id: UUID, user_id: UUID, rates=None):
+    """
+    crud.get_settlement_plan, with the balances read through run_db
+    and the solver run in the threadpool: its exact search can take a
+    few hundred ms, which in async mode would block the event loop.
+    404 unless user_id is an active member of the group.
+    """
+    if await run_db(db, crud.get_group_version, group_id, user_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    if rates is None:
+        rates = await run_db(db, fx_rate_cache.get)
+
+    try:
+        read = await run_db(db, crud.get_settlement_balances, group_id, rates)
+    except MissingFxRate as error:
+        raise HTTPException(
+            status_code=503,
+            detail="No exchange rate loaded for {} to {}".format(*error.args)
+        )
+
+    if read is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    version, balances = read
+    return version, balances, await run_in_threadpool(optimize_settlements, balances)
+
+
+@router.get("/{group_id}/settlement-plan", response_model=schemas.SettlementPlanOut)
+async def get_settlement_plan(
+    group_id: UUID,
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    The fewest transfers that settle the group's balances, without
+    recording anything. Pass the version to POST settle-up to record
+    exactly this plan.
+    """
+    version, balances, transfers = await _settlement_plan(db, group_id, current_user.id)
+    return {
+        "version": version,
+        "transfers": [
+            {"from_user": t["from"], "to_user": t["to"], "amount": t["amount"].amount}
+            for t in transfers
+        ],
+        "balances": _balance_rows(balances),
+    }
+
+
+@router.post("/{group_id}/settle-up", response_model=schemas.SettleUpOut)
+async def settle_up(
+    group_id: UUID,
+    settle: Optional[schemas.SettleUpRequest] = None,
+    db: Session = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """
+    Record the group's settlement plan in one transaction. 409 if the
+    balances changed since the plan at `version`, or while this one
+    was being computed.
+    """
+    version = settle.version if settle else None
+    rates = await run_db(db, fx_rate_cache.get)
+    plan = await _settlement_plan(db, group_id, current_user.id, rates)
+
+    try:
+        version, settlements, balances = await run_db(
+            db, crud.record_settlement_plan, group_id, plan, version, rates
+        )
+    except crud.GroupVersionConflict:
+        raise HTTPException(
+            status_code=409,
+            detail="Group balances changed; review the plan again"
+        )
+
+    return {
+        "version": version,
+        "settlements": settlements,
+        "balances": _balance_rows(balances),
+    }
+
+
+@router.get("/{group_id}/events")
+async def stream_group_events(
+    group_id: UUID,
+    db: Session = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """
+    Server-Sent Events for changes to the group: expense.created,
+    expense.updated, expenses.imported, settlement.recorded,
+    settlements.recorded and balances.changed, each with the new
+    group version as its id. Only for active members of the group.
+    Clients revalidate their cached reads on ready and resync.
+    """
+    # The stream can stay open for hours; don't pin a pooled connection
+    version = await run_db_and_close(db, crud.get_group_version, group_id, current_user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    if not group_events.running:
+        raise HTTPException(status_code=503, detail="Group events are not running")
+
+    return StreamingResponse(
+        group_events.stream(group_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,116 @@
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.database import pool_snapshots
+from app.request_metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    request_metrics,
+    render_pool_metrics,
+)
+from app.auth.user_cache import user_cache
+from app.http_cache import response_cache
+from app.read_routing import recent_writes
+from app.services.email_queue import email_queue
+from app.services.fx_rates import fx_rate_cache
+from app.services.group_events import group_events
+
+
+# Bearer token for /internal/* and /metrics, e.g. Prometheus'
+# bearer_token. Without one the app doesn't mount them at all.
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN")
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))
+):
+    """
+    The stats expose pool, cache, routing and email internals, so a
+    user's token isn't enough: only the shared one is.
+    """
+    if not INTERNAL_METRICS_TOKEN or credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), INTERNAL_METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    prefix="/internal", tags=["Internal"], dependencies=[Depends(require_metrics_token)]
+)
+
+# Served at the root, where Prometheus scrapes by default
+metrics_router = APIRouter(tags=["Internal"], dependencies=[Depends(require_metrics_token)])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Per-route latency, status and query metrics plus pool gauges, in
+    Prometheus text format. Async so it reads the request metrics on
+    the event loop that writes them.
+    """
+    lines = request_metrics.render() + render_pool_metrics(pool_snapshots())
+    return Response("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/db-pool")
+def db_pool_metrics():
+    """
+    Connection pool gauges and counters for this worker process.
+    """
+    return pool_snapshots()
+
+
+@router.get("/user-cache")
+def user_cache_metrics():
+    """
+    Hit/miss counters for the authenticated user cache.
+    """
+    return user_cache.stats()
+
+
+@router.get("/response-cache")
+def response_cache_metrics():
+    """
+    Hit/miss counters for the group response cache.
+    """
+    return response_cache.stats()
+
+
+@router.get("/fx-rates")
+def fx_rate_metrics():
+    """
+    Loaded version and reload counters for the FX rate cache.
+    """
+    return fx_rate_cache.stats()
+
+
+@router.get("/group-events")
+async def group_event_metrics():
+    """
+    Open streams and fan-out counters for group change events. Async
+    so it reads the subscriber sets on the event loop that owns them.
+    """
+    return group_events.stats()
+
+
+@router.get("/email-queue")
+def email_queue_metrics():
+    """
+    Backlog and delivery counters for the outbound email queue.
+    """
+    return email_queue.stats()
+
+
+@router.get("/read-routing")
+def read_routing_metrics():
+    """
+    Users pinned to the primary after writing, and where reads went.
+    """
+    return recent_writes.stats()
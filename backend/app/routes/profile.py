@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends
-from app.auth.security import get_current_user
-from app.models import User
-from app.schemas import UserOut
+from app.auth.dependencies import get_current_user
+from app.schemas import CurrentUser, UserOut
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: CurrentUser = Depends(get_current_user)):
     return current_user
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_session, run_db
 from app import crud, schemas
 from app.auth.dependencies import get_current_user
 
@@ -9,9 +9,9 @@ router = APIRouter(prefix="/settlements", tags=["Settlements"])
 
 
 @router.post("/", response_model=schemas.SettlementOut)
-def create_settlement(
+async def create_settlement(
     settlement: schemas.SettlementCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return crud.create_settlement(db, settlement)
\ No newline at end of file
+    return await run_db(db, crud.create_settlement, settlement)
\ No newline at end of file
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import run_db
+from app import crud, schemas
+from app.auth.dependencies import get_current_user
+from app.pagination import encode_sync_cursor, decode_sync_cursor
+from app.read_routing import get_read_db
+from app.responses import ORJSONResponse
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("/", response_model=schemas.SyncOut, response_class=ORJSONResponse)
+async def sync(
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Everything that changed in the caller's groups since `cursor`:
+    expenses, splits, settlements and ledger entries created or
+    deactivated since, keyed by id so clients can upsert them. Without
+    a cursor, or for groups joined since, the group's active rows.
+    """
+    since = decode_sync_cursor(cursor) if cursor else {}
+    versions, changes = await run_db(db, crud.get_changes, current_user.id, since)
+
+    return ORJSONResponse({"cursor": encode_sync_cursor(versions), **changes})
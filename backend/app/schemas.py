@@ -1,11 +1,19 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, PlainSerializer
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, List, Optional
 from decimal import Decimal
 import enum
 
 
+# ISO 4217 alphabetic code
+CURRENCY_PATTERN = "^[A-Z]{3}$"
+
+# Money in responses: a Decimal in Python, a JSON number on the wire,
+# as jsonable_encoder writes it and the iOS client (Double) reads it
+Amount = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
+
 # -----------------------------
 # ENUMS
 # -----------------------------
@@ -37,6 +45,18 @@ class UserLogin(BaseModel):
     password: str
 
 
+class CurrentUser(BaseModel):
+    id: UUID
+    name: str
+    email: str
+    is_active: Optional[bool] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class UserOut(BaseModel):
     id: UUID
     name: str
@@ -67,6 +87,12 @@ class GroupOut(BaseModel):
         from_attributes = True
 
 
+class GroupSummaryOut(GroupOut):
+    member_count: int
+    # The caller's net balance in the group's base currency
+    balance: Amount
+
+
 # -----------------------------
 # GROUP MEMBER SCHEMAS
 # -----------------------------
@@ -93,7 +119,7 @@ class ExpenseSplitCreate(BaseModel):
 
 class ExpenseSplitOut(BaseModel):
     user_id: UUID
-    amount: Decimal
+    amount: Amount
 
     class Config:
         from_attributes = True
@@ -109,6 +135,8 @@ class ExpenseCreate(BaseModel):
     total_amount: Decimal = Field(..., gt=0)
     paid_by: UUID
     splits: List[ExpenseSplitCreate]
+    # ISO 4217 code; the group's base currency if omitted
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
 
 
 class ExpenseUpdate(BaseModel):
@@ -116,14 +144,18 @@ class ExpenseUpdate(BaseModel):
     total_amount: Optional[Decimal]
     paid_by: Optional[UUID]
     splits: Optional[List[ExpenseSplitCreate]]
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
+    # Version being edited; the update is rejected if it's stale
+    version: Optional[int] = None
 
 
 class ExpenseOut(BaseModel):
     id: UUID
     group_id: UUID
     title: str
-    total_amount: Decimal
+    total_amount: Amount
     paid_by: UUID
+    currency: str
     version: int
     created_at: datetime
     updated_at: datetime
@@ -133,6 +165,31 @@ class ExpenseOut(BaseModel):
         from_attributes = True
 
 
+# -----------------------------
+# EXPENSE IMPORT
+# -----------------------------
+
+class ExpenseImportRow(BaseModel):
+    title: str
+    total_amount: Decimal = Field(..., gt=0)
+    paid_by: UUID
+    splits: List[ExpenseSplitCreate] = Field(..., min_length=1)
+    created_at: Optional[datetime] = None
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ExpenseImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+
+
 # -----------------------------
 # SETTLEMENT SCHEMAS
 # -----------------------------
@@ -149,7 +206,7 @@ class SettlementOut(BaseModel):
     group_id: UUID
     from_user: UUID
     to_user: UUID
-    amount: Decimal
+    amount: Amount
     created_at: datetime
 
     class Config:
@@ -162,7 +219,98 @@ class SettlementOut(BaseModel):
 
 class BalanceOut(BaseModel):
     user_id: UUID
-    balance: Decimal
+    balance: Amount
+
+
+# -----------------------------
+# SETTLE UP
+# -----------------------------
+
+class SettlementTransferOut(BaseModel):
+    from_user: UUID
+    to_user: UUID
+    amount: Amount
+
+
+class SettlementPlanOut(BaseModel):
+    # Group version the plan was computed at
+    version: int
+    transfers: List[SettlementTransferOut]
+    balances: List[BalanceOut]
+
+
+class SettleUpRequest(BaseModel):
+    # Version of a reviewed plan; rejected if the balances changed since
+    version: Optional[int] = None
+
+
+class SettleUpOut(BaseModel):
+    version: int
+    settlements: List[SettlementOut]
+    # After the settlements: zero, or within a cent when converted
+    balances: List[BalanceOut]
+
+
+# -----------------------------
+# SYNC SCHEMAS
+# -----------------------------
+
+class SyncExpenseOut(BaseModel):
+    id: UUID
+    group_id: UUID
+    title: str
+    total_amount: Amount
+    paid_by: UUID
+    currency: str
+    version: int
+    is_active: bool
+    # Group version of the write that created or retired it
+    change_version: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class SyncExpenseSplitOut(BaseModel):
+    id: UUID
+    expense_id: UUID
+    user_id: UUID
+    amount: Amount
+
+
+class SyncSettlementOut(BaseModel):
+    id: UUID
+    group_id: UUID
+    from_user: UUID
+    to_user: UUID
+    amount: Amount
+    is_active: bool
+    change_version: int
+    created_at: datetime
+
+
+class SyncLedgerEntryOut(BaseModel):
+    id: UUID
+    group_id: UUID
+    from_user: UUID
+    to_user: UUID
+    amount: Amount
+    currency: str
+    reference_type: LedgerReferenceType
+    reference_id: UUID
+    is_active: bool
+    change_version: int
+    created_at: datetime
+
+
+class SyncOut(BaseModel):
+    # Pass back as ?cursor= to get the next delta
+    cursor: str
+    # Groups the caller has left or that were deleted
+    removed_groups: List[UUID]
+    expenses: List[SyncExpenseOut]
+    splits: List[SyncExpenseSplitOut]
+    settlements: List[SyncSettlementOut]
+    ledger_entries: List[SyncLedgerEntryOut]
 
 
 # -----------------------------
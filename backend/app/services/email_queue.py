@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+from starlette.concurrency import run_in_threadpool
+
+from app.services.email_service import get_transport
+
+
+logger = logging.getLogger(__name__)
+
+# Sends in flight at once; each one holds a threadpool thread
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "4"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+
+# Retry n waits about base * 2 ** (n - 1) seconds, capped at max
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "2"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "300"))
+
+# Keep a row per email in outbound_emails and replay pending ones on start
+EMAIL_QUEUE_DURABLE = os.getenv("EMAIL_QUEUE_DURABLE", "false").lower() == "true"
+
+# A durable row claimed this long ago and still sending is taken to be
+# abandoned by a worker that died, and replayed; keep it well above
+# EMAIL_RETRY_MAX_SECONDS
+EMAIL_CLAIM_SECONDS = float(os.getenv("EMAIL_CLAIM_SECONDS", "900"))
+
+
+# -----------------------
+# Durable Storage
+# -----------------------
+# Queue bookkeeping always uses the sync engine from the threadpool,
+# whatever DB_MODE the routes run in. A row is "sending" while a worker
+# process owns it, so every row goes out from exactly one process, and
+# its html, which can hold a live reset link, is cleared once it's
+# sent or given up on.
+
+def _persist_email(message: dict):
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        # Claimed by the enqueuing process from the start
+        row = models.OutboundEmail(
+            to_email=message["to"],
+            subject=message["subject"],
+            html=message["html"],
+            status=models.OutboundEmailStatus.sending,
+            claimed_at=datetime.utcnow()
+        )
+        db.add(row)
+        db.commit()
+        return row.id
+    finally:
+        db.close()
+
+
+def _update_email(email_id, **fields):
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.OutboundEmail).filter(
+            models.OutboundEmail.id == email_id
+        ).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim_pending_emails(claim_seconds: float):
+    """
+    Claim pending rows, and sending rows whose claim has lapsed, for
+    this process. One conditional UPDATE: two processes starting at
+    once can't both match a row, since the loser re-checks the status
+    after the winner's commit.
+    """
+    from app import models
+    from app.database import SessionLocal
+
+    Email = models.OutboundEmail
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            update(Email)
+            .where(or_(
+                Email.status == models.OutboundEmailStatus.pending,
+                and_(Email.status == models.OutboundEmailStatus.sending,
+                     Email.claimed_at < now - timedelta(seconds=claim_seconds))
+            ))
+            .values(status=models.OutboundEmailStatus.sending, claimed_at=now)
+            .returning(Email.id, Email.to_email, Email.subject, Email.html,
+                       Email.attempts, Email.created_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+
+        return [
+            {
+                "id": row.id,
+                "message": {"to": row.to_email, "subject": row.subject, "html": row.html},
+                "attempts": row.attempts
+            }
+            for row in sorted(rows, key=lambda row: row.created_at)
+        ]
+    finally:
+        db.close()
+
+
+def _release_emails(email_ids: list):
+    """
+    Hand rows this process still holds back to pending, for whichever
+    process starts next.
+    """
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.OutboundEmail).filter(
+            models.OutboundEmail.id.in_(email_ids),
+            models.OutboundEmail.status == models.OutboundEmailStatus.sending
+        ).update({"status": models.OutboundEmailStatus.pending, "claimed_at": None},
+                 synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+# -----------------------
+# Queue
+# -----------------------
+
+class EmailQueue:
+    """
+    In-process delivery queue. Endpoints enqueue and return; workers
+    send through the transport with exponential backoff between
+    attempts. Started and stopped by the app lifespan.
+    """
+
+    def __init__(
+        self,
+        transport,
+        workers: int = EMAIL_WORKERS,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        retry_base: float = EMAIL_RETRY_BASE_SECONDS,
+        retry_max: float = EMAIL_RETRY_MAX_SECONDS,
+        durable: bool = EMAIL_QUEUE_DURABLE,
+        claim_seconds: float = EMAIL_CLAIM_SECONDS
+    ):
+        self.transport = transport
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.durable = durable
+        self.claim_seconds = claim_seconds
+
+        self._queue = None
+        self._tasks = []
+        self._retries = set()
+        # Durable rows this process has claimed and not finished
+        self._claimed = set()
+
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+        if self.durable:
+            for job in await run_in_threadpool(_claim_pending_emails, self.claim_seconds):
+                self._claimed.add(job["id"])
+                self._queue.put_nowait(job)
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Give queued emails up to `timeout` seconds to go out, then
+        cancel. Durable rows still unsent are released to pending and
+        retried on the next start.
+        """
+        if not self.running:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+
+        if self._claimed:
+            await run_in_threadpool(_release_emails, list(self._claimed))
+            self._claimed = set()
+
+        self._queue = None
+        self._tasks = []
+        self._retries = set()
+
+    async def enqueue(self, message: dict):
+        if not self.running:
+            raise RuntimeError("Email queue is not running")
+
+        email_id = None
+        if self.durable:
+            email_id = await run_in_threadpool(_persist_email, message)
+            self._claimed.add(email_id)
+
+        self.enqueued += 1
+        self._queue.put_nowait({"id": email_id, "message": message, "attempts": 0})
+
+    async def join(self):
+        """
+        Wait until every queued email, including scheduled retries,
+        has been sent or given up on.
+        """
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.gather(*self._retries, return_exceptions=True)
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+        # Jitter keeps retries from a provider outage from lining up
+        return delay * random.uniform(0.5, 1.0)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self.running else 0,
+            "waiting_retry": len(self._retries),
+            "enqueued_total": self.enqueued,
+            "sent_total": self.sent,
+            "retried_total": self.retried,
+            "failed_total": self.failed,
+        }
+
+    # -----------------------
+    # Delivery
+    # -----------------------
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception:
+                logger.exception("Email queue bookkeeping failed")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: dict):
+        job["attempts"] += 1
+
+        try:
+            await run_in_threadpool(self.transport.send, job["message"])
+        except Exception as e:
+            await self._record_failure(job, e)
+            return
+
+        self.sent += 1
+        if job["id"] is not None:
+            await run_in_threadpool(
+                _update_email, job["id"],
+                status="sent", attempts=job["attempts"], sent_at=datetime.utcnow(), html=""
+            )
+            self._claimed.discard(job["id"])
+
+    async def _record_failure(self, job: dict, error: Exception):
+        status = "failed" if job["attempts"] >= self.max_attempts else "sending"
+
+        if job["id"] is not None:
+            fields = {"html": ""} if status == "failed" else {"claimed_at": datetime.utcnow()}
+            await run_in_threadpool(
+                _update_email, job["id"],
+                status=status, attempts=job["attempts"], last_error=str(error)[:500], **fields
+            )
+            if status == "failed":
+                self._claimed.discard(job["id"])
+
+        if status == "failed":
+            self.failed += 1
+            logger.error(
+                "Giving up on email to %s after %d attempts: %s",
+                job["message"]["to"], job["attempts"], error
+            )
+            return
+
+        self.retried += 1
+        task = asyncio.create_task(self._retry_later(job, self.backoff(job["attempts"])))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _retry_later(self, job: dict, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(job)
+
+
+email_queue = EmailQueue(get_transport())
@@ -9,12 +9,18 @@ resend.api_key = os.getenv("RESEND_API_KEY")
 FROM_EMAIL = os.getenv("FROM_EMAIL")
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 
+# "resend" sends through the Resend API, "fake" only records messages
+EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "resend")
 
-def send_reset_email(to_email: str, token: str):
+
+# -----------------------
+# Messages
+# -----------------------
+
+def build_reset_email(to_email: str, token: str) -> dict:
     reset_link = f"{FRONTEND_URL}/reset-password?token={token}"
 
-    resend.Emails.send({
-        "from": FROM_EMAIL,
+    return {
         "to": to_email,
         "subject": "Reset Your PayShare Password",
         "html": f"""
@@ -25,4 +31,43 @@ def send_reset_email(to_email: str, token: str):
             <br><br>
             <small>If you did not request this, ignore this email.</small>
         """
-    })
\ No newline at end of file
+    }
+
+
+# -----------------------
+# Transports
+# -----------------------
+
+class ResendTransport:
+    """
+    Blocking send through the Resend API.
+    """
+
+    def send(self, message: dict):
+        resend.Emails.send({"from": FROM_EMAIL, **message})
+
+
+class FakeTransport:
+    """
+    Records messages instead of sending them. The first `fail_times`
+    sends raise, to exercise retries.
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.attempts = 0
+        self.sent = []
+
+    def send(self, message: dict):
+        self.attempts += 1
+        if self.attempts <= self.fail_times:
+            raise ConnectionError("Fake transport failure")
+        self.sent.append(message)
+
+
+def get_transport(name: str = EMAIL_TRANSPORT):
+    if name == "fake":
+        return FakeTransport()
+    if name == "resend":
+        return ResendTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT: {name}")
@@ -0,0 +1,236 @@
+import csv
+import json
+from typing import AsyncIterator
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.database import run_db
+from app.services.fx_rates import fx_rate_cache
+
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# Longest row held in memory; longer ones are dropped and reported
+MAX_ROW_BYTES = 64 * 1024
+
+CSV_COLUMNS = ("title", "total_amount", "paid_by", "splits")
+
+
+# -----------------------
+# Line Parsing
+# -----------------------
+
+def _decode(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_bytes: int = MAX_ROW_BYTES):
+    """
+    Yield (line_number, text) from a streamed body without
+    buffering more than one partial line of up to `max_bytes`. A
+    longer line is discarded as it arrives and yielded with text None.
+    """
+    pending = b""
+    number = 0
+    oversized = False
+
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+
+        for line in lines:
+            number += 1
+            if oversized or len(line) > max_bytes:
+                oversized = False
+                yield number, None
+            else:
+                yield number, _decode(line)
+
+        if len(pending) > max_bytes:
+            oversized = True
+            pending = b""
+
+    if oversized:
+        yield number + 1, None
+    elif pending:
+        yield number + 1, _decode(pending)
+
+
+async def iter_csv_records(lines: AsyncIterator, max_bytes: int = MAX_ROW_BYTES):
+    """
+    Join iter_lines output into CSV records, so a quoted field can
+    hold newlines. Yields (first_line_number, text), with text None
+    for a record over `max_bytes`. A record ends on the line where its
+    quotes balance: escaped quotes come in pairs.
+    """
+    parts = []
+    size = 0
+    start = 0
+    quoted = False
+
+    async for number, line in lines:
+        if not quoted:
+            parts, size, start = [], 0, number
+
+        if line is None:
+            # Its quotes are unknown, so the record ends with it
+            quoted = False
+            yield start, None
+            continue
+
+        quoted ^= line.count('"') % 2 == 1
+        size += len(line) + 1
+        if parts is not None and size > max_bytes:
+            parts = None
+        elif parts is not None:
+            parts.append(line)
+
+        if not quoted:
+            yield start, "\n".join(parts) if parts is not None else None
+
+    if quoted:
+        yield start, "\n".join(parts) if parts is not None else None
+
+
+def parse_ndjson_line(line: str) -> dict:
+    return json.loads(line)
+
+
+def parse_csv_record(record: str, header: list) -> dict:
+    """
+    One CSV row per expense. Splits are packed into a single column
+    as `user_id:amount;user_id:amount`.
+    """
+    values = next(csv.reader([record]), [])
+    if len(values) != len(header):
+        raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+
+    row = dict(zip(header, values))
+
+    splits = []
+    for part in row["splits"].split(";"):
+        user_id, _, amount = part.partition(":")
+        splits.append({"user_id": user_id.strip(), "amount": amount.strip()})
+    row["splits"] = splits
+
+    for optional in ("created_at", "currency"):
+        if not row.get(optional):
+            row.pop(optional, None)
+
+    return row
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}"
+            for e in error.errors()
+        )
+    return str(error)
+
+
+# -----------------------
+# Import
+# -----------------------
+
+async def import_expenses(
+    db: Session,
+    group_id: UUID,
+    chunks: AsyncIterator[bytes],
+    fmt: str
+) -> dict:
+    """
+    Validate rows as they arrive and write them in chunks of
+    IMPORT_CHUNK_SIZE, so memory stays flat for any upload size.
+    Each chunk is committed on its own. The caller checks the group
+    exists.
+    """
+    imported = 0
+    failed = 0
+    errors = []
+
+    header = None
+    pending_rows = []
+    pending_lines = []
+
+    def report(line_number, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "error": message})
+
+    async def flush():
+        nonlocal imported
+        if not pending_rows:
+            return
+
+        try:
+            imported += await run_db(
+                db, crud.bulk_create_expenses, group_id, pending_rows, rates
+            )
+        except SQLAlchemyError as e:
+            await run_db(db, Session.rollback)
+            message = f"Database error: {e.__class__.__name__}"
+            for line_number in pending_lines:
+                report(line_number, message)
+
+        pending_rows.clear()
+        pending_lines.clear()
+
+    # Rows in a currency that doesn't convert fail on their own
+    base_currency = await run_db(db, crud.get_group_base_currency, group_id)
+    rates = await run_db(db, fx_rate_cache.get)
+
+    rows = iter_lines(chunks)
+    if fmt == "csv":
+        rows = iter_csv_records(rows)
+
+    async for line_number, line in rows:
+        if line is None:
+            report(line_number, f"Row is longer than {MAX_ROW_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == "csv" and header is None:
+            header = [h.strip() for h in next(csv.reader([line]))]
+            missing = [c for c in CSV_COLUMNS if c not in header]
+            if missing:
+                report(line_number, f"Missing columns: {', '.join(missing)}")
+                break
+            continue
+
+        try:
+            if fmt == "csv":
+                raw = parse_csv_record(line, header)
+            else:
+                raw = parse_ndjson_line(line)
+            row = schemas.ExpenseImportRow.model_validate(raw)
+            if row.currency is not None:
+                crud.check_currency(db, row.currency, base_currency, rates)
+        except (ValueError, TypeError, ValidationError) as e:
+            report(line_number, _describe(e))
+            continue
+        except crud.UnsupportedCurrency as e:
+            report(line_number, "currency: No exchange rate loaded for {} to {}".format(*e.args))
+            continue
+
+        pending_rows.append(row)
+        pending_lines.append(line_number)
+
+        if len(pending_rows) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    await flush()
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.money import Money, round_to_cents
+
+
+# How long a worker trusts its rates before checking the table version
+FX_CACHE_TTL = float(os.getenv("FX_CACHE_TTL", "60"))
+
+class MissingFxRate(Exception):
+    """
+    No rate is loaded for a currency that needs converting.
+    """
+
+
+# -----------------------
+# Rates
+# -----------------------
+
+class FxRates:
+    """
+    One immutable load of the fx_rates table: units of each currency
+    per unit of the provider's reference currency.
+    """
+
+    def __init__(self, version: int, rates: dict):
+        self.version = version
+        self.rates = rates
+
+    def rate(self, from_currency: str, to_currency: str) -> Decimal:
+        if from_currency == to_currency:
+            return Decimal("1")
+
+        try:
+            return self.rates[to_currency] / self.rates[from_currency]
+        except KeyError:
+            raise MissingFxRate(from_currency, to_currency) from None
+
+    def convert_totals(self, totals: dict, base_currencies: dict) -> dict:
+        """
+        Fold {(group_id, user_id, currency): cents} into
+        {(group_id, user_id): Money} in each group's base currency.
+        Each rate is looked up once per currency pair, not per row.
+        Single-currency groups stay in int cents; converted groups are
+        rounded once, after summing, so their balances still add up
+        to exactly zero.
+        """
+        rates = {}
+        converted = {}
+        exact_groups = set()
+
+        for (group_id, user_id, currency), cents in totals.items():
+            key = (group_id, user_id)
+            base_currency = base_currencies[group_id]
+
+            if currency == base_currency:
+                converted[key] = converted.get(key, 0) + cents
+                continue
+
+            pair = (currency, base_currency)
+            if pair not in rates:
+                rates[pair] = self.rate(*pair)
+
+            exact_groups.add(group_id)
+            converted[key] = converted.get(key, 0) + cents * rates[pair]
+
+        result = {}
+        exact = {}
+
+        for key, value in converted.items():
+            if key[0] in exact_groups:
+                exact.setdefault(key[0], {})[key] = Decimal(value)
+            else:
+                result[key] = Money(value)
+
+        for values in exact.values():
+            result.update(round_to_cents(values))
+
+        return result
+
+
+class FxRateCache:
+    """
+    Per-process copy of the fx_rates table. get() re-reads the table
+    only when its version has moved, and checks the version at most
+    once per ttl seconds, so most balance reads cost no FX query.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+        self._rates = FxRates(0, {})
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.reloads = 0
+
+    def get(self, db: Session) -> FxRates:
+        now = time.monotonic()
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.ttl:
+                return self._rates
+
+        version = db.query(func.max(models.FxRate.version)).scalar() or 0
+
+        with self._lock:
+            self.checks += 1
+            self._checked_at = now
+            if version == self._rates.version:
+                return self._rates
+
+        rows = db.query(models.FxRate.currency, models.FxRate.rate).all()
+        rates = FxRates(version, {row.currency: row.rate for row in rows})
+
+        with self._lock:
+            self.reloads += 1
+            self._rates = rates
+            return rates
+
+    def invalidate(self):
+        """
+        Check the table version on the next get().
+        """
+        with self._lock:
+            self._checked_at = None
+
+    def clear(self):
+        with self._lock:
+            self._rates = FxRates(0, {})
+            self._checked_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._rates.version,
+                "currencies": len(self._rates.rates),
+                "ttl_seconds": self.ttl,
+                "checks_total": self.checks,
+                "reloads_total": self.reloads,
+            }
+
+
+fx_rate_cache = FxRateCache(ttl=FX_CACHE_TTL)
+
+
+# -----------------------
+# Providers
+# -----------------------
+
+class FileRateProvider:
+    """
+    Rates from a local JSON file, standing in for a live provider:
+
+        {"base": "USD", "rates": {"EUR": "0.92", "GBP": "0.79"}}
+
+    Rates are units of each currency per unit of `base`.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def fetch(self) -> dict:
+        data = json.loads(self.path.read_text())
+
+        rates = {data["base"]: Decimal("1")}
+        for currency, rate in data["rates"].items():
+            rate = Decimal(str(rate))
+            if rate <= 0:
+                raise ValueError(f"Rate for {currency} must be positive")
+            rates[currency] = rate
+
+        return rates
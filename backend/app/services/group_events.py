@@ -0,0 +1,261 @@
+import asyncio
+import os
+import random
+from collections import deque
+from contextlib import contextmanager
+from uuid import UUID
+
+from app.responses import dumps
+
+
+# "memory" fans out within this worker only; a cross-worker backend
+# (Redis, Postgres LISTEN/NOTIFY) plugs in through get_backend
+GROUP_EVENTS_BACKEND = os.getenv("GROUP_EVENTS_BACKEND", "memory")
+
+# Events buffered per subscriber before it is told to resync instead
+GROUP_EVENTS_QUEUE_SIZE = int(os.getenv("GROUP_EVENTS_QUEUE_SIZE", "32"))
+
+# Comment frames on idle streams, so proxies keep them open and dead
+# clients are noticed
+GROUP_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("GROUP_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+
+# -----------------------
+# Frames
+# -----------------------
+# Events go out as Server-Sent Events. Each one is encoded once, on
+# publish, and the same bytes are queued for every subscriber.
+
+RETRY = b"retry: 5000\n\n"
+HEARTBEAT = b": ping\n\n"
+
+
+def encode_event(event: str, data: dict, version: int = None) -> bytes:
+    frame = b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    if version is not None:
+        frame = b"id: %d\n" % version + frame
+    return frame
+
+
+# -----------------------
+# Backends
+# -----------------------
+
+class MemoryBackend:
+    """
+    Hands every published event straight back to this process's
+    broker. A cross-worker backend has the same three methods: publish
+    sends to the shared channel, and a listener started by start()
+    calls deliver(group_id, frame) for every event, ours included.
+    """
+
+    def __init__(self):
+        self._deliver = None
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        self._deliver = None
+
+    def publish(self, group_id: UUID, frame: bytes):
+        if self._deliver is not None:
+            self._deliver(group_id, frame)
+
+
+def get_backend(name: str = GROUP_EVENTS_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown GROUP_EVENTS_BACKEND: {name}")
+
+
+# -----------------------
+# Subscriptions
+# -----------------------
+
+class Subscription:
+    """
+    One client's bounded buffer of frames for a group. A subscriber
+    that falls max_size events behind has its backlog replaced by a
+    single resync event: the publisher never waits on a slow client,
+    and memory per client stays bounded.
+    """
+
+    __slots__ = ("group_id", "max_size", "closed", "dropped", "_frames", "_ready")
+
+    def __init__(self, group_id: UUID, max_size: int):
+        self.group_id = group_id
+        self.max_size = max_size
+        self.closed = False
+        self.dropped = 0
+
+        self._frames = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, frame: bytes) -> bool:
+        """
+        Queue a frame; False if the backlog overflowed into a resync.
+        """
+        overflowed = len(self._frames) >= self.max_size
+        if overflowed:
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            self._frames.append(encode_event("resync", {"group_id": self.group_id}))
+
+        self._frames.append(frame)
+        self._ready.set()
+        return not overflowed
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float):
+        """
+        The next frame, or None after `timeout` idle seconds or once
+        closed.
+        """
+        if not self._frames and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        if self.closed or not self._frames:
+            return None
+        return self._frames.popleft()
+
+
+# -----------------------
+# Broker
+# -----------------------
+
+class GroupEventBroker:
+    """
+    Per-process pub/sub of group change events. crud publishes after
+    each commit, from a threadpool thread or the event loop; delivery
+    to subscribers always happens on the loop. Started and stopped by
+    the app lifespan; publishing before start() is a no-op, so the
+    CLI and tests can run crud without it.
+    """
+
+    def __init__(self, backend, queue_size: int = GROUP_EVENTS_QUEUE_SIZE,
+                 heartbeat: float = GROUP_EVENTS_HEARTBEAT_SECONDS):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+
+        self._loop = None
+        self._subscribers = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self.deliver)
+
+    async def stop(self):
+        """
+        Stop delivering and end every open stream.
+        """
+        await self.backend.stop()
+        self._loop = None
+
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._subscribers = {}
+
+    def publish(self, group_id: UUID, version: int, event: str, data: dict):
+        """
+        Safe to call from any thread. Call it only after the change is
+        committed, so a client that refetches on the event sees it.
+        """
+        if not self.running:
+            return
+
+        self.published += 1
+        self.backend.publish(group_id, encode_event(event, {"group_id": group_id, **data}, version))
+
+    def deliver(self, group_id: UUID, frame: bytes):
+        """
+        Entry point for the backend, from any thread.
+        """
+        loop = self._loop
+        if loop is None or group_id not in self._subscribers:
+            return
+
+        try:
+            loop.call_soon_threadsafe(self._fan_out, group_id, frame)
+        except RuntimeError:
+            # Loop closed during shutdown
+            pass
+
+    def _fan_out(self, group_id: UUID, frame: bytes):
+        for subscription in self._subscribers.get(group_id, ()):
+            if not subscription.push(frame):
+                self.resyncs += 1
+            self.delivered += 1
+
+    # -----------------------
+    # Subscribing
+    # -----------------------
+
+    @contextmanager
+    def subscribe(self, group_id: UUID):
+        """
+        Register a Subscription on the loop for the duration of the
+        block.
+        """
+        subscription = Subscription(group_id, self.queue_size)
+        self._subscribers.setdefault(group_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscribers.get(group_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[group_id]
+
+    async def stream(self, group_id: UUID):
+        """
+        SSE body for one client. The first event, ready, is sent once
+        the subscription is registered: clients revalidate their
+        balances and expense list on ready and on resync, then apply
+        events as they come, so nothing committed in between is lost.
+        """
+        if not self.running:
+            return
+
+        with self.subscribe(group_id) as subscription:
+            yield RETRY + encode_event("ready", {"group_id": group_id})
+
+            while True:
+                # Jitter keeps streams opened together from pinging together
+                frame = await subscription.get(self.heartbeat * random.uniform(0.75, 1.0))
+                if subscription.closed:
+                    return
+                yield HEARTBEAT if frame is None else frame
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "running": self.running,
+            "groups": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "queue_size": self.queue_size,
+            "published_total": self.published,
+            "delivered_total": self.delivered,
+            "resyncs_total": self.resyncs,
+        }
+
+
+group_events = GroupEventBroker(get_backend())
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app import database, models
+from app.services.email_queue import EmailQueue
+from app.services.email_service import FakeTransport
+
+
+MESSAGE = {"to": "sam@example.com", "subject": "Hi", "html": "<p>Hi</p>"}
+
+
+def run_queue(transport, max_attempts):
+    queue = EmailQueue(
+        transport, workers=2, max_attempts=max_attempts,
+        retry_base=0.01, retry_max=0.05, durable=False
+    )
+
+    async def scenario():
+        await queue.start()
+        await queue.enqueue(MESSAGE)
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+    return queue.stats()
+
+
+def test_retries_until_sent():
+    transport = FakeTransport(fail_times=2)
+    stats = run_queue(transport, max_attempts=5)
+
+    assert transport.sent == [MESSAGE]
+    assert transport.attempts == 3
+    assert stats["sent_total"] == 1
+    assert stats["retried_total"] == 2
+    assert stats["failed_total"] == 0
+
+
+def test_gives_up_after_max_attempts():
+    transport = FakeTransport(fail_times=10)
+    stats = run_queue(transport, max_attempts=3)
+
+    assert transport.sent == []
+    assert transport.attempts == 3
+    assert stats["failed_total"] == 1
+
+
+def test_durable_rows_go_out_once_across_workers(db, session_factory, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+
+    now = datetime.utcnow()
+    db.add_all([
+        models.OutboundEmail(to_email="a@example.com", subject="Hi", html="<p>a</p>"),
+        models.OutboundEmail(to_email="b@example.com", subject="Hi", html="<p>b</p>"),
+        # Another worker is sending this one; this one's worker died
+        models.OutboundEmail(to_email="c@example.com", subject="Hi", html="<p>c</p>",
+                             status=models.OutboundEmailStatus.sending, claimed_at=now),
+        models.OutboundEmail(to_email="d@example.com", subject="Hi", html="<p>d</p>",
+                             status=models.OutboundEmailStatus.sending,
+                             claimed_at=now - timedelta(hours=1)),
+    ])
+    db.commit()
+
+    transports = [FakeTransport(), FakeTransport()]
+    queues = [
+        EmailQueue(transport, workers=2, retry_base=0.01, durable=True, claim_seconds=60)
+        for transport in transports
+    ]
+
+    async def scenario():
+        for queue in queues:
+            await queue.start()
+        await queue.enqueue(MESSAGE)
+        for queue in queues:
+            await queue.join()
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+    sent = sorted(m["to"] for transport in transports for m in transport.sent)
+    assert sent == ["a@example.com", "b@example.com", "d@example.com", MESSAGE["to"]]
+
+    rows = {row.to_email: row for row in db.query(models.OutboundEmail)}
+    assert rows["c@example.com"].status == models.OutboundEmailStatus.sending
+    assert all(
+        (row.status, row.html) == (models.OutboundEmailStatus.sent, "")
+        for to, row in rows.items() if to != "c@example.com"
+    )
+
+
+def test_stop_releases_unsent_rows(db, session_factory, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    queue = EmailQueue(FakeTransport(fail_times=10), workers=1, retry_base=10, durable=True)
+
+    async def scenario():
+        await queue.start()
+        await queue.enqueue(MESSAGE)
+        await asyncio.sleep(0.05)
+        await queue.stop(timeout=0)
+
+    asyncio.run(scenario())
+
+    (row,) = db.query(models.OutboundEmail).all()
+    assert (row.status, row.attempts, row.claimed_at) == (models.OutboundEmailStatus.pending, 1, None)
+    assert row.html == MESSAGE["html"]
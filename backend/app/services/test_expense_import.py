@@ -0,0 +1,146 @@
+import asyncio
+import json
+from decimal import Decimal
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app import crud, models, schemas
+from app.auth.dependencies import get_current_user
+from app.database import get_session
+from app.routes import expenses
+from app.services import expense_import
+from app.services.expense_import import import_expenses, iter_csv_records, iter_lines
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def run_import(db, group_id, fmt, *chunks):
+    return asyncio.run(import_expenses(db, group_id, stream(*chunks), fmt))
+
+
+def collect(rows):
+    async def scenario():
+        return [row async for row in rows]
+
+    return asyncio.run(scenario())
+
+
+def ndjson_row(paid_by, users, amount="5", **fields):
+    return json.dumps({
+        "title": "Lunch", "total_amount": str(Decimal(amount) * len(users)),
+        "paid_by": str(paid_by),
+        "splits": [{"user_id": str(u), "amount": amount} for u in users],
+        **fields
+    })
+
+
+def test_ndjson_rows_split_across_chunks(db, users, make_group):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    crud.replace_fx_rates(db, {"USD": Decimal("1"), "EUR": Decimal("0.9")})
+
+    body = "\n".join([
+        ndjson_row(a, [a, b]),
+        "{not json",
+        ndjson_row(a, [a, b], total_amount="-1"),
+        "",
+        ndjson_row(b, [a, b], amount="2.50", currency="EUR"),
+        ndjson_row(b, [a, b], currency="JPY"),
+    ]).encode()
+
+    result = run_import(db, group, "ndjson", body[:7], body[7:90], body[90:])
+
+    assert (result["imported"], result["failed"]) == (2, 3)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 6]
+    assert "total_amount" in result["errors"][1]["error"]
+    assert result["errors"][2]["error"] == "currency: No exchange rate loaded for JPY to USD"
+    assert sorted(e.currency for e in crud.get_expenses_by_group(db, group)) == ["EUR", "USD"]
+
+
+def test_csv_quoted_fields_can_hold_newlines(db, users, make_group):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    splits = f"{a}:5;{b}:5"
+
+    body = "\r\n".join([
+        "title,total_amount,paid_by,splits,currency",
+        f'"Dinner, with ""wine""\nand dessert",10,{a},{splits},',
+        f"Taxi,10,{a},{splits},EURO",
+        f'"Hotel\n\nnight",10,{b},"{splits}",USD',
+    ]).encode()
+
+    result = run_import(db, group, "csv", body)
+
+    assert (result["imported"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["line"] == 4
+    assert sorted(e.title for e in crud.get_expenses_by_group(db, group)) == [
+        'Dinner, with "wine"\nand dessert', "Hotel\n\nnight"
+    ]
+
+
+def test_long_rows_are_dropped_as_they_arrive():
+    lines = collect(iter_lines(stream(b"ok\n", b"x" * 6, b"x" * 6, b"\nfine\n", b"y" * 20), 10))
+    assert lines == [(1, "ok"), (2, None), (3, "fine"), (4, None)]
+
+    records = collect(iter_csv_records(stream(
+        (1, 'a,"b'), (2, 'c",d'), (3, '"' + "z" * 8), (4, "z" * 8), (5, 'z"'), (6, None), (7, "e")
+    ), 16))
+    assert records == [(1, 'a,"b\nc",d'), (3, None), (6, None), (7, "e")]
+
+
+def test_failed_chunk_reports_its_rows_and_the_rest_import(db, users, make_group, monkeypatch):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    monkeypatch.setattr(expense_import, "IMPORT_CHUNK_SIZE", 2)
+
+    bulk_create = crud.bulk_create_expenses
+    calls = []
+
+    def flaky(db, group_id, rows, rates):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+        return bulk_create(db, group_id, rows, rates)
+
+    monkeypatch.setattr(crud, "bulk_create_expenses", flaky)
+
+    body = "\n".join(ndjson_row(a, [a, b]) for _ in range(5)).encode()
+    result = run_import(db, group, "ndjson", body)
+
+    assert calls == [2, 2, 1]
+    assert (result["imported"], result["failed"]) == (3, 2)
+    assert [(e["line"], e["error"]) for e in result["errors"]] == [
+        (3, "Database error: OperationalError"), (4, "Database error: OperationalError")
+    ]
+    assert db.query(models.Expense).count() == 3
+
+
+def test_unknown_group_and_outsiders_get_a_404(db, users, make_group):
+    a, b, outsider = users[:3]
+    group = make_group(a, members=[b])
+
+    app = FastAPI()
+    app.include_router(expenses.router)
+    app.dependency_overrides[get_session] = lambda: db
+    client = TestClient(app)
+
+    def post(user_id, group_id):
+        user = schemas.CurrentUser.model_validate(db.get(models.User, user_id))
+        app.dependency_overrides[get_current_user] = lambda: user
+        return client.post(
+            f"/expenses/import/{group_id}",
+            content=ndjson_row(a, [a, b]),
+            headers={"content-type": "application/x-ndjson"}
+        )
+
+    assert post(a, uuid4()).status_code == 404
+    assert post(outsider, group).status_code == 404
+    assert db.query(models.Expense).count() == 0
+
+    assert post(b, group).json()["imported"] == 1
@@ -0,0 +1,107 @@
+import json
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.auth.dependencies import get_current_user
+from app.database import get_session
+from app.money import Money
+from app.routes import expenses
+from app.services.fx_rates import FileRateProvider, FxRateCache, MissingFxRate
+
+
+@pytest.fixture
+def group(users, make_group):
+    a, b, c = users[:3]
+    return make_group(a, members=[b, c]), a, b, c
+
+
+def add_expense(db, group_id, paid_by, shares, currency=None):
+    return crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group_id,
+        title="Dinner",
+        total_amount=sum(shares.values()),
+        paid_by=paid_by,
+        currency=currency,
+        splits=[{"user_id": u, "amount": a} for u, a in shares.items()]
+    ))
+
+
+def test_mixed_currency_balances_convert_to_the_base_currency(db, group, tmp_path):
+    group_id, a, b, c = group
+
+    rates_file = tmp_path / "rates.json"
+    rates_file.write_text(json.dumps({"base": "USD", "rates": {"EUR": "0.8", "JPY": "150"}}))
+    crud.replace_fx_rates(db, FileRateProvider(rates_file).fetch())
+
+    add_expense(db, group_id, a, {a: Decimal("30"), b: Decimal("30")})
+    add_expense(db, group_id, b, {a: Decimal("8"), c: Decimal("8")}, currency="EUR")
+    add_expense(db, group_id, c, {b: Decimal("1500")}, currency="JPY")
+
+    balances = crud.get_group_balances(db, group_id)
+    assert balances == {a: Money.of(20), b: Money.of(-20), c: Money.of(0)}
+
+    crud.checkpoint_group_ledger(db, group_id)
+    totals = crud.compute_group_balances(db, group_id)
+    assert {user_id: balance for (_, user_id), balance in totals.items()} == balances
+
+    # New rates apply to existing balances once the cache sees the new version
+    crud.replace_fx_rates(db, {"USD": Decimal("1"), "EUR": Decimal("0.5"), "JPY": Decimal("150")})
+    assert crud.get_group_balances(db, group_id)[c] == Money.of(-6)
+
+
+def test_currencies_without_a_rate_are_rejected_on_write(db, group):
+    group_id, a, b, _ = group
+    crud.replace_fx_rates(db, {"USD": Decimal("1"), "GBP": Decimal("0.8")})
+
+    with pytest.raises(crud.UnsupportedCurrency):
+        add_expense(db, group_id, a, {b: Decimal("10")}, currency="JPY")
+
+    expense = add_expense(db, group_id, a, {b: Decimal("10")}, currency="GBP")
+    with pytest.raises(crud.UnsupportedCurrency):
+        crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+            title=None, total_amount=None, paid_by=None, splits=None, currency="JPY"
+        ))
+
+    assert [(e.id, e.currency) for e in crud.get_expenses_by_group(db, group_id)] == \
+        [(expense.id, "GBP")]
+    assert crud.get_group_balances(db, group_id)[b] == Money.of("-12.50")
+
+    # A rate dropped after the write still fails the read
+    crud.replace_fx_rates(db, {"USD": Decimal("1")})
+    with pytest.raises(MissingFxRate):
+        crud.get_group_balances(db, group_id)
+
+
+def test_unsupported_currency_is_a_422(db, group):
+    group_id, a, b, _ = group
+
+    app = FastAPI()
+    app.include_router(expenses.router)
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: None
+
+    response = TestClient(app).post("/expenses/", json={
+        "group_id": str(group_id), "title": "Sushi", "total_amount": "1500",
+        "paid_by": str(a), "currency": "JPY",
+        "splits": [{"user_id": str(b), "amount": "1500"}]
+    })
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "No exchange rate loaded for JPY to USD"
+    assert crud.get_group_version(db, group_id) == 0
+
+
+def test_cache_reloads_only_when_the_version_moves(db):
+    cache = FxRateCache(ttl=0)
+
+    crud.replace_fx_rates(db, {"USD": Decimal("1"), "EUR": Decimal("0.9")})
+    first = cache.get(db)
+    assert cache.get(db) is first
+
+    crud.replace_fx_rates(db, {"USD": Decimal("1"), "EUR": Decimal("0.8")})
+    assert cache.get(db).rate("EUR", "USD") == Decimal("1.25")
+    assert cache.stats()["reloads_total"] == 2
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import uuid
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.auth.dependencies import get_current_user
+from app.database import get_session
+from app.routes import groups
+from app.services.group_events import HEARTBEAT, GroupEventBroker, MemoryBackend
+
+
+def parse(frame: bytes) -> dict:
+    fields = dict(
+        line.split(": ", 1) for line in frame.decode().splitlines()
+        if line and not line.startswith(("retry", ":"))
+    )
+    return {**fields, "data": json.loads(fields["data"])}
+
+
+def test_fans_out_to_group_subscribers_from_any_thread():
+    broker = GroupEventBroker(MemoryBackend(), heartbeat=0.05)
+    group, other = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario():
+        await broker.start()
+        with broker.subscribe(group) as a, broker.subscribe(group) as b, \
+                broker.subscribe(other) as c:
+            publisher = threading.Thread(
+                target=broker.publish, args=(group, 7, "expense.created", {"expense_id": "x"})
+            )
+            publisher.start()
+            publisher.join()
+
+            frames = [await a.get(1), await b.get(1), await c.get(0.05)]
+        await broker.stop()
+        return frames
+
+    first, second, missing = asyncio.run(scenario())
+
+    assert first == second
+    assert parse(first) == {
+        "id": "7", "event": "expense.created",
+        "data": {"group_id": str(group), "expense_id": "x"}
+    }
+    assert missing is None
+    assert broker.stats()["subscribers"] == 0
+
+
+def test_slow_subscriber_gets_a_resync_instead_of_a_backlog():
+    broker = GroupEventBroker(MemoryBackend(), queue_size=4)
+    group = uuid.uuid4()
+
+    async def scenario():
+        await broker.start()
+        with broker.subscribe(group) as slow:
+            for version in range(1, 11):
+                broker.publish(group, version, "settlement.recorded", {})
+            await asyncio.sleep(0)
+
+            frames = []
+            while (frame := await slow.get(0.01)) is not None:
+                frames.append(parse(frame))
+        await broker.stop()
+        return frames, slow.dropped
+
+    frames, dropped = asyncio.run(scenario())
+
+    # Overflowed at 5 and at 8; the backlog never outgrows queue_size
+    assert frames[0]["event"] == "resync"
+    assert [f["id"] for f in frames[1:]] == ["8", "9", "10"]
+    assert dropped == 8
+    assert broker.stats()["resyncs_total"] == 2
+
+
+def test_stream_sends_ready_heartbeats_and_ends_on_stop():
+    broker = GroupEventBroker(MemoryBackend(), heartbeat=0.01)
+    group = uuid.uuid4()
+
+    async def scenario():
+        await broker.start()
+        stream = broker.stream(group)
+        ready = await anext(stream)
+        idle = await anext(stream)
+        broker.publish(group, 3, "expense.created", {})
+        event = await anext(stream)
+        await broker.stop()
+        rest = [frame async for frame in stream]
+        return ready, idle, event, rest
+
+    ready, idle, event, rest = asyncio.run(scenario())
+
+    assert parse(ready)["event"] == "ready"
+    assert idle == HEARTBEAT
+    assert parse(event)["id"] == "3"
+    assert rest == []
+
+
+def test_crud_writes_publish_after_commit(monkeypatch, db, users, make_group):
+    broker = GroupEventBroker(MemoryBackend())
+    monkeypatch.setattr(crud, "group_events", broker)
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+
+    async def scenario():
+        await broker.start()
+        with broker.subscribe(group) as subscription:
+            expense = crud.create_expense(db, schemas.ExpenseCreate(
+                group_id=group, title="Lunch", total_amount=Decimal("20"), paid_by=a,
+                splits=[{"user_id": a, "amount": Decimal("10")},
+                        {"user_id": b, "amount": Decimal("10")}]
+            ))
+            crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+                title="Dinner", total_amount=None, paid_by=None,
+                splits=[{"user_id": b, "amount": Decimal("20")}]
+            ))
+            crud.create_settlement(db, schemas.SettlementCreate(
+                group_id=group, from_user=b, to_user=a, amount=Decimal("10")
+            ))
+            await asyncio.sleep(0)
+
+            frames = []
+            while (frame := await subscription.get(0.01)) is not None:
+                frames.append(parse(frame))
+        await broker.stop()
+        return expense, frames
+
+    expense, frames = asyncio.run(scenario())
+
+    assert [(f["id"], f["event"]) for f in frames] == [
+        ("1", "expense.created"), ("1", "balances.changed"),
+        ("2", "expense.updated"), ("2", "balances.changed"),
+        ("3", "settlement.recorded"), ("3", "balances.changed"),
+    ]
+    assert frames[0]["data"]["expense_id"] == str(expense.id)
+    assert frames[2]["data"]["replaces"] == str(expense.id)
+    assert sorted(frames[5]["data"]["users"]) == sorted([str(a), str(b)])
+    assert crud.get_group_version(db, group) == 3
+
+
+def test_only_members_can_subscribe(monkeypatch, db, users, make_group):
+    monkeypatch.setattr(groups, "group_events", GroupEventBroker(MemoryBackend()))
+    a, b, outsider = users[:3]
+    group = make_group(a, members=[b])
+    db.query(models.GroupMember)\
+        .filter(models.GroupMember.group_id == group, models.GroupMember.user_id == b)\
+        .update({"is_active": False})
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(groups.router)
+    app.dependency_overrides[get_session] = lambda: db
+    client = TestClient(app)
+
+    def subscribe(user_id):
+        user = schemas.CurrentUser.model_validate(db.get(models.User, user_id))
+        app.dependency_overrides[get_current_user] = lambda: user
+        return client.get(f"/groups/{group}/events").status_code
+
+    # The broker isn't running, so a member gets as far as the 503
+    assert subscribe(a) == 503
+    assert subscribe(b) == 404
+    assert subscribe(outsider) == 404
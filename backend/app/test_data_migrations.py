@@ -0,0 +1,135 @@
+"""
+Data migrations that repair ledger rows written by older code: seed
+the bad rows at the revision before the fix, upgrade, and check the
+balances and sync stamps that come out.
+"""
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.money import Money
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """
+    migrate(revision) upgrades a fresh SQLite file to `revision` and
+    returns a session on it.
+    """
+    url = f"sqlite:///{tmp_path}/migrations.db"
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+
+    engine = create_engine(url)
+    sessions = []
+
+    def run(revision):
+        for session in sessions:
+            session.close()
+        command.upgrade(config, revision)
+        sessions.append(sessionmaker(bind=engine, autoflush=False)())
+        return sessions[-1]
+
+    yield run
+
+    for session in sessions:
+        session.close()
+    engine.dispose()
+
+
+def seed_users(db, count):
+    users = [
+        models.User(name=name, email=f"{name}@example.com", hashed_password="x")
+        for name in "abcdef"[:count]
+    ]
+    db.add_all(users)
+    db.commit()
+
+    group = crud.create_group(db, schemas.GroupCreate(name="Trip", base_currency="USD"), users[0].id)
+    return group.id, [user.id for user in users]
+
+
+def test_double_expense_reversals_are_dropped(migrate):
+    db = migrate("0007")
+    group, (a, b, c) = seed_users(db, 3)
+
+    expense = crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group, title="Dinner", total_amount=Decimal("30"), paid_by=a,
+        splits=[{"user_id": u, "amount": Decimal("10")} for u in (a, b, c)]
+    ))
+    crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+        title=None, total_amount=None, paid_by=None,
+        splits=[{"user_id": b, "amount": Decimal("30")}]
+    ))
+    crud.checkpoint_group_ledger(db, group)
+
+    # What the old edit also wrote: active reversals of the retired entries
+    for debtor in (b, c):
+        db.add(models.LedgerEntry(
+            group_id=group, from_user=a, to_user=debtor, amount=Decimal("10"), currency="USD",
+            reference_type=models.LedgerReferenceType.adjustment, reference_id=expense.id
+        ))
+    db.commit()
+    version = crud.get_group_version(db, group)
+
+    db = migrate("head")
+
+    expected = {a: Money.of(30), b: Money.of(-30), c: Money.of(0)}
+    assert {u: v for u, v in crud.get_group_balances(db, group).items() if v} == \
+        {u: v for u, v in expected.items() if v}
+    totals = crud.compute_group_balances(db, group)
+    assert {u: v for (_, u), v in totals.items() if v} == {u: v for u, v in expected.items() if v}
+
+    reversals = db.query(models.LedgerEntry).filter(
+        models.LedgerEntry.reference_type == models.LedgerReferenceType.adjustment
+    ).all()
+    assert {(r.is_active, r.change_version) for r in reversals} == {(False, version + 1)}
+    assert crud.get_group_version(db, group) == version + 1
+
+
+def test_settlement_entries_are_turned_around(migrate):
+    db = migrate("0008")
+    group, (a, b) = seed_users(db, 2)
+
+    crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group, title="Dinner", total_amount=Decimal("20"), paid_by=a,
+        splits=[{"user_id": u, "amount": Decimal("10")} for u in (a, b)]
+    ))
+    crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group, from_user=b, to_user=a, amount=Decimal("4")
+    ))
+    old = crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group, from_user=b, to_user=a, amount=Decimal("6")
+    )).id
+
+    # The second one as the old code recorded it: payer owes payee
+    db.query(models.LedgerEntry)\
+        .filter(models.LedgerEntry.reference_id == old)\
+        .update({"from_user": b, "to_user": a})
+    db.commit()
+    version = crud.get_group_version(db, group)
+
+    db = migrate("head")
+
+    assert set(crud.get_group_balances(db, group).values()) == {0}
+    assert set(crud.compute_group_balances(db, group).values()) == {0}
+
+    entries = {
+        e.reference_id: (e.from_user, e.to_user, e.change_version)
+        for e in db.query(models.LedgerEntry).filter(
+            models.LedgerEntry.reference_type == models.LedgerReferenceType.settlement
+        )
+    }
+    assert entries[old] == (a, b, version + 1)
+    assert len({(f, t) for f, t, _ in entries.values()}) == 1
@@ -0,0 +1,88 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.auth.dependencies import get_current_user
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.read_routing import get_read_db
+from app.routes import expenses
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(expenses.router)
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def seed(db, group_id, users, count, created_at=None):
+    crud.bulk_create_expenses(db, group_id, [
+        schemas.ExpenseImportRow(
+            title=f"Expense {i}", total_amount=Decimal("10") * len(users),
+            paid_by=users[i % len(users)], created_at=created_at,
+            splits=[{"user_id": u, "amount": Decimal("10")} for u in users]
+        )
+        for i in range(count)
+    ])
+
+
+def test_listing_loads_splits_in_one_query_whatever_the_page_size(
+    max_queries, db, users, client, make_group
+):
+    group = make_group(users[0], members=users[1:4])
+    seed(db, group, users[:4], 40)
+
+    with max_queries(2):
+        listed = crud.get_expenses_by_group(db, group)
+        assert sum(len(expense.splits) for expense in listed) == 160
+
+    with max_queries(2):
+        rows = crud.get_expense_rows_by_group(db, group)
+    assert sum(len(expense["splits"]) for expense in rows) == 160
+
+    # The endpoint adds only the group version lookup
+    with max_queries(3):
+        response = client.get(f"/expenses/group/{group}", params={"limit": 40})
+    assert len(response.json()) == 40
+
+
+def test_cursor_pages_cover_every_expense_once(db, users, client, make_group):
+    group = make_group(users[0], members=[users[1]])
+
+    # Ties on created_at are ordered by id
+    seed(db, group, users[:2], 7, created_at=datetime(2026, 1, 1))
+    seed(db, group, users[:2], 6)
+    expected = [expense.id for expense in crud.get_expenses_by_group(db, group)]
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/expenses/group/{group}", params=params)
+        assert response.status_code == 200
+        pages.append([expense["id"] for expense in response.json()])
+
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [4, 4, 4, 1]
+    assert [id for page in pages for id in page] == [str(id) for id in expected]
+
+    assert client.get(f"/expenses/group/{group}", params={"cursor": "x"}).status_code == 400
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 18, 9, 30, 15, 123456)
+    expense_id = uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, expense_id)) == (created_at, expense_id)
+
+    with pytest.raises(HTTPException):
+        decode_cursor("bm90IGEgY3Vyc29y")
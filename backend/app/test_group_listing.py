@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from app import crud, models, schemas
+from app.services.fx_rates import FxRates
+
+
+def all_pages(db, user_id, limit):
+    groups, after = [], None
+    while True:
+        page = crud.get_group_rows(db, user_id, limit + 1, after)
+        groups += page[:limit]
+        if len(page) <= limit:
+            return groups
+        after = (page[limit - 1]["created_at"], page[limit - 1]["id"])
+
+
+def test_lists_only_the_callers_groups_across_pages(db, users, make_group):
+    a, b, c = users[:3]
+
+    own = [make_group(a) for _ in range(5)]
+    shared = make_group(b, members=[a])
+    make_group(b)
+    left = make_group(c, members=[a])
+    db.query(models.GroupMember)\
+        .filter(models.GroupMember.group_id == left, models.GroupMember.user_id == a)\
+        .update({"is_active": False})
+    db.commit()
+
+    expected = [group.id for group in crud.get_groups(db, a)]
+    assert set(expected) == {*own, shared}
+
+    for limit in (1, 2, 3, 10):
+        assert [group["id"] for group in all_pages(db, a, limit)] == expected
+
+    assert [group["id"] for group in crud.get_group_rows(db, c)] == [left]
+
+
+def test_summary_matches_group_balances(db, users, make_group):
+    a, b, c = users[:3]
+    rates = FxRates(1, {"USD": Decimal("1"), "EUR": Decimal("0.9")})
+
+    group = make_group(a, members=[b, c])
+    for paid_by, amount, currency in ((a, "10.00", "USD"), (b, "1.00", "EUR"), (c, "0.01", "EUR")):
+        crud.create_expense(db, schemas.ExpenseCreate(
+            group_id=group, title="Lunch", total_amount=Decimal(amount) * 3,
+            paid_by=paid_by, currency=currency,
+            splits=[{"user_id": u, "amount": Decimal(amount)} for u in (a, b, c)]
+        ), rates)
+    empty = make_group(b, members=[a])
+
+    balances = crud.get_group_balances(db, group, rates)
+
+    for user in (a, b, c):
+        (row,) = [g for g in crud.get_group_rows(db, user, rates=rates) if g["id"] == group]
+        assert row["member_count"] == 3
+        assert row["balance"] == balances[user].amount
+
+    (row,) = [g for g in crud.get_group_rows(db, a, rates=rates) if g["id"] == empty]
+    assert row["member_count"] == 2
+    assert row["balance"] == 0
+
+
+def test_page_cost_does_not_grow_with_group_count(max_queries, db, users, make_group):
+    a, b, c = users[:3]
+    rates = FxRates(1, {"USD": Decimal("1"), "EUR": Decimal("0.9")})
+
+    for i in range(30):
+        group = make_group(a, members=[b], currency="EUR" if i % 2 else "USD")
+        crud.create_settlement(db, schemas.SettlementCreate(
+            group_id=group, from_user=a, to_user=b, amount=Decimal("4")
+        ))
+        make_group(c)
+
+    with max_queries(2):
+        page = crud.get_group_rows(db, a, 50, rates=rates)
+
+    assert len(page) == 30
+    assert all(group["member_count"] == 2 and group["balance"] > 0 for group in page)
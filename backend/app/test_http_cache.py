@@ -0,0 +1,65 @@
+from decimal import Decimal
+from uuid import uuid4
+
+from starlette.requests import Request
+
+from app import crud, schemas
+from app.http_cache import ResponseCache, etag_matches, group_etag
+
+
+def request_with(if_none_match):
+    return Request({
+        "type": "http",
+        "headers": [(b"if-none-match", if_none_match.encode())]
+    })
+
+
+def test_if_none_match_uses_weak_comparison():
+    group_id = uuid4()
+    etag = group_etag(group_id, 3)
+
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(f'"other", "{group_id.hex}-3"'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with(group_etag(group_id, 2)), etag)
+
+
+def test_every_write_bumps_the_group_version(db, users, make_group):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    other = make_group(a)
+    assert crud.get_group_version(db, group) == 0
+
+    splits = [{"user_id": a, "amount": Decimal("5")}, {"user_id": b, "amount": Decimal("5")}]
+    expense = crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group, title="Lunch", total_amount=Decimal("10"), paid_by=a, splits=splits
+    ))
+    crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+        title="Dinner", total_amount=None, paid_by=None, splits=splits
+    ))
+    crud.bulk_create_expenses(db, group, [schemas.ExpenseImportRow(
+        title="Taxi", total_amount=Decimal("10"), paid_by=b, splits=splits
+    )])
+    crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group, from_user=b, to_user=a, amount=Decimal("1")
+    ))
+
+    assert crud.get_group_version(db, group) == 4
+    assert crud.get_group_version(db, other) == 0
+    assert crud.get_group_version(db, uuid4()) is None
+
+
+def test_response_cache_is_keyed_by_version_and_bounded():
+    cache = ResponseCache(max_size=2)
+    group_id = uuid4()
+
+    cache.set(group_id, 1, "balances", b"{}")
+    assert cache.get(group_id, 1, "balances") == (b"{}", {})
+    assert cache.get(group_id, 2, "balances") is None
+
+    cache.set(group_id, 2, "balances", b"[]")
+    cache.set(group_id, 3, "balances", b"[]")
+    assert cache.get(group_id, 1, "balances") is None
+    assert cache.stats()["evictions_total"] == 1
+
+    assert ResponseCache(max_size=0).get(group_id, 1) is None
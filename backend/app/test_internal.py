@@ -0,0 +1,59 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db_metrics import PoolMetrics, instrument_engine, instrumented_pool_class
+from app.routes import internal
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=instrumented_pool_class(QueuePool, metrics),
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    instrument_engine(engine, metrics)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+        held = metrics.snapshot()
+        assert (held["pool_size"], held["checked_out"], held["checked_in"]) == (1, 1, 0)
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    with engine.connect():
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checked_out"] == 0
+    assert snapshot["connects_total"] == 1
+    assert (snapshot["checkouts_total"], snapshot["checkins_total"]) == (2, 2)
+    assert (snapshot["acquire_waits_total"], snapshot["acquire_timeouts_total"]) == (3, 1)
+    assert snapshot["acquire_wait_seconds_max"] >= 0.05
+
+    engine.dispose()
+    assert metrics.snapshot()["closes_total"] == 1
+
+
+def test_metrics_need_the_shared_token(monkeypatch):
+    app = FastAPI()
+    app.include_router(internal.router)
+    app.include_router(internal.metrics_router)
+    client = TestClient(app)
+
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", None)
+    assert client.get("/metrics", headers={"Authorization": "Bearer None"}).status_code == 401
+
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", "s3cret")
+    for path in ("/metrics", "/internal/db-pool", "/internal/email-queue"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+    pools = client.get("/internal/db-pool", headers={"Authorization": "Bearer s3cret"}).json()
+    assert "checkouts_total" in pools["primary"]
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from app import crud, models, schemas
+from app.money import Money
+
+
+def add_expense(db, group_id, paid_by, shares):
+    return crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group_id,
+        title="Dinner",
+        total_amount=sum(shares.values()),
+        paid_by=paid_by,
+        splits=[{"user_id": u, "amount": a} for u, a in shares.items()]
+    ))
+
+
+def nonzero(balances):
+    return {user_id: balance for user_id, balance in balances.items() if balance != 0}
+
+
+def ledger_fold(db, group_id):
+    # Every active entry, ignoring checkpoints
+    rows = crud._ledger_totals(db, models.LedgerEntry.group_id == group_id)
+    return nonzero({row.user_id: Money.of(row.balance) for row in rows})
+
+
+def test_checkpoint_plus_delta_matches_full_fold(db, users, make_group):
+    a, b, c = users[:3]
+    group = make_group(a, members=[b, c])
+
+    first = add_expense(db, group, a, {a: Decimal("10"), b: Decimal("10"), c: Decimal("10")})
+    add_expense(db, group, b, {a: Decimal("4"), b: Decimal("4")})
+
+    assert crud.compact_ledger(db, min_entries=100) == {}
+    assert crud.compact_ledger(db, min_entries=3) == {group: 3}
+
+    # Edit an expense that is already in the checkpoint, then add more
+    crud.update_expense(db, first.id, schemas.ExpenseUpdate(
+        title=None, total_amount=Decimal("20"), paid_by=None,
+        splits=[{"user_id": b, "amount": Decimal("20")}]
+    ))
+    add_expense(db, group, c, {a: Decimal("7"), c: Decimal("7")})
+
+    totals = crud.compute_group_balances(db, group)
+    computed = nonzero({user_id: balance for (_, user_id), balance in totals.items()})
+
+    assert computed == ledger_fold(db, group)
+    assert computed == nonzero(crud.get_group_balances(db, group))
+    assert sum(computed.values()) == 0
+
+    assert crud.checkpoint_group_ledger(db, group) > 0
+    assert crud.checkpoint_group_ledger(db, group) == 0
+    assert crud.compute_group_balances(db, group) == totals
+
+    version = crud.get_group_version(db, group)
+    assert crud.rebuild_group_balances(db, group) == 3
+    assert nonzero(crud.get_group_balances(db, group)) == computed
+    assert crud.get_group_version(db, group) == version + 1
@@ -0,0 +1,124 @@
+"""
+Property tests for the int-cents money core, over seeded random inputs:
+every set of balances the fairness engine or the ledger produces sums
+to exactly zero.
+"""
+import random
+from decimal import Decimal
+
+from app import crud, schemas
+from app.fairness.balances import calculate_balances
+from app.fairness.settlements import calculate_settlements, optimize_settlements
+from app.money import Money, allocate, round_to_cents, split_evenly
+from app.services.fx_rates import FxRates
+
+
+def test_conversions():
+    assert Money.of(Decimal("1.005")) == 101
+    assert Money.of("-2.5") == -250
+    assert Money.of(3) == 300
+    assert Money.of(0.1 + 0.2) == 30
+    assert Money(1230).amount == Decimal("12.30")
+    assert str(Money(-5)) == "-0.05"
+
+
+def test_allocate_is_exact_fair_and_deterministic():
+    rng = random.Random(11)
+
+    for _ in range(2000):
+        total = rng.randint(-1_000_000, 1_000_000)
+        weights = [rng.randint(0, 50) for _ in range(rng.randint(1, 12))]
+        weights[0] += 1
+
+        parts = allocate(total, weights)
+
+        assert sum(parts) == total
+        assert parts == allocate(total, weights)
+        for part, weight in zip(parts, weights):
+            assert abs(part * sum(weights) - total * weight) < sum(weights)
+
+    assert split_evenly(100, 3) == [34, 33, 33]
+
+
+def random_expenses(rng, users):
+    expenses = []
+    for _ in range(rng.randint(1, 40)):
+        total = rng.randint(1, 100_000)
+        sharing = rng.sample(users, rng.randint(1, len(users)))
+        parts = allocate(total, [rng.randint(1, 5) for _ in sharing])
+        expenses.append({
+            "paid_by": rng.choice(users),
+            "total_amount": Money(total).amount,
+            "splits": [
+                {"user_id": user, "amount": part.amount}
+                for user, part in zip(sharing, parts) if part
+            ]
+        })
+    return expenses
+
+
+def test_fairness_balances_and_settlements_are_exact():
+    rng = random.Random(3)
+
+    for _ in range(500):
+        users = [f"user{i}" for i in range(rng.randint(2, 10))]
+        balances = calculate_balances(random_expenses(rng, users))
+
+        assert sum(balances.values()) == 0
+
+        for settle in (calculate_settlements, optimize_settlements):
+            remaining = dict(balances)
+            for transfer in settle(balances):
+                remaining[transfer["from"]] += transfer["amount"]
+                remaining[transfer["to"]] -= transfer["amount"]
+            assert not any(remaining.values())
+
+
+def test_converted_balances_still_sum_to_zero():
+    rng = random.Random(5)
+    rates = FxRates(1, {"USD": Decimal("1"), "EUR": Decimal("0.9137"), "JPY": Decimal("151.37")})
+
+    for _ in range(500):
+        totals = {}
+        for currency in rng.sample(["USD", "EUR", "JPY"], rng.randint(1, 3)):
+            users = rng.randint(2, 8)
+            parts = [rng.randint(-100_000, 100_000) for _ in range(users - 1)]
+            parts.append(-sum(parts))
+            for user, cents in enumerate(parts):
+                totals["g", user, currency] = Money(cents)
+
+        converted = rates.convert_totals(totals, {"g": "USD"})
+        assert sum(converted.values()) == 0
+
+    exact = {i: Decimal(rng.randint(-10**6, 10**6)) / 7 for i in range(9)}
+    exact[9] = -sum(exact.values())
+    assert sum(round_to_cents(exact).values()) == 0
+
+
+def test_ledger_balances_sum_to_zero(db, users, make_group):
+    rng = random.Random(9)
+    rates = FxRates(1, {"USD": Decimal("1"), "EUR": Decimal("0.87"), "GBP": Decimal("0.79")})
+
+    for _ in range(5):
+        group = make_group(users[0], members=users[1:])
+        created = []
+        for expense in random_expenses(rng, users)[:15]:
+            created.append(crud.create_expense(db, schemas.ExpenseCreate(
+                group_id=group, title="x", currency=rng.choice(["USD", "EUR", "GBP"]),
+                **expense
+            ), rates))
+
+        for expense in rng.sample(created, len(created) // 3):
+            splits = random_expenses(rng, users)[0]["splits"]
+            crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+                title=None, total_amount=None, paid_by=None, splits=splits,
+                currency=rng.choice([None, "EUR"])
+            ), rates)
+
+        crud.create_settlement(db, schemas.SettlementCreate(
+            group_id=group, from_user=users[1], to_user=users[0],
+            amount=Decimal("12.34")
+        ))
+
+        assert sum(crud.get_group_balances(db, group, rates).values()) == 0
+        assert sum(crud.compute_group_balances(db, group, rates).values()) == 0
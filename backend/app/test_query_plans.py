@@ -0,0 +1,203 @@
+"""
+Query-plan regression check: run the per-group crud functions against
+a database built by the Alembic migrations, EXPLAIN every statement
+they issue, and fail if any reads a table with a sequential scan.
+
+Runs on a SQLite file by default. Set QUERY_PLAN_DATABASE_URL to an
+empty Postgres database to check Postgres plans as well.
+"""
+import os
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.database import Base
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TABLES = set(Base.metadata.tables)
+
+GROUPS = 5
+EXPENSES_PER_GROUP = 60
+
+
+def migrate(url):
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+def database_urls():
+    urls = [pytest.param("sqlite", id="sqlite")]
+    if os.getenv("QUERY_PLAN_DATABASE_URL"):
+        urls.append(pytest.param("postgresql", id="postgresql"))
+    return urls
+
+
+@pytest.fixture(params=database_urls())
+def engine(request, tmp_path):
+    if request.param == "sqlite":
+        url = f"sqlite:///{tmp_path}/plans.db"
+    else:
+        url = os.environ["QUERY_PLAN_DATABASE_URL"]
+
+    migrate(url)
+    engine = create_engine(url)
+    yield engine
+
+    if request.param != "sqlite":
+        Base.metadata.drop_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    engine.dispose()
+
+
+# -----------------------
+# Seeding
+# -----------------------
+
+def expense(group_id, paid_by, members, amount):
+    return schemas.ExpenseCreate(
+        group_id=group_id,
+        title="Seed",
+        total_amount=amount * len(members),
+        paid_by=paid_by,
+        splits=[{"user_id": m, "amount": amount} for m in members]
+    )
+
+
+def seed(db):
+    users = [
+        models.User(name=f"u{i}", email=f"u{i}@example.com", hashed_password="x")
+        for i in range(GROUPS * 4)
+    ]
+    db.add_all(users)
+    db.commit()
+
+    groups = []
+    for g in range(GROUPS):
+        members = [u.id for u in users[g * 4:(g + 1) * 4]]
+        group = crud.create_group(
+            db, schemas.GroupCreate(name=f"g{g}", base_currency="USD"), members[0]
+        )
+        rows = [
+            schemas.ExpenseImportRow(**expense(
+                group.id, members[i % 4], members, Decimal(i % 9 + 1)
+            ).model_dump(exclude={"group_id"}))
+            for i in range(EXPENSES_PER_GROUP)
+        ]
+        crud.bulk_create_expenses(db, group.id, rows)
+        groups.append((group.id, members))
+
+    return groups
+
+
+# -----------------------
+# Plan inspection
+# -----------------------
+
+def sequential_scans(connection, statement, parameters):
+    """
+    Tables the statement reads with a full scan, per the dialect's
+    EXPLAIN output.
+    """
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [
+            match.group(1)
+            for row in rows
+            if (match := re.match(r"SCAN (\w+)", row[-1])) and match.group(1) in TABLES
+        ]
+
+    # Postgres picks seq scans on small tables anyway, so only fail
+    # when it can't avoid one
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    try:
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return re.findall(r"Seq Scan on (\w+)", "\n".join(row[0] for row in rows))
+    finally:
+        connection.exec_driver_sql("RESET enable_seqscan")
+
+
+def run_hot_queries(db, groups):
+    group_id, members = groups[0]
+    since, _ = crud.get_changes(db, members[0], {})
+
+    created = crud.create_expense(db, expense(group_id, members[0], members, Decimal("5")))
+    crud.update_expense(db, created.id, schemas.ExpenseUpdate(
+        title="Edited", total_amount=Decimal("8"), paid_by=None,
+        splits=[{"user_id": members[1], "amount": Decimal("8")}]
+    ))
+    crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group_id, from_user=members[1], to_user=members[0], amount=Decimal("3")
+    ))
+
+    crud.get_group_balances(db, group_id)
+    crud.checkpoint_group_ledger(db, group_id)
+    crud.compute_group_balances(db, group_id)
+    crud.rebuild_group_balances(db, group_id)
+
+    page = crud.get_expenses_by_group(db, group_id, limit=20)
+    crud.get_expenses_by_group(db, group_id, limit=20, after=(page[-1].created_at, page[-1].id))
+    crud.get_expense_rows_by_group(db, group_id, limit=20, after=(page[-1].created_at, page[-1].id))
+
+    groups = crud.get_group_rows(db, members[0], limit=2)
+    crud.get_group_rows(db, members[0], limit=2, after=(groups[-1]["created_at"], groups[-1]["id"]))
+
+    crud.get_changes(db, members[0], since)
+    crud.settle_group(db, group_id)
+
+
+def test_hot_queries_use_indexes(engine):
+    db = sessionmaker(bind=engine, autoflush=False)()
+    groups = seed(db)
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith("INSERT"):
+            statements.append((statement, parameters))
+
+    run_hot_queries(db, groups)
+    db.close()
+    event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+
+    failures = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            scanned = sequential_scans(connection, statement, parameters)
+            if scanned:
+                failures.append(f"{', '.join(scanned)}: {' '.join(statement.split())}")
+
+    assert not failures, "Sequential scans:\n" + "\n".join(failures)
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path}/schema.db"
+    migrate(url)
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"compare_type": False})
+        diff = compare_metadata(context, Base.metadata)
+    engine.dispose()
+
+    assert diff == []
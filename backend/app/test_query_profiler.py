@@ -0,0 +1,108 @@
+import logging
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import lazyload
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, models, schemas
+from app.query_profiler import QueryProfilerMiddleware, normalize_statement, profile_queries
+
+
+pytest_plugins = ["pytester"]
+
+
+def seed_group(db, users, make_group, expenses=6):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    for _ in range(expenses):
+        crud.create_expense(db, schemas.ExpenseCreate(
+            group_id=group, title="Lunch", total_amount=Decimal("10"), paid_by=a,
+            splits=[{"user_id": a, "amount": Decimal("5")}, {"user_id": b, "amount": Decimal("5")}]
+        ))
+    return group
+
+
+def test_normalize_statement_ignores_literals_and_in_lists():
+    assert normalize_statement("SELECT * FROM t WHERE id IN (?, ?, ?) AND n = 'x''y'") == \
+        normalize_statement("SELECT *  FROM t\nWHERE id IN (?) AND n = 3")
+
+
+def test_per_row_loads_are_flagged_and_selectinload_is_not(db, users, make_group):
+    group_id = seed_group(db, users, make_group)
+    db.expunge_all()
+
+    with profile_queries(repeat_threshold=5) as profile:
+        expenses = db.scalars(
+            select(models.Expense)
+            .options(lazyload(models.Expense.splits))
+            .where(models.Expense.group_id == group_id)
+        ).all()
+        for expense in expenses:
+            expense.splits
+
+    [(shape, count)] = profile.repeated().items()
+    assert count == 6 and "expense_splits" in shape
+    assert "test_query_profiler.py" in profile.call_sites[shape]
+
+    db.expunge_all()
+    with profile_queries(repeat_threshold=5) as profile:
+        for expense in crud.get_expenses_by_group(db, group_id):
+            expense.splits
+
+    assert profile.count == 2
+    assert profile.repeated() == {}
+
+
+def test_middleware_logs_repeated_shapes(caplog):
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(QueryProfilerMiddleware, repeat_threshold=3)
+
+    def per_row():
+        with engine.connect() as connection:
+            for i in range(4):
+                connection.execute(text("SELECT :i"), {"i": i})
+
+    @app.get("/rows/{row_id}")
+    async def rows(row_id: int):
+        await run_in_threadpool(per_row)
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="app.query_profiler"):
+        TestClient(app).get("/rows/1")
+
+    assert "Probable N+1 in GET /rows/{row_id}: 4 x SELECT ?" in caplog.text
+
+
+def test_max_queries_plugin(pytester):
+    pytester.makeconftest('pytest_plugins = ["query_count_plugin"]')
+    pytester.makepyfile("""
+        import pytest
+        from sqlalchemy import create_engine, text
+
+        engine = create_engine("sqlite://")
+
+        def run(count):
+            with engine.connect() as connection:
+                for _ in range(count):
+                    connection.execute(text("SELECT 1"))
+
+        def test_fixture_within_budget(max_queries):
+            with max_queries(2):
+                run(2)
+
+        def test_fixture_over_budget(max_queries):
+            with max_queries(2):
+                run(3)
+
+        @pytest.mark.max_queries(1)
+        def test_marker_over_budget():
+            run(2)
+    """)
+
+    result = pytester.runpytest_inprocess()
+    result.assert_outcomes(passed=1, failed=2)
+    result.stdout.fnmatch_lines(["*Expected at most 2 queries, got 3 queries*", "*3 x SELECT ?*"])
@@ -0,0 +1,110 @@
+import asyncio
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, database, models, read_routing, schemas
+from app.read_routing import UNRESOLVED, RecentWrites, get_read_db, parse_lsn
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_replica(session_factory, tmp_path):
+    """
+    A replica SQLite file of the test database; replicate() copies
+    the primary over it, standing in for WAL replay.
+    """
+    primary = session_factory.kw["bind"].url.database
+    replica = tmp_path / "replica.db"
+
+    def replicate():
+        with sqlite3.connect(primary) as source, sqlite3.connect(replica) as target:
+            source.backup(target)
+
+    replicate()
+    Replica = sessionmaker(bind=create_engine(f"sqlite:///{replica}"), autoflush=False)
+    return Replica, replicate
+
+
+def read_groups(user, primary):
+    """
+    The caller's groups as a GET route reads them, through get_read_db.
+    """
+    async def scenario():
+        dependency = get_read_db(current_user=user, primary=primary)
+        db = await anext(dependency)
+        try:
+            return db is primary, [g.id for g in crud.get_groups(db, user.id)]
+        finally:
+            await dependency.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_writer_reads_own_writes_until_the_window_ends(db, session_factory, users, tmp_path,
+                                                      monkeypatch):
+    Primary = session_factory
+    Replica, replicate = make_replica(Primary, tmp_path)
+    a, b = (schemas.CurrentUser.model_validate(db.get(models.User, u)) for u in users[:2])
+
+    clock = Clock()
+    writes = RecentWrites(window=5, max_users=10, clock=clock)
+    writes.track(Primary)
+    monkeypatch.setattr(database, "ReadSessionLocal", Replica)
+    monkeypatch.setattr(read_routing, "recent_writes", writes)
+
+    primary = Primary()
+    primary.info["user_id"] = a.id
+    group = crud.create_group(primary, schemas.GroupCreate(name="Trip", base_currency="USD"), a.id)
+
+    # The replica hasn't replayed the write yet
+    assert read_groups(a, primary) == (True, [group.id])
+    assert read_groups(b, Primary()) == (False, [])
+
+    clock.now = 5
+    assert read_groups(a, primary) == (False, [])
+
+    replicate()
+    assert read_groups(a, primary) == (False, [group.id])
+
+    assert writes.stats()["writes_total"] == 1
+    assert writes.stats()["primary_reads_total"] == 1
+    assert writes.stats()["replica_reads_total"] == 3
+
+
+def test_replica_catching_up_ends_the_pin_early():
+    writes = RecentWrites(window=5, max_users=2, clock=Clock())
+    a, b, c = "a", "b", "c"
+
+    assert parse_lsn("16/B374D848") == 0x16B374D848
+    writes.mark(a, parse_lsn("0/16B3748"))
+
+    assert not writes.use_replica(a, parse_lsn("0/16B3700"))
+    assert not writes.use_replica(a, None)
+    assert writes.use_replica(a, parse_lsn("0/16B3748"))
+    assert writes.pinned(a) is None
+
+    # A Postgres write pins before its WAL position is read
+    writes.mark(a, UNRESOLVED)
+    assert writes.pinned(a) == UNRESOLVED
+    assert not writes.use_replica(a, parse_lsn("F/0"))
+    assert writes.resolve(a, parse_lsn("0/20")) == 0x20
+    assert writes.resolve(a, parse_lsn("0/30")) == 0x20
+    assert writes.use_replica(a, parse_lsn("0/20"))
+
+    # Without a WAL position only the window ends the pin
+    writes.mark(b)
+    assert writes.pinned(b) == 0
+    assert not writes.use_replica(b, parse_lsn("F/0"))
+
+    # Bounded: the oldest pin goes first
+    writes.mark(a, 1)
+    writes.mark(c, 1)
+    assert writes.pinned(b) is None and writes.stats()["pinned_users"] == 2
@@ -0,0 +1,70 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+
+from app.request_metrics import RequestMetrics, RequestMetricsMiddleware
+
+
+def make_app(metrics):
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+
+    def three_queries():
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        await run_in_threadpool(three_queries)
+        return {"id": item_id}
+
+    @app.get("/items/{item_id}/events")
+    async def item_events(item_id: int):
+        async def events():
+            yield "data: ready\n\n"
+            assert metrics.in_flight == 0
+            await asyncio.sleep(0.03)
+            yield "data: changed\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def test_queries_and_status_are_attributed_to_the_route_template():
+    metrics = RequestMetrics()
+    client = TestClient(make_app(metrics))
+
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/items/x").status_code == 422
+    assert client.get("/nope").status_code == 404
+
+    key = ("GET", "/items/{item_id}")
+    assert metrics.latency[key].count == 3
+    assert metrics.queries[key].sum == 6
+    assert metrics.responses[("GET", "/items/{item_id}", 422)] == 1
+    assert metrics.responses[("GET", "unmatched", 404)] == 1
+    assert metrics.in_flight == 0
+
+    rendered = "\n".join(metrics.render())
+    assert 'payshare_http_request_db_queries_bucket{method="GET",route="/items/{item_id}",le="2"} 1' in rendered
+    assert 'payshare_http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 3' in rendered
+
+
+def test_streams_are_counted_but_kept_out_of_latency_and_in_flight():
+    metrics = RequestMetrics()
+    client = TestClient(make_app(metrics))
+
+    response = client.get("/items/1/events")
+    assert response.text == "data: ready\n\ndata: changed\n\n"
+
+    assert metrics.responses == {("GET", "/items/{item_id}/events", 200): 1}
+    assert metrics.latency == {}
+    assert metrics.in_flight == 0
@@ -0,0 +1,70 @@
+import json
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app import crud, schemas
+from app.auth.dependencies import get_current_user
+from app.database import get_session
+from app.read_routing import get_read_db
+from app.responses import dumps
+from app.routes import expenses
+
+
+def by_split_user(expenses):
+    for expense in expenses:
+        expense["splits"].sort(key=lambda split: split["user_id"])
+    return expenses
+
+
+def test_row_path_matches_response_model_output(db, users, make_group):
+    a, b = users[:2]
+    group = make_group(a)
+
+    for amount in ("10.50", "3.25", "7"):
+        crud.create_expense(db, schemas.ExpenseCreate(
+            group_id=group, title="Lunch", total_amount=Decimal(amount) * 2, paid_by=a,
+            splits=[{"user_id": a, "amount": Decimal(amount)},
+                    {"user_id": b, "amount": Decimal(amount)}]
+        ))
+
+    first = crud.get_expenses_by_group(db, group, limit=2)
+    after = (first[-1].created_at, first[-1].id)
+
+    for kwargs in ({}, {"limit": 2}, {"limit": 2, "after": after}):
+        expected = TypeAdapter(list[schemas.ExpenseOut]).dump_python(
+            crud.get_expenses_by_group(db, group, **kwargs), mode="json"
+        )
+        rows = crud.get_expense_rows_by_group(db, group, **kwargs)
+        assert by_split_user(json.loads(dumps(rows))) == by_split_user(expected)
+
+    groups = TypeAdapter(list[schemas.GroupSummaryOut]).validate_python([
+        {**schemas.GroupOut.model_validate(g).model_dump(), "member_count": 1, "balance": Decimal("20.75")}
+        for g in crud.get_groups(db, a)
+    ])
+    expected = TypeAdapter(list[schemas.GroupSummaryOut]).dump_python(groups, mode="json")
+    assert json.loads(dumps(crud.get_group_rows(db, a))) == expected
+
+
+def test_money_is_a_json_number(db, users, make_group):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+
+    app = FastAPI()
+    app.include_router(expenses.router)
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: None
+    client = TestClient(app)
+
+    created = client.post("/expenses/", json={
+        "group_id": str(group), "title": "Dinner", "total_amount": "30.50", "paid_by": str(a),
+        "splits": [{"user_id": str(a), "amount": "15.25"}, {"user_id": str(b), "amount": "15.25"}]
+    }).json()
+    listed = client.get(f"/expenses/group/{group}").json()
+
+    for expense in (created, listed[0]):
+        assert expense["total_amount"] == 30.5
+        assert [split["amount"] for split in expense["splits"]] == [15.25, 15.25]
@@ -0,0 +1,116 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.auth.dependencies import get_current_user
+from app.database import get_session
+from app.read_routing import get_read_db
+from app.routes import groups
+from app.services.fx_rates import FxRates
+
+
+@pytest.fixture
+def group(users, make_group):
+    a, b, c, d = users[:4]
+    return make_group(a, members=[b, c, d])
+
+
+def add_expense(db, group_id, paid_by, users, amount, currency=None, rates=None):
+    crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group_id, title="Lunch", total_amount=Decimal(amount) * len(users),
+        paid_by=paid_by, currency=currency,
+        splits=[{"user_id": u, "amount": Decimal(amount)} for u in users]
+    ), rates)
+
+
+def test_records_the_reviewed_plan_in_one_version(db, users, group):
+    a, b, c, d = users[:4]
+    add_expense(db, group, a, [a, b, c, d], "12.50")
+    add_expense(db, group, b, [c, d], "7.25")
+
+    version, _, transfers = crud.get_settlement_plan(db, group)
+    settled_version, settlements, balances = crud.settle_group(db, group, version)
+
+    assert settled_version == version + 1
+    assert [(s["from_user"], s["to_user"], s["amount"]) for s in settlements] == [
+        (t["from"], t["to"], t["amount"].amount) for t in transfers
+    ]
+    assert set(balances.values()) == {0}
+    assert crud.get_group_balances(db, group) == balances
+
+    # Every row of the batch is one change, backed by its ledger entry
+    assert {s.change_version for s in db.query(models.Settlement)} == {settled_version}
+    entries = db.query(models.LedgerEntry)\
+        .filter(models.LedgerEntry.reference_type == models.LedgerReferenceType.settlement)\
+        .all()
+    assert {e.reference_id for e in entries} == {s["id"] for s in settlements}
+
+    # Nothing left to settle: no write, no new version
+    assert crud.settle_group(db, group) == (settled_version, [], balances)
+
+
+def test_changed_balances_abort_the_batch(db, users, group):
+    a, b, c, d = users[:4]
+    add_expense(db, group, a, [a, b], "10")
+
+    version, _, _ = crud.get_settlement_plan(db, group)
+    add_expense(db, group, c, [c, d], "4")
+
+    with pytest.raises(crud.GroupVersionConflict):
+        crud.settle_group(db, group, version)
+
+    assert db.query(models.Settlement).count() == 0
+    assert crud.get_group_version(db, group) == version + 1
+    assert crud.settle_group(db, uuid.uuid4()) is None
+
+
+def test_converted_balances_settle_to_within_a_cent(db, users, group):
+    a, b, c, d = users[:4]
+    rates = FxRates(1, {"USD": Decimal("1"), "EUR": Decimal("0.87")})
+    add_expense(db, group, a, [a, b, c], "3.33", "EUR", rates)
+    add_expense(db, group, b, [b, c, d], "1.01")
+
+    _, _, balances = crud.settle_group(db, group, rates=rates)
+
+    assert sum(balances.values()) == 0
+    assert all(abs(balance) <= 1 for balance in balances.values())
+
+
+def test_a_payment_cancels_the_payers_debt(db, users, group):
+    a, b, c, d = users[:4]
+    add_expense(db, group, a, [a, b], "10")
+
+    crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group, from_user=b, to_user=a, amount=Decimal("10")
+    ))
+
+    assert set(crud.get_group_balances(db, group).values()) == {0}
+    assert set(crud.compute_group_balances(db, group).values()) == {0}
+
+
+def test_outsiders_get_a_404(db, users, group):
+    a, b, outsider = users[0], users[1], users[4]
+    add_expense(db, group, a, [a, b], "10")
+
+    app = FastAPI()
+    app.include_router(groups.router)
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    client = TestClient(app)
+
+    def as_user(user_id):
+        user = schemas.CurrentUser.model_validate(db.get(models.User, user_id))
+        app.dependency_overrides[get_current_user] = lambda: user
+
+    as_user(outsider)
+    assert client.get(f"/groups/{group}/settlement-plan").status_code == 404
+    assert client.post(f"/groups/{group}/settle-up").status_code == 404
+    assert db.query(models.Settlement).count() == 0
+
+    as_user(b)
+    plan = client.get(f"/groups/{group}/settlement-plan").json()
+    assert plan["transfers"] == [{"from_user": str(b), "to_user": str(a), "amount": 10.0}]
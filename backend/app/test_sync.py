@@ -0,0 +1,162 @@
+import base64
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app import crud, models, schemas
+from app.pagination import decode_sync_cursor, encode_sync_cursor
+
+
+def add_expense(db, group_id, paid_by, users, amount="10"):
+    return crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=group_id, title="Lunch", total_amount=Decimal(amount) * len(users),
+        paid_by=paid_by, splits=[{"user_id": u, "amount": Decimal(amount)} for u in users]
+    ))
+
+
+class Replica:
+    """
+    A client's copy of the synced tables, built only from deltas.
+    """
+
+    TABLES = ("expenses", "splits", "settlements", "ledger_entries")
+
+    def __init__(self):
+        self.cursor = {}
+        self.rows = {table: {} for table in self.TABLES}
+
+    def sync(self, db, user_id):
+        versions, changes = crud.get_changes(db, user_id, self.cursor)
+        self.cursor = versions
+
+        for table in self.TABLES:
+            for row in changes[table]:
+                if row.get("is_active", True):
+                    self.rows[table][row["id"]] = row
+                else:
+                    self.rows[table].pop(row["id"], None)
+
+        removed = set(changes["removed_groups"])
+        for table in ("expenses", "settlements", "ledger_entries"):
+            self.rows[table] = {
+                id: row for id, row in self.rows[table].items() if row["group_id"] not in removed
+            }
+        self.rows["splits"] = {
+            id: row for id, row in self.rows["splits"].items()
+            if row["expense_id"] in self.rows["expenses"]
+        }
+        return changes
+
+
+def snapshot(db, user_id):
+    replica = Replica()
+    replica.sync(db, user_id)
+    return replica.rows
+
+
+def test_deltas_rebuild_the_same_state_as_a_full_sync(db, users, make_group):
+    a, b, c = users[:3]
+    group = make_group(a, members=[b])
+    other = make_group(b, members=[c])
+
+    expense = add_expense(db, group, a, [a, b])
+    add_expense(db, other, b, [b, c])
+
+    replica = Replica()
+    first = replica.sync(db, a)
+    assert [e["id"] for e in first["expenses"]] == [expense.id]
+    assert len(first["splits"]) == 2
+
+    edited = crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+        title="Dinner", total_amount=None, paid_by=None,
+        splits=[{"user_id": b, "amount": Decimal("20")}]
+    ))
+    crud.create_settlement(db, schemas.SettlementCreate(
+        group_id=group, from_user=b, to_user=a, amount=Decimal("5")
+    ))
+
+    delta = replica.sync(db, a)
+    version = crud.get_group_version(db, group)
+    assert {(e["id"], e["is_active"]) for e in delta["expenses"]} == {
+        (expense.id, False), (edited.id, True)
+    }
+    assert [s["expense_id"] for s in delta["splits"]] == [edited.id]
+    # Retired entries, the new entry and the settlement's
+    assert len(delta["ledger_entries"]) == 3
+    assert all(row["change_version"] > 1 for row in delta["ledger_entries"])
+    assert replica.cursor == {group: version}
+
+    # Joining a group brings in its snapshot; leaving it removes it
+    db.add(models.GroupMember(group_id=other, user_id=a))
+    db.commit()
+    joined = replica.sync(db, a)
+    assert [e["group_id"] for e in joined["expenses"]] == [other]
+    assert replica.rows == snapshot(db, a)
+
+    db.query(models.GroupMember)\
+        .filter(models.GroupMember.group_id == other, models.GroupMember.user_id == a)\
+        .update({"is_active": False})
+    db.commit()
+    assert replica.sync(db, a)["removed_groups"] == [other]
+    assert replica.rows == snapshot(db, a)
+
+
+def test_write_during_a_sync_is_left_for_the_next_one(db, session_factory, users, make_group):
+    a, b = users[:2]
+    group = make_group(a, members=[b])
+    add_expense(db, group, a, [a, b])
+
+    replica = Replica()
+    replica.sync(db, a)
+    before = add_expense(db, group, a, [a, b], "3")
+
+    writer = session_factory()
+    landed = []
+
+    # Commit a write after the versions are read, before the rows are
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def interleave(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT expenses.id") and not landed:
+            landed.append(None)  # the writer's own reads pass through
+            landed[0] = add_expense(writer, group, b, [a, b], "7").id
+
+    delta = replica.sync(db, a)
+    event.remove(db.get_bind(), "before_cursor_execute", interleave)
+
+    assert landed
+    assert [e["id"] for e in delta["expenses"]] == [before.id]
+    assert {row["reference_id"] for row in delta["ledger_entries"]} == {before.id}
+
+    delta = replica.sync(db, a)
+    assert [e["id"] for e in delta["expenses"]] == landed
+    assert replica.rows == snapshot(db, a)
+
+
+def test_unchanged_cursor_costs_one_query(max_queries, db, users, make_group):
+    a, b, c = users[:3]
+    for _ in range(5):
+        add_expense(db, make_group(a, members=[b]), a, [a, b])
+
+    versions, _ = crud.get_changes(db, a, {})
+
+    with max_queries(1):
+        _, changes = crud.get_changes(db, a, versions)
+
+    assert not any(changes.values())
+
+
+def test_cursor_round_trip(db, users, make_group):
+    a, b, c = users[:3]
+    versions = {make_group(a): 3, make_group(a): 0}
+
+    assert decode_sync_cursor(encode_sync_cursor(versions)) == versions
+    assert decode_sync_cursor(encode_sync_cursor({})) == {}
+
+    valid = encode_sync_cursor(versions)
+    group = next(iter(versions))
+    for garbage in ("not a cursor", "!!!", valid + "!", encode_sync_cursor({group: -1}),
+                    base64.urlsafe_b64encode(b"lunch:3").decode()):
+        with pytest.raises(HTTPException):
+            decode_sync_cursor(garbage)
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+
+from app import crud, models, schemas
+from app.money import Money
+
+
+@pytest.fixture
+def expense(db, users, make_group):
+    a, b, c = users[:3]
+    return crud.create_expense(db, schemas.ExpenseCreate(
+        group_id=make_group(a, members=[b, c]), title="Dinner", total_amount=Decimal("30"),
+        paid_by=a, splits=[{"user_id": u, "amount": Decimal("10")} for u in (a, b, c)]
+    ))
+
+
+def edit(version, splits):
+    return schemas.ExpenseUpdate(
+        title=None, total_amount=None, paid_by=None, splits=splits, version=version
+    )
+
+
+def balances(db, group_id):
+    stored = crud.get_group_balances(db, group_id)
+    folded = {
+        row.user_id: Money.of(row.balance)
+        for row in crud._ledger_totals(db, models.LedgerEntry.group_id == group_id)
+    }
+    assert {u: v for u, v in stored.items() if v} == {u: v for u, v in folded.items() if v}
+    return stored
+
+
+def test_edit_replaces_the_old_entries(db, users, expense):
+    a, b, c = users[:3]
+    assert balances(db, expense.group_id) == {a: Money.of(20), b: Money.of(-10), c: Money.of(-10)}
+
+    updated = crud.update_expense(db, expense.id, edit(
+        1, [{"user_id": b, "amount": Decimal("30")}]
+    ))
+
+    assert updated.version == 2
+    assert [s.user_id for s in updated.splits] == [b]
+    assert balances(db, expense.group_id) == {a: Money.of(30), b: Money.of(-30), c: Money.of(0)}
+
+    active = db.query(models.LedgerEntry).filter(models.LedgerEntry.is_active == True).all()
+    assert [(e.from_user, e.to_user, e.reference_id) for e in active] == [(b, a, updated.id)]
+
+
+def test_title_only_edit_keeps_splits_and_balances(db, users, expense):
+    a, b, c = users[:3]
+
+    updated = crud.update_expense(db, expense.id, schemas.ExpenseUpdate(
+        title="Late dinner", total_amount=None, paid_by=None, splits=None
+    ))
+
+    assert (updated.title, updated.total_amount, updated.paid_by) == ("Late dinner", 30, a)
+    assert sorted((s.user_id, s.amount) for s in updated.splits) == \
+        sorted((u, Decimal("10")) for u in (a, b, c))
+    assert balances(db, expense.group_id) == {a: Money.of(20), b: Money.of(-10), c: Money.of(-10)}
+
+
+def test_stale_edit_conflicts(db, users, expense):
+    a, b, c = users[:3]
+    splits = [{"user_id": c, "amount": Decimal("30")}]
+
+    with pytest.raises(crud.ExpenseVersionConflict):
+        crud.update_expense(db, expense.id, edit(7, splits))
+
+    crud.update_expense(db, expense.id, edit(None, splits))
+
+    # The first edit retired this version, a second one must not reverse it again
+    with pytest.raises(crud.ExpenseVersionConflict):
+        crud.update_expense(db, expense.id, edit(None, splits))
+
+    assert db.query(models.LedgerEntry).filter(
+        models.LedgerEntry.is_active == True
+    ).count() == 1
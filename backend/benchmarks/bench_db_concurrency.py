@@ -0,0 +1,158 @@
+"""
+Load test the API in DB_MODE=sync and DB_MODE=async against a local
+SQLite file (aiosqlite in async mode).
+
+Run from backend/:
+    python -m benchmarks.bench_db_concurrency
+
+Each mode runs in its own process because DB_MODE is read at import.
+SQLite answers in microseconds, so every statement also waits
+DB_LATENCY_MS to stand in for a network round trip to Postgres: a
+blocking sleep in sync mode, a non-blocking one in async mode.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CONCURRENCY = (10, 40, 100, 200)
+REQUESTS_PER_LEVEL = 500
+EXPENSES = 50
+DB_LATENCY_MS = 5
+
+
+def seed(members=5):
+    from decimal import Decimal
+    from app import crud, models, schemas
+    from app.database import SessionLocal
+    from app.auth.security import create_access_token
+
+    db = SessionLocal()
+    users = []
+    for i in range(members):
+        user = models.User(name=f"user{i}", email=f"user{i}@example.com", hashed_password="x")
+        db.add(user)
+        users.append(user)
+    db.commit()
+
+    group = crud.create_group(db, schemas.GroupCreate(name="bench", base_currency="USD"), users[0].id)
+
+    for i in range(EXPENSES):
+        crud.create_expense(db, schemas.ExpenseCreate(
+            group_id=group.id,
+            title=f"expense{i}",
+            total_amount=Decimal(members * 10),
+            paid_by=users[i % members].id,
+            splits=[{"user_id": u.id, "amount": Decimal(10)} for u in users]
+        ))
+
+    token = create_access_token({"sub": str(users[0].id)})
+    group_id = str(group.id)
+    db.close()
+    return token, group_id
+
+
+def add_db_latency(seconds):
+    from sqlalchemy import event
+    from app import database
+
+    if database.DB_MODE == "async":
+        from sqlalchemy.util import await_only
+
+        target = database.async_engine.sync_engine
+
+        def wait(*args):
+            await_only(asyncio.sleep(seconds))
+    else:
+        target = database.engine
+
+        def wait(*args):
+            time.sleep(seconds)
+
+    event.listen(target, "before_cursor_execute", wait)
+
+
+async def run_level(client, paths, headers, concurrency):
+    latencies = []
+    errors = 0
+    queue = iter(range(REQUESTS_PER_LEVEL))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.get(paths[i % len(paths)], headers=headers)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": round(REQUESTS_PER_LEVEL / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "errors": errors,
+    }
+
+
+async def run_worker():
+    import httpx
+    from app.main import app
+
+    token, group_id = seed()
+    add_db_latency(DB_LATENCY_MS / 1000)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    paths = [f"/groups/{group_id}/balances", f"/expenses/group/{group_id}?limit=10"]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in CONCURRENCY:
+            result = await run_level(client, paths, headers, concurrency)
+            result["mode"] = os.environ["DB_MODE"]
+            print(json.dumps(result), flush=True)
+
+
+def run_benchmark():
+    print(f"{'mode':<7}{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DB_MODE=mode,
+                DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+                DB_CREATE_ALL="true",
+            )
+            env.setdefault("SECRET_KEY", "bench")
+            env.setdefault("ALGORITHM", "HS256")
+            env.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_db_concurrency", "--worker"],
+                env=env, check=True, capture_output=True, text=True
+            ).stdout
+
+        for line in output.splitlines():
+            r = json.loads(line)
+            print(f"{r['mode']:<7}{r['concurrency']:>12}{r['rps']:>10}"
+                  f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        asyncio.run(run_worker())
+    else:
+        run_benchmark()
@@ -0,0 +1,278 @@
+"""
+Load test the group event streams: thousands of idle SSE subscribers
+against one uvicorn worker on a local SQLite file.
+
+Run from backend/:
+    python -m benchmarks.bench_group_events
+    python -m benchmarks.bench_group_events --subscribers 10000 --groups 100 --slow 200
+
+Reports, for the worker process:
+- connect time and resident memory per open stream
+- latency of an ordinary request while every stream sits idle
+- fan-out latency from a POST /expenses/ response to the last of
+  that group's subscribers receiving the event
+- the same after a burst of writes with --slow clients on the group
+  that never read: nobody else waits on them. On loopback the kernel
+  buffers megabytes per socket before a stalled stream's broker queue
+  fills and turns into a resync, so resyncs_total may well stay 0;
+  test_group_events covers that path.
+
+Subscribers are raw sockets rather than HTTP client objects, so the
+load generator stays cheap next to the server.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEARTBEAT_SECONDS = 5
+
+
+def seed(groups: int):
+    from app import crud, models, schemas
+    from app.auth.security import create_access_token
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+
+    users = [
+        models.User(name=f"user{i}", email=f"user{i}@example.com", hashed_password="x")
+        for i in range(2)
+    ]
+    db.add_all(users)
+    db.commit()
+
+    group_ids = [
+        str(crud.create_group(
+            db, schemas.GroupCreate(name=f"bench{i}", base_currency="USD"), users[0].id
+        ).id)
+        for i in range(groups)
+    ]
+
+    token = create_access_token({"sub": str(users[0].id)})
+    user_ids = [str(user.id) for user in users]
+    db.close()
+    return token, group_ids, user_ids
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+# -----------------------
+# Subscribers
+# -----------------------
+
+class Subscriber:
+    def __init__(self, port, token, group_id, read=True):
+        self.port = port
+        self.token = token
+        self.group_id = group_id
+        self.read = read
+        self.writer = None
+        self.waiting = {}
+
+    async def connect(self):
+        sock = socket.socket()
+        if not self.read:
+            # A small window, so the server's writes back up after a few events
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", self.port))
+
+        reader, self.writer = await asyncio.open_connection(sock=sock)
+        self.writer.write(
+            f"GET /groups/{self.group_id}/events HTTP/1.1\r\n"
+            f"Host: bench\r\nAccept: text/event-stream\r\n"
+            f"Authorization: Bearer {self.token}\r\n\r\n".encode()
+        )
+        head = await reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(head.decode(errors="replace"))
+
+        if self.read:
+            return asyncio.create_task(self._read(reader))
+
+        self.writer.transport.pause_reading()
+
+    async def _read(self, reader):
+        tail = b""
+        while chunk := await reader.read(65536):
+            data = tail + chunk
+            for marker, future in list(self.waiting.items()):
+                if marker in data and not future.done():
+                    future.set_result(time.perf_counter())
+            tail = data[-256:]
+
+    def expect(self, marker: bytes):
+        future = asyncio.get_running_loop().create_future()
+        self.waiting = {marker: future}
+        return future
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def timed_get(client, path, headers, count=50):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples) * 1000, samples[int(count * 0.99) - 1] * 1000
+
+
+async def fan_out(client, headers, subscribers, group_id, user_ids, title):
+    """
+    Milliseconds from sending the POST to its response, and to each
+    subscriber seeing the event (published right after the commit, so
+    usually before the response).
+    """
+    futures = [s.expect(b"expense.created") for s in subscribers if s.read]
+
+    start = time.perf_counter()
+    response = await client.post("/expenses/", headers=headers, json={
+        "group_id": group_id, "title": title, "total_amount": "20", "paid_by": user_ids[0],
+        "splits": [{"user_id": u, "amount": "10"} for u in user_ids]
+    })
+    response.raise_for_status()
+    responded = time.perf_counter()
+
+    arrivals = await asyncio.wait_for(asyncio.gather(*futures), 60)
+    delays = sorted((t - start) * 1000 for t in arrivals)
+    return len(delays), (responded - start) * 1000, statistics.median(delays), delays[-1]
+
+
+async def run(args, port, pid, token, group_ids, user_ids):
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    base_rss = rss_kb(pid)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        # Also warms the user cache, as a running server's would be
+        quiet = await timed_get(client, f"/groups/{group_ids[0]}/balances", headers)
+
+        subscribers = [
+            Subscriber(port, token, group_ids[i % len(group_ids)])
+            for i in range(args.subscribers)
+        ]
+        start = time.perf_counter()
+        readers = []
+        for batch in range(0, len(subscribers), 500):
+            readers += await asyncio.gather(*(s.connect() for s in subscribers[batch:batch + 500]))
+        connect_seconds = time.perf_counter() - start
+
+        print(f"connected {args.subscribers} streams in {connect_seconds:.1f} s", flush=True)
+        await asyncio.sleep(HEARTBEAT_SECONDS + 1)
+        idle_rss = rss_kb(pid)
+        busy = await timed_get(client, f"/groups/{group_ids[0]}/balances", headers)
+
+        hot = [s for s in subscribers if s.group_id == group_ids[0]]
+        await fan_out(client, headers, hot, group_ids[0], user_ids, "warm-up")
+        plain = await fan_out(client, headers, hot, group_ids[0], user_ids, "fan-out")
+
+        slow = [Subscriber(port, token, group_ids[0], read=False) for _ in range(args.slow)]
+        for s in slow:
+            await s.connect()
+        burst = iter(range(args.burst))
+
+        async def writer():
+            for i in burst:
+                await client.post("/expenses/", headers=headers, json={
+                    "group_id": group_ids[0], "title": f"burst{i}", "total_amount": "20",
+                    "paid_by": user_ids[0],
+                    "splits": [{"user_id": u, "amount": "10"} for u in user_ids]
+                })
+
+        await asyncio.gather(*(writer() for _ in range(10)))
+        with_slow = await fan_out(client, headers, hot, group_ids[0], user_ids, "after-burst")
+        stats = (await client.get("/internal/group-events")).json()
+
+        for s in subscribers + slow:
+            s.close()
+        for task in readers:
+            if task is not None:
+                task.cancel()
+
+    per_stream = (idle_rss - base_rss) / args.subscribers
+    print(f"streams                {args.subscribers} over {len(group_ids)} groups")
+    print(f"connect                {connect_seconds:.2f} s "
+          f"({args.subscribers / connect_seconds:,.0f} streams/s)")
+    print(f"worker memory          {base_rss / 1024:.1f} MB -> {idle_rss / 1024:.1f} MB "
+          f"({per_stream:.1f} KB per stream)")
+    print(f"GET balances p50/p99   {quiet[0]:.2f}/{quiet[1]:.2f} ms idle server, "
+          f"{busy[0]:.2f}/{busy[1]:.2f} ms with streams open")
+    print(f"fan-out to {plain[0]:<12}POST {plain[1]:.2f} ms, event p50 {plain[2]:.2f} ms, "
+          f"last {plain[3]:.2f} ms")
+    print(f"  + {args.slow:<4} stalled     POST {with_slow[1]:.2f} ms, event p50 {with_slow[2]:.2f} ms, "
+          f"last {with_slow[3]:.2f} ms, after a {args.burst}-event burst")
+    print(f"broker                 {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_group_events")
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--slow", type=int, default=50, help="Stalled subscribers on the hot group")
+    parser.add_argument("--burst", type=int, default=300, help="Expenses posted at the stalled clients")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(
+            DB_MODE=args.mode,
+            DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            EMAIL_TRANSPORT="fake",
+            GROUP_EVENTS_HEARTBEAT_SECONDS=str(HEARTBEAT_SECONDS),
+        )
+        os.environ.setdefault("SECRET_KEY", "bench")
+        os.environ.setdefault("ALGORITHM", "HS256")
+        os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+        token, group_ids, user_ids = seed(args.groups)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(port), "--log-level", "warning", "--backlog", "4096"],
+            env=os.environ
+        )
+        try:
+            deadline = time.time() + 20
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port)).close()
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise
+                    time.sleep(0.1)
+
+            asyncio.run(run(args, port, server.pid, token, group_ids, user_ids))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Login throughput with bcrypt on the request threadpool (before) and on
+the dedicated hashing executor (after).
+
+Run from backend/:
+    python -m benchmarks.bench_login
+
+A burst of logins runs alongside a steady stream of cheap
+authenticated reads, to show whether hashing starves other requests.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+USERS = 20
+LOGINS = 200
+LOGIN_CONCURRENCY = 100
+READ_CONCURRENCY = 10
+PASSWORD = "Bench1!pass"
+
+
+def seed():
+    from app import crud, models, schemas
+    from app.database import SessionLocal
+    from app.auth.security import hash_password, create_access_token
+
+    db = SessionLocal()
+    hashed = hash_password(PASSWORD)
+    users = [
+        models.User(name=f"user{i}", email=f"user{i}@example.com", hashed_password=hashed)
+        for i in range(USERS)
+    ]
+    db.add_all(users)
+    db.commit()
+
+    group = crud.create_group(db, schemas.GroupCreate(name="bench", base_currency="USD"), users[0].id)
+    token = create_access_token({"sub": str(users[0].id)})
+    group_id = str(group.id)
+    db.close()
+    return token, group_id
+
+
+def use_request_threadpool():
+    """
+    Restore the old behaviour: hashing shares FastAPI's threadpool.
+    """
+    from starlette.concurrency import run_in_threadpool
+    from app.auth import routes
+
+    async def run_hashing(fn, *args):
+        return await run_in_threadpool(fn, *args)
+
+    routes.run_hashing = run_hashing
+
+
+async def run_worker(mode):
+    import httpx
+    from app.main import app
+
+    token, group_id = seed()
+    if mode == "before":
+        use_request_threadpool()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statuses = []
+        read_latencies = []
+        logins = iter(range(LOGINS))
+        done = asyncio.Event()
+
+        async def login_worker():
+            for i in logins:
+                response = await client.post("/auth/login", json={
+                    "email": f"user{i % USERS}@example.com",
+                    "password": PASSWORD
+                })
+                statuses.append(response.status_code)
+
+        async def read_worker():
+            headers = {"Authorization": f"Bearer {token}"}
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get(f"/groups/{group_id}/balances", headers=headers)
+                read_latencies.append(time.perf_counter() - start)
+
+        readers = [asyncio.create_task(read_worker()) for _ in range(READ_CONCURRENCY)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(LOGIN_CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        await asyncio.gather(*readers)
+
+    read_latencies.sort()
+    print(json.dumps({
+        "mode": mode,
+        "logins_ok": statuses.count(200),
+        "rejected_503": statuses.count(503),
+        "logins_per_s": round(statuses.count(200) / elapsed, 1),
+        "burst_s": round(elapsed, 2),
+        "read_p50_ms": round(statistics.median(read_latencies) * 1000, 2),
+        "read_p99_ms": round(read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000, 2),
+    }), flush=True)
+
+
+def run_benchmark():
+    print(f"{'mode':<8}{'ok':>6}{'503':>6}{'login/s':>9}{'burst s':>9}"
+          f"{'read p50 ms':>13}{'read p99 ms':>13}")
+
+    for mode in ("before", "after"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+                DB_CREATE_ALL="true"
+            )
+            env.setdefault("SECRET_KEY", "bench")
+            env.setdefault("ALGORITHM", "HS256")
+            env.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_login", "--worker", mode],
+                env=env, check=True, capture_output=True, text=True
+            ).stdout
+
+        r = json.loads(output.splitlines()[-1])
+        print(f"{r['mode']:<8}{r['logins_ok']:>6}{r['rejected_503']:>6}"
+              f"{r['logins_per_s']:>9}{r['burst_s']:>9}"
+              f"{r['read_p50_ms']:>13}{r['read_p99_ms']:>13}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        asyncio.run(run_worker(sys.argv[-1]))
+    else:
+        run_benchmark()
@@ -0,0 +1,90 @@
+"""
+Ledger folding with Decimal amounts (the old crud arithmetic) against
+int cents (app.money.Money), on large synthetic ledgers.
+
+Run from backend/:
+    python -m benchmarks.bench_money
+    python -m benchmarks.bench_money --entries 1000000
+
+"int cents" takes amounts already in cents, as the balance code now
+holds them between the boundaries; "int cents + to_cents" also pays
+for converting every Decimal amount on the way in, which is why crud
+converts aggregated rows rather than individual ledger entries.
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from app.money import Money, to_cents
+
+
+def generate_ledger(seed: int, entries: int, users: int):
+    rng = random.Random(seed)
+    return [
+        (rng.randrange(users), rng.randrange(users), rng.randint(1, 100_000))
+        for _ in range(entries)
+    ]
+
+
+def fold_decimal(ledger):
+    balances = {}
+    for from_user, to_user, amount in ledger:
+        balances[from_user] = balances.get(from_user, Decimal("0")) - amount
+        balances[to_user] = balances.get(to_user, Decimal("0")) + amount
+    return balances
+
+
+def fold_cents(ledger):
+    balances = {}
+    for from_user, to_user, cents in ledger:
+        balances[from_user] = balances.get(from_user, 0) - cents
+        balances[to_user] = balances.get(to_user, 0) + cents
+    return {user: Money(cents) for user, cents in balances.items()}
+
+
+def fold_converting(ledger):
+    return fold_cents([
+        (from_user, to_user, to_cents(amount)) for from_user, to_user, amount in ledger
+    ])
+
+
+def timed(fn, ledger, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(ledger)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_money")
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10}  {'path':<22}{'best ms':>10}{'entries/s':>14}{'speedup':>9}")
+
+    for entries in args.entries:
+        cents = generate_ledger(1, entries, args.users)
+        decimals = [(f, t, Money(c).amount) for f, t, c in cents]
+
+        expected, baseline = timed(fold_decimal, decimals, args.repeat)
+        runs = [
+            ("Decimal", baseline, expected),
+            ("int cents", *reversed(timed(fold_cents, cents, args.repeat))),
+            ("int cents + to_cents", *reversed(timed(fold_converting, decimals, args.repeat))),
+        ]
+
+        for path, seconds, result in runs:
+            assert {u: Money.of(b) for u, b in result.items()} == \
+                {u: Money.of(b) for u, b in expected.items()}
+            print(f"{entries:>10}  {path:<22}{seconds * 1000:>10.1f}"
+                  f"{entries / seconds:>14,.0f}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
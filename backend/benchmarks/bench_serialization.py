@@ -0,0 +1,138 @@
+"""
+Bytes/sec of the list endpoints' load-and-encode path: ORM objects
+through response_model validation and the stdlib json encoder
+(before), and column tuples encoded with orjson (after).
+
+Run from backend/:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --expenses 5000 --groups 2000
+
+Each call opens a fresh session, as a request would. The group listing
+is one member's page: they belong to the big group and --member-of of
+the small ones. The "after" rows also carry the per-group summary.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.responses import dumps  # noqa: E402
+from benchmarks.datagen import generate_dataset, populate  # noqa: E402
+
+
+def fastapi_default(adapter, content) -> bytes:
+    """
+    What FastAPI does with a response_model and the default
+    JSONResponse: validate, dump in JSON mode, json.dumps.
+    """
+    value = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(
+        adapter.dump_python(value, mode="json"),
+        ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(Session, fn, repeat):
+    samples = []
+    size = rows = 0
+
+    for _ in range(repeat + 1):
+        db = Session()
+        start = time.perf_counter()
+        size, rows = fn(db)
+        samples.append(time.perf_counter() - start)
+        db.close()
+
+    median = statistics.median(samples[1:])
+    return {
+        "rows": rows,
+        "bytes": size,
+        "median_ms": round(median * 1000, 2),
+        "mb_per_s": round(size / median / 1_000_000, 1),
+        "rows_per_s": round(rows / median),
+    }
+
+
+def cases(group_id, user_id, page):
+    expenses = TypeAdapter(list[schemas.ExpenseOut])
+    groups = TypeAdapter(list[schemas.GroupOut])
+
+    def orm_expenses(limit):
+        def run(db):
+            loaded = crud.get_expenses_by_group(db, group_id, limit)
+            return len(fastapi_default(expenses, loaded)), len(loaded)
+        return run
+
+    def row_expenses(limit):
+        def run(db):
+            loaded = crud.get_expense_rows_by_group(db, group_id, limit)
+            return len(dumps(loaded)), len(loaded)
+        return run
+
+    def orm_groups(db):
+        loaded = crud.get_groups(db, user_id, page)
+        return len(fastapi_default(groups, loaded)), len(loaded)
+
+    def row_groups(db):
+        loaded = crud.get_group_rows(db, user_id, page)
+        return len(dumps(loaded)), len(loaded)
+
+    yield f"expenses page of {page}", orm_expenses(page), row_expenses(page)
+    yield "expenses, whole group", orm_expenses(None), row_expenses(None)
+    yield f"groups page of {page}", orm_groups, row_groups
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_serialization")
+    parser.add_argument("--expenses", type=int, default=2000, help="Expenses in the big group")
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--groups", type=int, default=1000, help="Extra small groups")
+    parser.add_argument("--member-of", type=int, default=300,
+                        help="Small groups the listing user also belongs to")
+    parser.add_argument("--page", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        big = generate_dataset(1, groups=1, members=args.members, expenses=args.expenses)
+        small = generate_dataset(2, groups=args.groups, members=2, expenses=0)
+        db = Session()
+        populate(db, big)
+        populate(db, small)
+
+        user_id = big["groups"][0]["members"][0]
+        db.add_all(
+            models.GroupMember(group_id=group["id"], user_id=user_id)
+            for group in small["groups"][:args.member_of]
+        )
+        db.commit()
+        db.close()
+
+        print(f"{'case':<26}{'path':<8}{'rows':>7}{'bytes':>10}"
+              f"{'median ms':>11}{'MB/s':>8}{'rows/s':>10}")
+
+        for case, before, after in cases(big["groups"][0]["id"], user_id, args.page):
+            for path, fn in (("before", before), ("after", after)):
+                r = measure(Session, fn, args.repeat)
+                print(f"{case:<26}{path:<8}{r['rows']:>7}{r['bytes']:>10}"
+                      f"{r['median_ms']:>11}{r['mb_per_s']:>8}{r['rows_per_s']:>10}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare calculate_settlements with optimize_settlements.
+
+Run from backend/:
+    python -m benchmarks.bench_settlements
+"""
+import random
+import time
+
+from app.fairness.settlements import calculate_settlements, optimize_settlements
+
+
+def random_balances(rng, members):
+    cents = [rng.randint(-50_000, 50_000) for _ in range(members - 1)]
+    cents.append(-sum(cents))
+    return {f"user{i}": c / 100 for i, c in enumerate(cents)}
+
+
+def clustered_balances(rng, members):
+    """
+    Members who only share expenses within small sub-circles, so the
+    group splits into several independent zero-sum clusters.
+    """
+    balances = {}
+    i = 0
+    while i < members:
+        size = min(rng.randint(2, 4), members - i)
+        cents = [rng.randint(-20_000, 20_000) for _ in range(size - 1)]
+        cents.append(-sum(cents))
+        for c in cents:
+            balances[f"user{i}"] = c / 100
+            i += 1
+    return dict(sorted(balances.items(), key=lambda _: rng.random()))
+
+
+def float_residue_balances(rng, members):
+    """
+    Balances accumulated with float arithmetic, as calculate_balances does.
+    """
+    balances = {}
+    for i in range(members):
+        balances[f"user{i}"] = sum(0.1 for _ in range(rng.randint(1, 30)))
+    shift = sum(balances.values()) / members
+    return {k: v - shift for k, v in balances.items()}
+
+
+def timed(fn, balances, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(balances)
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def run_benchmark(seed=42, samples=20):
+    rng = random.Random(seed)
+    scenarios = [
+        ("random", random_balances),
+        ("clustered", clustered_balances),
+        ("float-residue", float_residue_balances),
+    ]
+
+    print(f"{'scenario':<14}{'members':>8}{'legacy':>10}{'optimized':>11}"
+          f"{'legacy ms':>12}{'optimized ms':>14}")
+
+    for name, generate in scenarios:
+        for members in (4, 8, 12, 16, 20):
+            legacy_count = optimized_count = 0
+            legacy_ms = optimized_ms = 0.0
+
+            for _ in range(samples):
+                balances = generate(rng, members)
+
+                result, ms = timed(calculate_settlements, balances, 5)
+                legacy_count += len(result)
+                legacy_ms += ms
+
+                result, ms = timed(optimize_settlements, balances, 1)
+                optimized_count += len(result)
+                optimized_ms += ms
+
+            print(f"{name:<14}{members:>8}"
+                  f"{legacy_count / samples:>10.2f}{optimized_count / samples:>11.2f}"
+                  f"{legacy_ms / samples:>12.3f}{optimized_ms / samples:>14.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,138 @@
+"""
+Seeded synthetic data for the benchmark suite. The same seed and
+scale always produce the same users, groups and expenses, user and
+group ids included.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app import crud, models, schemas
+
+
+SCALES = {
+    "small": {"groups": 5, "members": 4, "expenses": 50},
+    "medium": {"groups": 20, "members": 8, "expenses": 500},
+    "large": {"groups": 50, "members": 20, "expenses": 2000},
+}
+
+START = datetime(2024, 1, 1)
+IMPORT_CHUNK = 500
+
+
+# -----------------------
+# Generation
+# -----------------------
+
+def seeded_uuid(rng) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_expense(rng, members, created_at) -> dict:
+    """
+    One expense split evenly between a random subset of at least two
+    members; leftover cents go to the first participant.
+    """
+    participants = rng.sample(members, rng.randint(2, len(members)))
+    total_cents = rng.randint(100, 50_000)
+
+    share, remainder = divmod(total_cents, len(participants))
+    splits = [
+        {"user_id": user_id, "amount": Decimal(share + (remainder if i == 0 else 0)) / 100}
+        for i, user_id in enumerate(participants)
+    ]
+
+    return {
+        "title": f"Expense {rng.randint(1, 10_000)}",
+        "total_amount": Decimal(total_cents) / 100,
+        "paid_by": rng.choice(participants),
+        "splits": splits,
+        "created_at": created_at
+    }
+
+
+def generate_dataset(seed: int, groups: int, members: int, expenses: int) -> dict:
+    rng = random.Random(seed)
+
+    dataset = {"users": [], "groups": []}
+
+    for g in range(groups):
+        member_ids = [seeded_uuid(rng) for _ in range(members)]
+        dataset["users"].extend(member_ids)
+
+        dataset["groups"].append({
+            "id": seeded_uuid(rng),
+            "name": f"Group {g}",
+            "members": member_ids,
+            "expenses": [
+                generate_expense(rng, member_ids, START + timedelta(minutes=i))
+                for i in range(expenses)
+            ]
+        })
+
+    return dataset
+
+
+def as_fairness_input(group: dict) -> list:
+    """
+    The expense dicts app.fairness.balances works on.
+    """
+    return [
+        {
+            "paid_by": str(e["paid_by"]),
+            "total_amount": float(e["total_amount"]),
+            "splits": [
+                {"user_id": str(s["user_id"]), "amount": float(s["amount"])}
+                for s in e["splits"]
+            ]
+        }
+        for e in group["expenses"]
+    ]
+
+
+# -----------------------
+# Database
+# -----------------------
+
+def populate(db, dataset: dict):
+    """
+    Write a generated dataset through the same crud paths the API uses
+    for bulk writes.
+    """
+    db.execute(insert(models.User), [
+        {
+            "id": user_id,
+            "name": f"user-{user_id.hex[:8]}",
+            "email": f"{user_id.hex}@example.com",
+            "hashed_password": "x",
+            "is_active": True,
+            "created_at": START
+        }
+        for user_id in dataset["users"]
+    ])
+
+    for group in dataset["groups"]:
+        db.add(models.Group(
+            id=group["id"],
+            name=group["name"],
+            base_currency="USD",
+            created_by=group["members"][0],
+            created_at=START
+        ))
+        db.add_all([
+            models.GroupMember(
+                group_id=group["id"],
+                user_id=user_id,
+                role=models.GroupRole.owner if i == 0 else models.GroupRole.member
+            )
+            for i, user_id in enumerate(group["members"])
+        ])
+    db.commit()
+
+    for group in dataset["groups"]:
+        rows = [schemas.ExpenseImportRow(**e) for e in group["expenses"]]
+        for start in range(0, len(rows), IMPORT_CHUNK):
+            crud.bulk_create_expenses(db, group["id"], rows[start:start + IMPORT_CHUNK])
@@ -0,0 +1,308 @@
+"""
+Benchmark suite for the fairness functions and the main crud paths,
+at parameterized scales, with machine-readable output.
+
+Run from backend/:
+    python -m benchmarks.suite run --scale small --output results.json
+    python -m benchmarks.suite run --groups 10 --members 6 --expenses 300
+    python -m benchmarks.suite compare baseline.json results.json
+
+`run` uses a fresh SQLite file unless --database is given. A
+Postgres database passed with --database must be empty, or is wiped
+first with --reset.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import sqlalchemy
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+# app.database builds an engine from DATABASE_URL at import time; the
+# suite only uses its own engine below
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app import crud, schemas  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.fairness.balances import calculate_balances, fairness_score  # noqa: E402
+from app.fairness.settlements import calculate_settlements, optimize_settlements  # noqa: E402
+from benchmarks.datagen import SCALES, as_fairness_input, generate_dataset, populate  # noqa: E402
+
+
+RESULTS_VERSION = 1
+
+
+# -----------------------
+# Timing
+# -----------------------
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "count": repeat,
+        "min_ms": round(samples[0] * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[max(0, int(repeat * 0.95) - 1)] * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+    }
+
+
+# -----------------------
+# Cases
+# -----------------------
+
+def fairness_cases(dataset: dict):
+    """
+    Yield (case, callable) pairs; each call covers every group once.
+    """
+    inputs = [as_fairness_input(group) for group in dataset["groups"]]
+    balances = [calculate_balances(expenses) for expenses in inputs]
+
+    yield "fairness.calculate_balances", lambda: [calculate_balances(e) for e in inputs]
+    yield "fairness.fairness_score", lambda: [fairness_score(b) for b in balances]
+    yield "fairness.calculate_settlements", lambda: [calculate_settlements(b) for b in balances]
+    yield "fairness.optimize_settlements", lambda: [optimize_settlements(b) for b in balances]
+
+
+def crud_cases(db, dataset: dict):
+    """
+    Yield (case, callable) pairs that each hit one group per call,
+    cycling through the groups.
+    """
+    groups = dataset["groups"]
+    state = {"turn": 0, "edits": []}
+
+    def next_group():
+        group = groups[state["turn"] % len(groups)]
+        state["turn"] += 1
+        return group
+
+    def new_expense(group):
+        members = group["members"]
+        return schemas.ExpenseCreate(
+            group_id=group["id"],
+            title="Bench",
+            total_amount=Decimal("30.00"),
+            paid_by=members[0],
+            splits=[
+                {"user_id": members[0], "amount": Decimal("15.00")},
+                {"user_id": members[-1], "amount": Decimal("15.00")}
+            ]
+        )
+
+    def create_expense():
+        group = next_group()
+        expense = crud.create_expense(db, new_expense(group))
+        state["edits"].append((group, expense.id))
+
+    def update_expense():
+        if not state["edits"]:
+            create_expense()
+        group, expense_id = state["edits"].pop()
+        members = group["members"]
+        crud.update_expense(db, expense_id, schemas.ExpenseUpdate(
+            title=None, total_amount=None, paid_by=None,
+            splits=[{"user_id": m, "amount": Decimal("10.00")} for m in members[:3]]
+        ))
+
+    def create_settlement():
+        group = next_group()
+        crud.create_settlement(db, schemas.SettlementCreate(
+            group_id=group["id"],
+            from_user=group["members"][-1],
+            to_user=group["members"][0],
+            amount=Decimal("5.00")
+        ))
+
+    def bulk_create_expenses():
+        group = next_group()
+        rows = [
+            schemas.ExpenseImportRow(**new_expense(group).model_dump(exclude={"group_id"}))
+            for _ in range(100)
+        ]
+        crud.bulk_create_expenses(db, group["id"], rows)
+
+    yield "crud.get_group_balances", lambda: crud.get_group_balances(db, next_group()["id"])
+    yield "crud.get_expenses_by_group", lambda: crud.get_expenses_by_group(db, next_group()["id"], 50)
+    yield "crud.compute_group_balances", lambda: crud.compute_group_balances(db, next_group()["id"])
+    yield "crud.rebuild_group_balances", lambda: crud.rebuild_group_balances(db, next_group()["id"])
+    yield "crud.create_expense", create_expense
+    yield "crud.update_expense", update_expense
+    yield "crud.create_settlement", create_settlement
+    yield "crud.bulk_create_expenses[100]", bulk_create_expenses
+
+
+# -----------------------
+# Run
+# -----------------------
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_database(url: str, reset: bool):
+    engine = create_engine(url)
+
+    if reset:
+        Base.metadata.drop_all(engine)
+    elif set(inspect(engine).get_table_names()) & set(Base.metadata.tables):
+        sys.exit(f"{url} already has PayShare tables; pass --reset to wipe them")
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def run(args):
+    params = dict(SCALES[args.scale])
+    for key in ("groups", "members", "expenses"):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database or f"sqlite:///{tmp}/bench.db"
+        engine = prepare_database(url, args.reset)
+
+        dataset = generate_dataset(args.seed, **params)
+
+        results = []
+
+        def record(case, fn):
+            stats = measure(fn, args.repeat)
+            results.append({"case": case, **stats})
+            print(f"{case:<36}{stats['median_ms']:>12.3f} ms{stats['p95_ms']:>12.3f} ms",
+                  file=sys.stderr)
+
+        print(f"{'case':<36}{'median':>15}{'p95':>15}", file=sys.stderr)
+
+        for case, fn in fairness_cases(dataset):
+            record(case, fn)
+
+        db = sessionmaker(bind=engine, autoflush=False)()
+        start = time.perf_counter()
+        populate(db, dataset)
+        seed_seconds = time.perf_counter() - start
+
+        for case, fn in crud_cases(db, dataset):
+            record(case, fn)
+
+        db.close()
+        dialect = engine.dialect.name
+        engine.dispose()
+
+    report = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": dialect,
+            "seed": args.seed,
+            "scale": args.scale,
+            "params": params,
+            "repeat": args.repeat,
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+# -----------------------
+# Compare
+# -----------------------
+
+def compare(args):
+    """
+    Exit non-zero if any case's median got slower by more than
+    --threshold (a fraction) between two result files.
+    """
+    with open(args.baseline) as f:
+        baseline = {r["case"]: r for r in json.load(f)["results"]}
+    with open(args.current) as f:
+        current = {r["case"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"{'case':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+
+    for case, result in current.items():
+        if case not in baseline:
+            print(f"{case:<36}{'-':>12}{result['median_ms']:>12.3f}{'new':>10}")
+            continue
+
+        before = baseline[case]["median_ms"]
+        after = result["median_ms"]
+        change = (after - before) / before if before else 0.0
+
+        flag = ""
+        if change > args.threshold:
+            regressions.append(case)
+            flag = "  REGRESSION"
+        print(f"{case:<36}{before:>12.3f}{after:>12.3f}{change:>+10.1%}{flag}")
+
+    if regressions:
+        sys.exit(1)
+
+
+# -----------------------
+# Entry point
+# -----------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write JSON results")
+    run_parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    run_parser.add_argument("--groups", type=int)
+    run_parser.add_argument("--members", type=int)
+    run_parser.add_argument("--expenses", type=int, help="Expenses per group")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--database", help="SQLAlchemy URL, default a temporary SQLite file")
+    run_parser.add_argument("--reset", action="store_true", help="Drop existing tables first")
+    run_parser.add_argument("--output", help="Write JSON here instead of stdout")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+# app.database builds its engine at import time; tests that need a
+# database create their own SQLite engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Same for the token settings app.auth.security reads
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.services.fx_rates import fx_rate_cache  # noqa: E402
+
+pytest_plugins = ["query_count_plugin"]
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_cache():
+    """
+    The rate cache is per process; each test's database starts its
+    rate versions from scratch.
+    """
+    fx_rate_cache.clear()
+    yield
+    fx_rate_cache.clear()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    sessionmaker over a fresh SQLite file with every table created.
+    A file rather than sqlite:// so each session gets its own
+    connection and transaction.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def users(db):
+    """
+    Ids of six users, a to f.
+    """
+    rows = [
+        models.User(name=name, email=f"{name}@example.com", hashed_password="x")
+        for name in "abcdef"
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [user.id for user in rows]
+
+
+@pytest.fixture
+def make_group(db):
+    """
+    make_group(creator, members=(), currency="USD") -> group id, with
+    the creator as owner and `members` as plain members.
+    """
+    def make(creator, members=(), currency="USD"):
+        group = crud.create_group(
+            db, schemas.GroupCreate(name="Trip", base_currency=currency), creator
+        )
+        db.add_all(models.GroupMember(group_id=group.id, user_id=m) for m in members)
+        db.commit()
+        return group.id
+
+    return make
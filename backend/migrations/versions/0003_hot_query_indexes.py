@@ -0,0 +1,53 @@
+"""hot query indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:20:41.112407
+
+Composite and partial indexes for the per-group ledger fold, expense
+edits, split loading and keyset expense listing. On Postgres they are
+built CONCURRENTLY, outside a transaction, so writes aren't blocked.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Written the way each dialect compiles `is_active == True` in queries,
+# so the planner can match them to the partial indexes
+ACTIVE_ONLY = {
+    'postgresql_where': sa.text('is_active = true'),
+    'sqlite_where': sa.text('is_active = 1'),
+}
+
+INDEXES = [
+    ('ix_ledger_entries_group_active', 'ledger_entries', ['group_id'], ACTIVE_ONLY),
+    ('ix_ledger_entries_reference_active', 'ledger_entries', ['reference_id'], ACTIVE_ONLY),
+    ('ix_expense_splits_expense_active', 'expense_splits', ['expense_id', 'is_active'], {}),
+    ('ix_expenses_group_active_created', 'expenses', ['group_id', 'created_at', 'id'], ACTIVE_ONLY),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, **options
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""group version
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:02:17.530164
+
+Per-group change counter behind the ETags on balances and expense
+lists. Existing groups start at 0.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('groups', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('groups') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,74 @@
+"""currencies and fx rates
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:40:52.904417
+
+Expenses, ledger entries and the materialized balances carry a
+currency, backfilled with the group's base currency; balances are kept
+per currency. Adds the fx_rates table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows without a group get XXX, the ISO code for "no currency"
+BACKFILL = (
+    "UPDATE {table} SET currency = COALESCE("
+    "(SELECT base_currency FROM groups WHERE groups.id = {table}.group_id), 'XXX')"
+)
+
+BALANCE_TABLES = [
+    ('group_balances', 'pk_group_balances'),
+    ('ledger_checkpoint_balances', 'pk_ledger_checkpoint_balances'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fx_rates',
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('rate', sa.Numeric(precision=20, scale=10), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('currency')
+    )
+
+    for table in ('expenses', 'ledger_entries'):
+        op.add_column(table, sa.Column('currency', sa.String(length=3), nullable=True))
+        op.execute(BACKFILL.format(table=table))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('currency', existing_type=sa.String(length=3), nullable=False)
+
+    for table, pk in BALANCE_TABLES:
+        op.add_column(table, sa.Column('currency', sa.String(length=3), nullable=True))
+        op.execute(BACKFILL.format(table=table))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('currency', existing_type=sa.String(length=3), nullable=False)
+            batch_op.drop_constraint(pk, type_='primary')
+            batch_op.create_primary_key(pk, ['group_id', 'user_id', 'currency'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Only safe while every group is single-currency
+    for table, pk in BALANCE_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(pk, type_='primary')
+            batch_op.drop_column('currency')
+            batch_op.create_primary_key(pk, ['group_id', 'user_id'])
+
+    for table in ('ledger_entries', 'expenses'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('currency')
+
+    op.drop_table('fx_rates')
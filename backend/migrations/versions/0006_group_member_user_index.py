@@ -0,0 +1,41 @@
+"""group member user index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:40:12.204571
+
+Partial index on active memberships by user, so listing a user's
+groups reads only their own membership rows. Built CONCURRENTLY on
+Postgres, like the 0003 indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_group_members_user_active', 'group_members', ['user_id', 'group_id'],
+            unique=False, postgresql_concurrently=True,
+            postgresql_where=sa.text('is_active = true'),
+            sqlite_where=sa.text('is_active = 1')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_group_members_user_active', table_name='group_members',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,54 @@
+"""change versions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:12:48.630915
+
+Stamps expenses, settlements and ledger entries with the group version
+of the write that created or deactivated them, indexed per group so
+GET /sync reads a group's changes as a range scan. Existing rows start
+at 0, like the group versions in 0004. The indexes are built
+CONCURRENTLY on Postgres, like the 0003 indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_expenses_group_change', 'expenses'),
+    ('ix_settlements_group_change', 'settlements'),
+    ('ix_ledger_entries_group_change', 'ledger_entries'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for _, table in INDEXES:
+        op.add_column(table, sa.Column('change_version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, ['group_id', 'change_version'], unique=False,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    for _, table in reversed(INDEXES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('change_version')
@@ -0,0 +1,70 @@
+"""drop double expense reversals
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 21:04:37.215806
+
+Expense edits used to deactivate the old version's ledger entries and
+also insert active reversal entries (reference_type 'adjustment'),
+cancelling the old version twice. Edits now only deactivate, so the
+existing reversals are deactivated too and stamped with a new group
+version, so GET /sync drops them from clients.
+
+The per-user balance tables are then rebuilt from the active entries:
+group_balances in full, and the ledger checkpoints are cleared, since
+the reversals were folded into them. The compaction job checkpoints
+the groups again on its next run.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STAMP = (
+    "UPDATE ledger_entries SET is_active = {active}, "
+    "change_version = (SELECT version FROM groups WHERE groups.id = ledger_entries.group_id) "
+    "WHERE reference_type = 'adjustment'"
+)
+
+# 0009 repeats this rebuild word for word; keep the two in step.
+REBUILD = [
+    "UPDATE ledger_entries SET checkpoint_seq = NULL",
+    "DELETE FROM ledger_checkpoint_balances",
+    "DELETE FROM ledger_checkpoints",
+    "DELETE FROM group_balances",
+    "INSERT INTO group_balances (group_id, user_id, currency, balance) "
+    "SELECT group_id, user_id, currency, ROUND(SUM(amount), 2) FROM ("
+    "SELECT group_id, from_user AS user_id, currency, -amount AS amount "
+    "FROM ledger_entries WHERE is_active = true "
+    "UNION ALL "
+    "SELECT group_id, to_user AS user_id, currency, amount "
+    "FROM ledger_entries WHERE is_active = true"
+    ") AS movements GROUP BY group_id, user_id, currency",
+]
+
+
+def _rewrite(active: str) -> None:
+    op.execute(
+        "UPDATE groups SET version = version + 1 WHERE id IN "
+        "(SELECT group_id FROM ledger_entries WHERE reference_type = 'adjustment')"
+    )
+    op.execute(STAMP.format(active=active))
+    for statement in REBUILD:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rewrite('false')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rewrite('true')
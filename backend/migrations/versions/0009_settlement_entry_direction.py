@@ -0,0 +1,77 @@
+"""settlement entry direction
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 21:26:10.482193
+
+Ledger entries read "from_user owes to_user", so a settlement's entry
+runs from the payee to the payer. Settlements used to record it the
+other way round, increasing the payer's debt. Those entries, the ones
+whose from_user is still the settlement's payer, are swapped and
+stamped with a new group version, so GET /sync sends clients the
+corrected rows.
+
+The balance tables are then rebuilt from the active entries, as in
+0008.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Entries whose from_user is the settlement's {side}
+ENTRIES = (
+    "reference_type = 'settlement' AND EXISTS ("
+    "SELECT 1 FROM settlements WHERE settlements.id = ledger_entries.reference_id "
+    "AND settlements.{side} = ledger_entries.from_user)"
+)
+
+# Copied on purpose from 0008, so each revision stays self-contained:
+# a fix to this rebuild belongs in both files.
+REBUILD = [
+    "UPDATE ledger_entries SET checkpoint_seq = NULL",
+    "DELETE FROM ledger_checkpoint_balances",
+    "DELETE FROM ledger_checkpoints",
+    "DELETE FROM group_balances",
+    "INSERT INTO group_balances (group_id, user_id, currency, balance) "
+    "SELECT group_id, user_id, currency, ROUND(SUM(amount), 2) FROM ("
+    "SELECT group_id, from_user AS user_id, currency, -amount AS amount "
+    "FROM ledger_entries WHERE is_active = true "
+    "UNION ALL "
+    "SELECT group_id, to_user AS user_id, currency, amount "
+    "FROM ledger_entries WHERE is_active = true"
+    ") AS movements GROUP BY group_id, user_id, currency",
+]
+
+
+def _swap(side: str) -> None:
+    entries = ENTRIES.format(side=side)
+
+    op.execute(
+        "UPDATE groups SET version = version + 1 WHERE id IN "
+        f"(SELECT group_id FROM ledger_entries WHERE {entries})"
+    )
+    op.execute(
+        "UPDATE ledger_entries SET from_user = to_user, to_user = from_user, "
+        "change_version = (SELECT version FROM groups WHERE groups.id = ledger_entries.group_id) "
+        f"WHERE {entries}"
+    )
+    for statement in REBUILD:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _swap('from_user')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap('to_user')
@@ -0,0 +1,41 @@
+"""outbound email claims
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 21:48:33.907154
+
+Durable emails are claimed by one worker process before they are
+sent: a 'sending' status and the time of the claim. The html of
+emails already sent or given up on is cleared, since reset emails
+carry a live token.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE outboundemailstatus ADD VALUE IF NOT EXISTS 'sending'")
+
+    op.add_column('outbound_emails', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE outbound_emails SET html = '' WHERE status IN ('sent', 'failed')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres can't drop an enum value; no row uses it afterwards
+    op.execute("UPDATE outbound_emails SET status = 'pending' WHERE status = 'sending'")
+
+    with op.batch_alter_table('outbound_emails') as batch_op:
+        batch_op.drop_column('claimed_at')
@@ -0,0 +1,59 @@
+"""
+Pytest plugin for query-count budgets, loaded from backend/conftest.py.
+It lives beside conftest rather than in app/, so the runtime package
+never imports pytest.
+
+    def test_list_expenses(client, max_queries):
+        with max_queries(3):
+            client.get(f"/expenses/group/{group_id}")
+
+    @pytest.mark.max_queries(3)
+    def test_balances(db):
+        crud.get_group_balances(db, group_id)
+
+Both count every statement on every engine, whichever thread runs it,
+and fail with the statements grouped by shape.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from app.query_profiler import capture_queries
+
+
+def _check(profile, limit: int):
+    if profile.count > limit:
+        pytest.fail(
+            f"Expected at most {limit} queries, got {profile.summary()}",
+            pytrace=False
+        )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "max_queries(n): fail if the test issues more than n SQL statements"
+    )
+
+
+@pytest.fixture
+def max_queries():
+    @contextmanager
+    def budget(limit: int):
+        with capture_queries() as profile:
+            yield profile
+        _check(profile, limit)
+
+    return budget
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("max_queries")
+    if marker is None:
+        return (yield)
+
+    with capture_queries() as profile:
+        result = yield
+
+    _check(profile, marker.args[0])
+    return result